@@ -1,25 +1,219 @@
 # app.py
 
 import streamlit as st
+import json
 import os
 import sys
-import json
-import pandas as pd
-from io import StringIO
-from contextlib import redirect_stdout
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 
 # Add the src directory to the Python path to resolve module imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
 
-from mission.mission_loader import load_mission_from_json
-from mission.trajectory_simulator import TrajectorySimulator
-from visualization.plotter import plot_results_plotly
+from mission.catalog import MissionCatalog
+from mission.comparison import ComparisonStore, mission_labels
+from mission.job_service import FINAL_STATES, JobClient, start_background_server
+from mission.monte_carlo import MonteCarloResult, run_monte_carlo
+from mission.result_io import result_to_bytes
+from mission.simulation_result import SimulationResult
+from mission.surrogate import SurrogateModel, build_surrogate, stage_outcomes, surrogate_path
+from mission.sweep import apply_point
+from mission.trajectory_simulator import DEFAULT_PROFILE, SOLVER_PROFILES
+from visualization.plotter import plot_comparison_plotly, plot_envelopes_plotly, plot_results_plotly
+
+# Wall time between job status requests
+JOB_POLL_INTERVAL = 0.25 # seconds
+
+MISSION_DIR = 'data/missions'
+
+# Default relative 1-sigma dispersions offered in the app, in percent
+DISPERSION_DEFAULTS = {
+    'isp': ("Isp", 1.0),
+    'thrust': ("Thrust", 1.0),
+    'dry_mass': ("Dry Mass", 2.0),
+    'fuel_mass': ("Propellant Loading", 0.5),
+}
+
+# Download formats: label -> (result_io format, file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ('csv', 'csv', 'text/csv'),
+    "NumPy (.npz)": ('npz', 'npz', 'application/octet-stream'),
+    "Parquet": ('parquet', 'parquet', 'application/vnd.apache.parquet'),
+    "Arrow (.arrow)": ('arrow', 'arrow', 'application/vnd.apache.arrow.file'),
+}
 
 # --- Helper Functions ---
-def get_mission_details(mission_path):
-    """Reads and returns the content of the mission JSON file."""
-    with open(mission_path, 'r') as f:
-        return json.load(f)
+@st.cache_resource
+def get_job_client():
+    """
+    Connects to the local job service, starting one inside the app server if none
+    is running. The client is shared by every session.
+    """
+    client = JobClient()
+    if not client.available():
+        client = JobClient(start_background_server())
+    return client
+
+@st.cache_resource
+def get_analysis_executor():
+    """
+    Returns the thread that runs dispersion analyses off the script thread, shared
+    by every session. Analyses run one at a time, each on its own worker pool.
+    """
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='dispersion')
+
+@st.cache_resource
+def get_catalog():
+    """Returns the mission catalog, shared by every session and refreshed on each rerun."""
+    return MissionCatalog(MISSION_DIR)
+
+@st.cache_resource
+def load_surrogate(path, modified):
+    """Reads a stored surrogate model; `modified` (the file's mtime) invalidates the cached copy."""
+    return SurrogateModel.load(path)
+
+def find_preview_model(mission_details, profile):
+    """
+    Returns the stored surrogate of a mission, if any, and the reasons it is stale.
+    """
+    path = surrogate_path(mission_details, profile)
+    try:
+        model = load_surrogate(path, os.path.getmtime(path))
+    except (OSError, ValueError, KeyError):
+        return None, []
+    return model, model.stale_reasons(mission_details, profile)
+
+def show_preview(model, mission_details, profile):
+    """Renders stage sliders and the surrogate's burnout preview, with a full simulation on demand."""
+    point = {}
+    slider_cols = st.columns(len(mission_details['stages']))
+    for i, col in enumerate(slider_cols):
+        for name, (low, high) in zip(model.parameters, model.bounds):
+            if not name.startswith(f"{i}."):
+                continue
+            value = min(max(model.nominal[name], low), high)
+            if name.endswith('num_engines'):
+                point[name] = col.slider(f"Stage {i+1} Engines", int(low), int(high), int(value),
+                                         key=f"preview_{name}")
+            else:
+                point[name] = col.slider(f"Stage {i+1} Fuel Mass (kg)", float(low), float(high), float(value),
+                                         step=(high - low) / 100, format="%.0f", key=f"preview_{name}")
+
+    start = time.perf_counter()
+    values, errors = model.predict(point)
+    elapsed = time.perf_counter() - start
+    rows = {}
+    for name, value, error in zip(model.outputs, values, errors):
+        stage_index, _, outcome = name.partition('.')
+        rows.setdefault(f"Stage {int(stage_index) + 1}", {})[outcome] = f"{value:,.1f} ± {error:,.1f}"
+    st.dataframe(rows, use_container_width=True)
+    st.caption(f"Preview in {elapsed * 1e6:.0f} µs, interpolated from {model.info['points']} simulations. "
+               f"Error bars are estimated from the curvature of the simulation grid.")
+
+    if st.button("Simulate This Configuration"):
+        client = get_job_client()
+        job_id = client.submit(apply_point(mission_details, point), profile)
+        with st.spinner("Simulating..."):
+            job = client.wait(job_id, JOB_POLL_INTERVAL)
+        if job['state'] != 'done':
+            st.error(f"The simulation {job['state']}" + (f": {job['error']}" if job['error'] else ""))
+            return
+        actual = stage_outcomes(client.result(job_id), len(mission_details['stages']))
+        comparison = {}
+        for name, value, exact in zip(model.outputs, values, actual):
+            stage_index, _, outcome = name.partition('.')
+            comparison[f"Stage {int(stage_index) + 1} {outcome.replace('_', ' ')}"] = {
+                'Preview': float(value), 'Simulated': float(exact), 'Difference': float(value - exact)}
+        st.dataframe(comparison, use_container_width=True)
+
+def show_metrics(container, results):
+    """Renders the key metrics of a (possibly partial) trajectory into a placeholder."""
+    with container.container():
+        st.metric("Max Altitude (km)", f"{results['altitude'].max():.2f}")
+        st.metric("Max Velocity (m/s)", f"{results['velocity'].max():.2f}")
+        st.metric("Total Mission Time (s)", f"{results['time'][-1]:.2f}")
+
+def show_dispersion(result):
+    """Renders the statistics and envelopes of a Monte Carlo dispersion analysis."""
+    info = result.info
+    st.caption(f"{info['mission']}: {info['runs'] - info['failed']} of {info['runs']} runs succeeded "
+               f"(seed {info['seed']}, '{info['profile']}' solver profile)")
+    st.dataframe(result.summary_frame(), use_container_width=True)
+    st.plotly_chart(plot_envelopes_plotly(result), use_container_width=True)
+    for error in info['errors']:
+        st.warning(f"Failed {error}")
+
+def show_dispersion_analysis():
+    """
+    Renders the progress of the session's pending dispersion analysis, or the last
+    finished one. Called as a fragment that reruns on its own while an analysis is
+    pending, so the progress bar updates without holding up the rest of the page.
+    After the analysis finishes, the fragment redraws its statistics until the
+    next full rerun.
+    """
+    if 'dispersion_job' in st.session_state:
+        future, analysis_progress = st.session_state['dispersion_job']
+        if not future.done():
+            if future.running():
+                st.progress(analysis_progress['finished'] / analysis_progress['runs'],
+                            text=f"Simulated {analysis_progress['finished']} of {analysis_progress['runs']} runs")
+            else:
+                st.progress(0.0, text="Waiting for an earlier analysis to finish...")
+            return
+        del st.session_state['dispersion_job']
+        try:
+            st.session_state['dispersion'] = future.result()
+        except Exception as e:
+            st.error(f"An error occurred during the dispersion analysis: {e}")
+    if 'dispersion' in st.session_state:
+        show_dispersion(st.session_state['dispersion'])
+
+def run_comparison_jobs(files, profile, progress_bar):
+    """
+    Simulates catalog missions concurrently in the job service's worker pool and
+    collects the finished trajectories in a ComparisonStore.
+    """
+    client = get_job_client()
+    jobs = {label: client.submit(catalog.load(file), profile)
+            for label, file in zip(mission_labels(files), files)}
+    statuses = {}
+    while len(statuses) < len(jobs):
+        for label, job_id in jobs.items():
+            if label not in statuses:
+                job = client.status(job_id)
+                if job['state'] in FINAL_STATES:
+                    statuses[label] = job
+        progress_bar.progress(len(statuses) / len(jobs),
+                              text=f"Simulated {len(statuses)} of {len(jobs)} missions")
+        if len(statuses) < len(jobs):
+            time.sleep(JOB_POLL_INTERVAL)
+
+    store = ComparisonStore()
+    for label, job_id in jobs.items():
+        job = statuses[label]
+        if job['state'] != 'done':
+            store.errors.append(f"{label}: the job {job['state']}" + (f": {job['error']}" if job['error'] else ""))
+            continue
+        # The downloaded result is copied into the shared columns and dropped
+        store.add(label, client.result(job_id), cache_hit=job['cache_hit'],
+                  elapsed=job['finished_at'] - job['submitted_at'])
+    return store
+
+def show_comparison(store):
+    """Renders the side-by-side metrics and the overlaid trajectories of a mission comparison."""
+    st.dataframe(store.metrics_frame(), use_container_width=True)
+    cached = [name for name in store if store.info[name]['cache_hit']]
+    if cached:
+        st.caption(f"Loaded from the result cache: {', '.join(cached)}")
+    st.plotly_chart(plot_comparison_plotly(store), use_container_width=True)
+    for error in store.errors:
+        st.warning(f"Failed {error}")
+
+def show_plot(container, results):
+    """Renders the trajectory plot into a placeholder, timing it when the run is instrumented."""
+    with results.stats.timer('plotting') if results.stats else nullcontext():
+        container.plotly_chart(plot_results_plotly(results), use_container_width=True)
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -32,82 +226,249 @@ st.sidebar.title("StellarLab Controls")
 st.sidebar.markdown("Configure and launch your rocket simulation.")
 
 # --- Mission Selection ---
-mission_dir = 'data/missions'
-mission_files = [f for f in os.listdir(mission_dir) if f.endswith('.json')]
+# Only files that changed since the last rerun are parsed again
+catalog = get_catalog()
+catalog.refresh()
+search_query = st.sidebar.text_input("Search Missions", placeholder="Mission, file or stage name")
+with st.sidebar.expander("Filters"):
+    engine_filter = st.multiselect("Engines", catalog.engines())
+    max_stage_count = max((entry['num_stages'] for entry in catalog.search()), default=1)
+    if max_stage_count > 1:
+        stage_range = st.slider("Number of Stages", 1, max_stage_count, (1, max_stage_count))
+    else:
+        stage_range = (1, max_stage_count)
+matches = catalog.search(search_query, engine_filter, *stage_range)
 selected_mission = st.sidebar.selectbox(
     "Choose a Mission Profile",
-    mission_files,
-    index=0
+    [entry['file'] for entry in matches],
+    index=0,
+    format_func=lambda file_name: f"{catalog.get(file_name)['name']} ({file_name})"
+)
+st.sidebar.caption(f"{len(matches)} of {len(catalog)} missions")
+
+# --- Solver Settings ---
+solver_profile = st.sidebar.selectbox(
+    "Solver Accuracy",
+    list(SOLVER_PROFILES),
+    index=list(SOLVER_PROFILES).index(DEFAULT_PROFILE),
+    help="'fast' for quick previews, 'precise' for high-fidelity runs."
 )
 
+# --- Export Settings ---
+export_label = st.sidebar.selectbox(
+    "Export Format",
+    list(EXPORT_FORMATS),
+    help="Binary formats are smaller and faster to load than CSV. Parquet and Arrow need pyarrow."
+)
+
+# --- Diagnostics ---
+capture_profile = st.sidebar.checkbox(
+    "Capture cProfile",
+    help="Profile the simulation in its worker, and list the slowest functions under Performance Stats."
+)
+
+# A click on "Cancel Simulation" reruns the script, which also stops polling the job
+if st.session_state.get('cancel_job') and 'active_job' in st.session_state:
+    get_job_client().cancel(st.session_state.pop('active_job'))
+    st.sidebar.info("Simulation cancelled.")
+
 # --- Main Page ---
 st.title("StellarLab Propulsion Simulator")
 st.markdown("---")
 
+if not matches:
+    st.info("No missions match the search and filters.")
+
 if selected_mission:
-    mission_path = os.path.join(mission_dir, selected_mission)
-    mission_details = get_mission_details(mission_path)
+    mission_entry = catalog.get(selected_mission)
     
-    # Display mission info
-    st.header(f"Mission Preview: `{mission_details['name']}`")
-    for i, stage in enumerate(mission_details['stages']):
+    # Display mission info from the catalog index
+    st.header(f"Mission Preview: `{mission_entry['name']}`")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Stages", mission_entry['num_stages'])
+    col2.metric("Liftoff Mass (kg)", f"{mission_entry['liftoff_mass']:,.0f}")
+    col3.metric("Ideal Delta-v (m/s)", f"{mission_entry['delta_v']:,.0f}",
+                help="Rocket equation, without gravity and drag losses.")
+    for i, stage in enumerate(mission_entry['stages']):
         with st.expander(f"Stage {i+1}: {stage['stage_name']}"):
             col1, col2 = st.columns(2)
             col1.metric("Dry Mass (kg)", f"{stage['dry_mass']:,}")
             col1.metric("Fuel Mass (kg)", f"{stage['fuel_mass']:,}")
             col2.metric("Number of Engines", stage['num_engines'])
-            col2.markdown(f"**Engine Config:** `{stage['engine_config']}`")
+            col2.metric("Ideal Delta-v (m/s)", f"{stage['delta_v']:,.0f}")
+            col2.markdown(f"**Engine:** {stage['engine']} (`{stage['engine_config']}`)")
+
+    # --- Performance Preview ---
+    st.subheader("Performance Preview")
+    mission_details = catalog.load(selected_mission)
+    preview_model, stale = find_preview_model(mission_details, solver_profile)
+    if preview_model is not None and not stale:
+        show_preview(preview_model, mission_details, solver_profile)
+    else:
+        if stale:
+            st.info(f"The preview model is out of date: the {', '.join(stale)} changed since it was built.")
+        else:
+            st.info("Build a preview model to estimate burnout performance instantly while adjusting "
+                    "propellant loads and engine counts. It runs a grid of simulations once.")
+        if st.button("Build Preview Model"):
+            progress_bar = st.progress(0.0, text="Simulating the preview grid...")
+            try:
+                build_surrogate(mission_details, solver_profile, progress=lambda finished, points:
+                                progress_bar.progress(finished / points,
+                                                      text=f"Simulated {finished} of {points} grid points"))
+            except Exception as e:
+                st.error(f"An error occurred while building the preview model: {e}")
+            else:
+                st.rerun()
+            progress_bar.empty()
     
     st.markdown("---")
 
     if st.button("Launch Simulation", type="primary"):
-        log_stream = StringIO()
         try:
-            with st.spinner('Simulating trajectory... This may take a moment.'):
-                with redirect_stdout(log_stream):
-                    # Load mission and run simulation
-                    stages = load_mission_from_json(mission_path)
-                    simulator = TrajectorySimulator(stages)
-                    results = simulator.simulate()
-            
-            st.success("Simulation Complete!")
-            
+            # Simulations run in the job service's worker pool, not in this request thread
+            client = get_job_client()
+            mission_details = catalog.load(selected_mission)
+            job_id = client.submit(mission_details, solver_profile, instrument=capture_profile)
+            st.session_state['active_job'] = job_id
+
             # --- Display Results ---
             st.header("Simulation Results")
-            
+            status = st.empty()
+            cancel_area = st.empty()
+            cancel_area.button("Cancel Simulation", key='cancel_job')
+
             # Create columns for layout
             res_col1, res_col2 = st.columns([1, 2.5]) # Metrics and log on left, plot on right
 
             with res_col1:
                 st.subheader("Key Metrics")
-                max_alt = max(results['altitude'])
-                max_vel = max(results['velocity'])
-                total_time = results['time'][-1]
-                st.metric("Max Altitude (km)", f"{max_alt:.2f}")
-                st.metric("Max Velocity (m/s)", f"{max_vel:.2f}")
-                st.metric("Total Mission Time (s)", f"{total_time:.2f}")
-                
+                metrics_area = st.empty()
+            with res_col2:
+                plot_area = st.empty()
+
+            # Draw the trajectory as the worker simulates it, fetching only the new rows
+            results = SimulationResult()
+            job = client.status(job_id)
+            while job['state'] not in FINAL_STATES:
+                if job['state'] == 'queued':
+                    status.info("Waiting for a free simulation worker...")
+                elif job['progress']:
+                    status.info(f"Simulating trajectory... T+ {job['progress']['time']:.0f}s")
+                else:
+                    status.info("Simulating trajectory...")
+                if job['samples'] > results.num_samples:
+                    results.append(**client.partial(job_id, results.num_samples))
+                    show_metrics(metrics_area, results)
+                    show_plot(plot_area, results)
+                time.sleep(JOB_POLL_INTERVAL)
+                job = client.status(job_id)
+            st.session_state.pop('active_job', None)
+            cancel_area.empty()
+
+            if job['state'] != 'done':
+                raise RuntimeError(f"the job {job['state']}" + (f": {job['error']}" if job['error'] else ""))
+            results = client.result(job_id)
+            show_metrics(metrics_area, results)
+            show_plot(plot_area, results)
+            if job['cache_hit']:
+                status.success("Simulation Complete! (loaded from cache)")
+            else:
+                status.success("Simulation Complete!")
+                st.caption(f"Job {job_id[:8]} finished in {job['finished_at'] - job['submitted_at']:.2f} s")
+                if results.stats is not None and results.stats.reused_stages:
+                    stages = ', '.join(map(str, results.stats.reused_stages))
+                    st.caption(f"Reused stages {stages} from checkpoints of an earlier run.")
+
+            with res_col1:
                 # Data Export
                 st.subheader("Export Data")
-                df = pd.DataFrame(results)
-                csv = df.to_csv(index=False).encode('utf-8')
-                st.download_button(
-                    label="Download Results as CSV",
-                    data=csv,
-                    file_name=f"{selected_mission.replace('.json', '')}_results.csv",
-                    mime='text/csv',
-                )
-
-            with res_col2:
-                # Display interactive plot
-                fig = plot_results_plotly(results)
-                st.plotly_chart(fig, use_container_width=True)
+                file_format, extension, mime = EXPORT_FORMATS[export_label]
+                try:
+                    data = result_to_bytes(results, file_format)
+                except ImportError as e:
+                    st.warning(str(e))
+                else:
+                    st.download_button(
+                        label=f"Download Results as {export_label}",
+                        data=data,
+                        file_name=f"{selected_mission.replace('.json', '')}_results.{extension}",
+                        mime=mime,
+                    )
 
             # Display simulation log
             st.subheader("Simulation Log")
-            st.text_area("Log Output", log_stream.getvalue(), height=250)
+            st.text_area("Log Output", job['log'], height=250)
 
+            # Solver statistics, only available for runs that were simulated for this job
+            with st.expander("Performance Stats"):
+                if results.stats is None:
+                    st.info("Results were loaded from the cache, so there are no solver stats for this run.")
+                else:
+                    st.dataframe(results.stats.rows(), use_container_width=True)
+                    st.caption(", ".join(f"{name}: {seconds * 1000:.1f} ms"
+                                         for name, seconds in results.stats.timings.items()))
+                    if job['profile_summary']:
+                        st.code(job['profile_summary'], language=None)
 
         except Exception as e:
             st.error(f"An error occurred during simulation: {e}")
-            st.error(log_stream.getvalue())
+
+    # --- Dispersion Analysis ---
+    st.markdown("---")
+    st.header("Dispersion Analysis")
+    with st.expander("Monte Carlo Settings"):
+        dispersion_cols = st.columns(len(DISPERSION_DEFAULTS))
+        dispersions = {
+            field: col.number_input(f"{label} 1-sigma (%)", 0.0, 20.0, default, 0.1,
+                                    key=f"sigma_{field}") / 100
+            for col, (field, (label, default)) in zip(dispersion_cols, DISPERSION_DEFAULTS.items())
+        }
+        col1, col2 = st.columns(2)
+        monte_carlo_runs = col1.number_input("Runs", 10, 20000, 500, 10)
+        monte_carlo_seed = col2.number_input("Seed", 0, 2**32 - 1, 0)
+        saved_analysis = st.file_uploader(
+            "Or view a saved analysis",
+            type='json',
+            help="Statistics written by 'python src/main.py montecarlo --output FILE'."
+        )
+
+    if saved_analysis is not None:
+        try:
+            st.session_state['dispersion'] = MonteCarloResult.from_dict(json.load(saved_analysis))
+        except (ValueError, KeyError) as e:
+            st.error(f"Could not read the saved analysis: {e}")
+    if st.button("Run Dispersion Analysis"):
+        # The callback runs on the analysis thread; the script only reads the counts
+        analysis_progress = {'finished': 0, 'runs': int(monte_carlo_runs)}
+        st.session_state['dispersion_job'] = (get_analysis_executor().submit(
+            run_monte_carlo,
+            catalog.load(selected_mission),
+            {field: sigma for field, sigma in dispersions.items() if sigma},
+            int(monte_carlo_runs), seed=int(monte_carlo_seed), profile=solver_profile,
+            progress=lambda finished, runs: analysis_progress.update(finished=finished, runs=runs)
+        ), analysis_progress)
+    # Only this fragment reruns while an analysis is pending; the sections below
+    # render meanwhile, and other widgets stay usable without losing the analysis
+    run_every = JOB_POLL_INTERVAL if 'dispersion_job' in st.session_state else None
+    st.fragment(run_every=run_every)(show_dispersion_analysis)()
+
+# --- Mission Comparison ---
+st.markdown("---")
+st.header("Mission Comparison")
+compared_missions = st.multiselect(
+    "Missions to Compare",
+    [entry['file'] for entry in catalog.search()],
+    default=[selected_mission] if selected_mission else [],
+    format_func=lambda file_name: f"{catalog.get(file_name)['name']} ({file_name})",
+    help="The missions are simulated concurrently on the job service's workers."
+)
+if st.button("Compare Missions", disabled=not compared_missions):
+    progress_bar = st.progress(0.0, text="Simulating missions...")
+    try:
+        st.session_state['comparison'] = run_comparison_jobs(compared_missions, solver_profile, progress_bar)
+    except Exception as e:
+        st.error(f"An error occurred during the comparison: {e}")
+    progress_bar.empty()
+if 'comparison' in st.session_state:
+    show_comparison(st.session_state['comparison'])
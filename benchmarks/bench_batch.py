@@ -0,0 +1,116 @@
+# benchmarks/bench_batch.py
+
+"""
+Wall time of simulate_batch() against simulating each variant with simulate(),
+and a check that both paths agree.
+
+Variants of one mission draw every stage's propellant and dry mass from a
+seeded uniform spread, and alternate the first stage's engine count. Each
+variant is also built as a mission of its own and simulated on the scalar
+path. The batch trajectory ends at final burnout, so the comparison covers the
+powered flight: velocity and altitude of the scalar run, interpolated at the
+batch sample times, and the burnout time, velocity and altitude.
+
+With --check the script exits with status 1 if any difference, relative to the
+largest magnitude of the scalar value, exceeds --rtol.
+
+Usage:
+    python benchmarks/bench_batch.py [--mission FILE] [--vehicles 8] [--profile precise] [--check]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from mission.mission_loader import load_mission_from_dict
+from mission.trajectory_simulator import TrajectorySimulator
+from utils.log import quiet
+
+# Largest relative difference between the batch and scalar paths accepted by
+# --check; both paths stay within about 1e-4 on the 'standard' profile
+DEFAULT_RTOL = 1e-3
+
+def variants(mission_data, count, seed):
+    """
+    Returns per-vehicle batch parameters and the matching mission data of each variant.
+    """
+    rng = np.random.default_rng(seed)
+    parameter_sets, missions = [], []
+    for n in range(count):
+        variant = copy.deepcopy(mission_data)
+        for stage in variant['stages']:
+            stage['fuel_mass'] *= rng.uniform(0.8, 1.05)
+            stage['dry_mass'] *= rng.uniform(0.9, 1.1)
+        if n % 2:
+            variant['stages'][0]['num_engines'] += 1
+        parameter_sets.append({key: [stage[key] for stage in variant['stages']]
+                               for key in ('fuel_mass', 'dry_mass', 'num_engines')})
+        missions.append(variant)
+    return parameter_sets, missions
+
+def differences(batch, n, result):
+    """
+    Returns the relative differences between vehicle n of a batch and its scalar run.
+    """
+    burnout = result.find_event('propellant_depletion')
+    time = batch['time'][n]
+    diffs = {}
+    for column in ('velocity', 'altitude'):
+        reference = np.interp(time, result['time'], result[column])
+        scale = np.max(np.abs(result[column]))
+        diffs[column] = np.max(np.abs(batch[column][n] - reference)) / scale
+        diffs[f"burnout_{column}"] = abs(batch[column][n, -1] - burnout[column]) / scale
+    diffs['burnout_time'] = abs(time[-1] - burnout['time']) / burnout['time']
+    return diffs
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and check batch simulation")
+    parser.add_argument('--mission', default='data/missions/LEO.json', help='Mission JSON file.')
+    parser.add_argument('--vehicles', type=int, default=8, help='Number of variants.')
+    parser.add_argument('--profile', default='precise', help='Solver profile.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the variant spread.')
+    parser.add_argument('--check', action='store_true',
+                        help='Exit with status 1 if the paths differ by more than --rtol.')
+    parser.add_argument('--rtol', type=float, default=DEFAULT_RTOL, help='Accepted relative difference.')
+    args = parser.parse_args()
+
+    with open(args.mission, 'r') as f:
+        mission_data = json.load(f)
+    parameter_sets, missions = variants(mission_data, args.vehicles, args.seed)
+
+    with quiet():
+        start = time.perf_counter()
+        batch = TrajectorySimulator(load_mission_from_dict(mission_data), args.profile).simulate_batch(parameter_sets)
+        batch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [TrajectorySimulator(load_mission_from_dict(variant), args.profile).simulate()
+                   for variant in missions]
+        scalar_time = time.perf_counter() - start
+
+    print(f"{args.vehicles} vehicles, '{args.profile}' profile")
+    print(f"scalar: {scalar_time:.3f} s, batch: {batch_time:.3f} s ({scalar_time / batch_time:.2f}x)")
+
+    worst = {}
+    for n, result in enumerate(results):
+        for name, diff in differences(batch, n, result).items():
+            worst[name] = max(worst.get(name, 0.0), diff)
+    print(f"\n{'difference':<18} {'max relative':>12}")
+    for name, diff in worst.items():
+        print(f"{name:<18} {diff:>12.2e}")
+
+    if args.check:
+        failed = [name for name, diff in worst.items() if not diff <= args.rtol]
+        for name in failed:
+            print(f"MISMATCH {name}: {worst[name]:.2e} > {args.rtol:.0e}")
+        sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_cli_startup.py
+
+"""
+Measures wall time of CLI invocations, from process start to exit.
+
+Every case runs `src/main.py` in a fresh interpreter, so import costs are
+included. The cached headless run reads the LEO mission from a warm result
+cache in a temporary directory and only reports a JSON summary; it shows the
+startup overhead of the CLI itself. The bare interpreter is listed as the floor.
+
+Usage:
+    python benchmarks/bench_cli_startup.py [--repeat 10] [--importtime]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+MAIN = os.path.join(ROOT, 'src', 'main.py')
+MISSION = os.path.join('data', 'missions', 'LEO.json')
+
+CASES = {
+    'python (floor)': [sys.executable, '-c', 'pass'],
+    '--help': [sys.executable, MAIN, '--help'],
+    'headless, cached': [sys.executable, MAIN, '--mission', MISSION, '--summary-json', '-'],
+    'headless, simulated': [sys.executable, MAIN, '--mission', MISSION, '--summary-json', '-', '--no-cache'],
+}
+
+def run(command, env):
+    """
+    Runs a command to completion and returns its wall time in seconds.
+    """
+    start = time.perf_counter()
+    subprocess.run(command, cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def import_times(command, env, limit):
+    """
+    Returns the `limit` top-level imports with the largest cumulative time, in seconds.
+    """
+    output = subprocess.run([command[0], '-X', 'importtime'] + command[1:], cwd=ROOT, env=env,
+                            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            text=True).stderr
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  ', 1): # Only modules imported directly by the program
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup time")
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per case.')
+    parser.add_argument('--importtime', action='store_true',
+                        help='Also list the slowest imports of the cached headless run.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, STELLARLAB_CACHE_DIR=cache_dir)
+        run(CASES['headless, cached'], env) # Warm the result cache
+
+        print(f"{'case':<22} {'best (ms)':>10} {'median (ms)':>12}")
+        for name, command in CASES.items():
+            times = [run(command, env) for _ in range(args.repeat)]
+            print(f"{name:<22} {min(times) * 1000:>10.1f} {statistics.median(times) * 1000:>12.1f}")
+
+        if args.importtime:
+            print("\nSlowest imports of the cached headless run:")
+            for seconds, name in import_times(CASES['headless, cached'], env, 10):
+                print(f"  {name:<40} {seconds * 1000:>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
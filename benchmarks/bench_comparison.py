@@ -0,0 +1,79 @@
+# benchmarks/bench_comparison.py
+
+"""
+Wall time of a concurrent mission comparison against the number of missions.
+
+For 1, 2, 4, ... missions (variants of one mission with scaled propellant
+loads), times simulating them one after the other in this process and
+run_comparison() on a worker pool, both without the result cache. On a host
+with at least as many cores as missions, the comparison's wall time should
+stay close to that of a single mission; with fewer cores it grows by about
+one mission per core. 'growth' is the wall time relative to one mission.
+
+Usage:
+    python benchmarks/bench_comparison.py [--mission FILE] [--max-missions 8] [--profile precise]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from mission.comparison import run_comparison
+from mission.mission_loader import load_mission_from_dict
+from mission.trajectory_simulator import TrajectorySimulator
+from utils.log import quiet
+
+def variants(mission_data, count):
+    """
+    Returns `count` labelled copies of a mission with propellant loads from 80% to 100%.
+    """
+    missions = {}
+    for i in range(count):
+        scale = 0.8 + 0.2 * i / max(1, count - 1)
+        variant = copy.deepcopy(mission_data)
+        for stage in variant['stages']:
+            stage['fuel_mass'] *= scale
+        missions[f"variant_{i}"] = variant
+    return missions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent mission comparisons")
+    parser.add_argument('--mission', default='data/missions/LEO.json', help='Mission JSON file.')
+    parser.add_argument('--max-missions', type=int, default=8, help='Largest number of missions.')
+    parser.add_argument('--profile', default='precise', help='Solver profile.')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count).')
+    args = parser.parse_args()
+
+    with open(args.mission, 'r') as f:
+        mission_data = json.load(f)
+
+    print(f"{os.cpu_count()} CPUs, '{args.profile}' profile")
+    print(f"\n{'missions':>8} {'serial (s)':>11} {'pool (s)':>9} {'speedup':>8} {'growth':>7}")
+    counts = [1]
+    while counts[-1] * 2 <= args.max_missions:
+        counts.append(counts[-1] * 2)
+    single = None
+    for count in counts:
+        missions = variants(mission_data, count)
+        start = time.perf_counter()
+        with quiet():
+            for variant in missions.values():
+                TrajectorySimulator(load_mission_from_dict(variant), args.profile).simulate()
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with quiet():
+            store = run_comparison(missions, args.profile, max_workers=args.workers, use_cache=False)
+        pool = time.perf_counter() - start
+        if store.errors:
+            raise RuntimeError("; ".join(store.errors))
+        single = single or pool
+        print(f"{count:>8} {serial:>11.3f} {pool:>9.3f} {serial / pool:>8.2f} {pool / single:>7.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_compiled_rhs.py
+
+"""
+Throughput of the trajectory RHS before and after compiling the vehicle model.
+
+Evaluates the reference TrajectorySimulator._rocket_equation and the closures
+from mission.vehicle_model over the same states, spread through the burn and
+the lower atmosphere, with and without drag. States are NumPy arrays, as
+solve_ivp passes them. The numba backend is included when numba is installed;
+its first call is made before timing so compilation is not counted.
+
+Usage:
+    python benchmarks/bench_compiled_rhs.py [--calls N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from engines.liquid_engine import LiquidEngine
+from mission.mission_loader import Stage
+from mission.trajectory_simulator import TrajectorySimulator
+from mission.vehicle_model import CompiledStage, make_rocket_rhs, resolve_rhs_backend
+
+def calls_per_second(rhs, states, repeat):
+    """
+    Returns the best throughput of fun(t, y) over the states, in calls per second.
+    """
+    rhs(*states[0]) # Warm up, e.g. JIT compilation
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t, y in states:
+            rhs(t, y)
+        best = min(best, time.perf_counter() - start)
+    return len(states) / best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reference and compiled RHS")
+    parser.add_argument('--calls', type=int, default=100000, help='RHS calls per timing run.')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs; the best is reported.')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    times = rng.uniform(0, 150, args.calls).tolist()
+    velocity = rng.uniform(0, 3000, args.calls)
+    altitude = rng.uniform(0, 120000, args.calls)
+    states = list(zip(times, np.column_stack((velocity, altitude))))
+
+    backends = ['python']
+    if resolve_rhs_backend('auto') == 'numba':
+        backends.append('numba')
+
+    engine = LiquidEngine("Merlin 1D", 845000, 282, 162)
+    stages = {
+        'no drag': Stage("No drag", 25000, 400000, engine, 9),
+        'drag': Stage("With drag", 25000, 400000, engine, 9, reference_area=10.52),
+    }
+
+    print(f"{'stage':<10} {'RHS':<12} {'calls/s':>12} {'us/call':>9} {'speedup':>8}")
+    for name, stage in stages.items():
+        simulator = TrajectorySimulator([stage], rhs_backend='python')
+        mass = stage.total_mass
+        reference = calls_per_second(
+            lambda t, y: simulator._rocket_equation(t, y, stage, mass), states, args.repeat)
+        rows = [('reference', reference)]
+        for backend in backends:
+            rhs = make_rocket_rhs(CompiledStage(stage), mass, True, backend)
+            rows.append((backend, calls_per_second(rhs, states, args.repeat)))
+        for label, rate in rows:
+            print(f"{name:<10} {label:<12} {rate:>12,.0f} {1e6 / rate:>9.3f} {rate / reference:>7.2f}x")
+    if 'numba' not in backends:
+        print("\nnumba is not installed; install it to benchmark the numba backend.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_drag_rhs.py
+
+"""
+Micro-benchmark of the trajectory RHS with and without aerodynamic drag.
+
+Evaluates TrajectorySimulator._rocket_equation over states spread through the
+lower atmosphere, once for a stage without a reference area (drag disabled)
+and once with drag from the tabulated standard atmosphere and Mach Cd table.
+
+Usage:
+    python benchmarks/bench_drag_rhs.py [--calls N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from engines.liquid_engine import LiquidEngine
+from mission.mission_loader import Stage
+from mission.trajectory_simulator import TrajectorySimulator
+
+def time_rhs(stage, states, repeat):
+    """
+    Returns the best time per RHS call in microseconds.
+    """
+    simulator = TrajectorySimulator([stage])
+    rhs = simulator._rocket_equation
+    mass = stage.total_mass
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for t, velocity, altitude in states:
+            rhs(t, (velocity, altitude), stage, mass)
+        best = min(best, time.perf_counter() - start)
+    return best / len(states) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RHS cost with and without drag")
+    parser.add_argument('--calls', type=int, default=100000, help='RHS calls per timing run.')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs; the best is reported.')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    states = list(zip(
+        rng.uniform(0, 150, args.calls).tolist(),     # time (s)
+        rng.uniform(0, 3000, args.calls).tolist(),    # velocity (m/s)
+        rng.uniform(0, 120000, args.calls).tolist(),  # altitude (m)
+    ))
+
+    engine = LiquidEngine("Merlin 1D", 845000, 282, 162)
+    no_drag = Stage("No drag", 25000, 400000, engine, 9)
+    with_drag = Stage("With drag", 25000, 400000, engine, 9, reference_area=10.52)
+
+    base = time_rhs(no_drag, states, args.repeat)
+    drag = time_rhs(with_drag, states, args.repeat)
+    print(f"RHS without drag: {base:.3f} us/call")
+    print(f"RHS with drag:    {drag:.3f} us/call ({drag / base:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_plot_render.py
+
+"""
+Measures Plotly figure build and serialization time against trajectory length.
+
+The LEO mission is simulated once per sample count, with the sample interval of
+the standard profile shrunk so the trajectory has about that many rows. Each
+trajectory is then plotted at full resolution and with the default LTTB point
+budget. The figure is serialized to JSON like Streamlit does before sending it
+to the browser.
+
+Usage:
+    python benchmarks/bench_plot_render.py [--samples 1000,10000,100000,1000000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from mission.mission_loader import load_mission_from_json
+from mission.trajectory_simulator import SOLVER_PROFILES, TrajectorySimulator
+from visualization.plotter import DEFAULT_MAX_POINTS, plot_results_plotly
+
+MISSION = os.path.join(ROOT, 'data', 'missions', 'LEO.json')
+
+def simulate(stages, num_samples, duration):
+    """
+    Simulates the mission with about `num_samples` rows.
+    """
+    profile = dict(SOLVER_PROFILES['standard'], sample_interval=duration / num_samples)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TrajectorySimulator(stages, profile).simulate()
+
+def time_render(results, max_points):
+    """
+    Returns (build seconds, serialize seconds, JSON size in bytes).
+    """
+    start = time.perf_counter()
+    fig = plot_results_plotly(results, max_points=max_points)
+    built = time.perf_counter()
+    payload = fig.to_json()
+    serialized = time.perf_counter()
+    return built - start, serialized - built, len(payload)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark plot render and serialization time")
+    parser.add_argument('--samples', default='1000,10000,100000,1000000',
+                        help='Comma-separated trajectory lengths.')
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS,
+                        help='Point budget per trace for the downsampled run.')
+    args = parser.parse_args()
+
+    os.chdir(ROOT) # Engine config paths in the mission are relative to the repository
+    with contextlib.redirect_stdout(io.StringIO()):
+        stages = load_mission_from_json(MISSION)
+        reference = TrajectorySimulator(stages).simulate()
+    duration = reference['time'][-1]
+    time_render(reference, None) # Warm up Plotly's lazy imports and validators
+
+    print(f"{'samples':>9} {'budget':>8} {'build (s)':>10} {'json (s)':>9} {'size (MB)':>10}")
+    for num_samples in (int(n) for n in args.samples.split(',')):
+        results = simulate(stages, num_samples, duration)
+        for max_points in (None, args.max_points):
+            build, serialize, size = time_render(results, max_points)
+            label = 'full' if max_points is None else str(max_points)
+            print(f"{results.num_samples:>9} {label:>8} {build:>10.3f} {serialize:>9.3f} {size / 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_sensitivities.py
+
+"""
+Cost and accuracy of the variational sensitivities against finite differences.
+
+For every solver profile, times TrajectorySimulator.simulate_sensitivities()
+(with and without error control on the sensitivities) and central finite
+differences of simulate(), which take 2 * parameters + 1 simulations. Every
+Jacobian is validated against central finite differences with the precise
+profile, whose truncation and solver errors are far below the other methods'.
+Errors are the largest difference over boundaries and parameters of p dy/dp,
+relative to the largest reference entry of each state quantity; the precise
+finite differences row is the reference itself.
+
+Usage:
+    python benchmarks/bench_sensitivities.py [--mission FILE] [--coast-until impact] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from mission.mission_loader import load_mission_from_json
+from mission.sensitivity import STATE_QUANTITIES, finite_difference_sensitivities
+from mission.trajectory_simulator import TrajectorySimulator
+from utils.log import quiet
+
+def best_time(function, repeat):
+    """
+    Returns the last result of function() and its best wall time.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark variational sensitivities against finite differences")
+    parser.add_argument('--mission', default='data/missions/LEO.json', help='Mission JSON file.')
+    parser.add_argument('--coast-until', choices=['apogee', 'impact'], default='apogee')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs; the best is reported.')
+    args = parser.parse_args()
+
+    stages = load_mission_from_json(args.mission)
+    options = {'coast_until': args.coast_until}
+    reference = finite_difference_sensitivities(stages, 'precise', **options)
+    print(f"{len(reference.parameters)} parameters, {len(reference.boundaries)} boundaries, "
+          f"reference: precise finite differences")
+
+    errors = ' '.join(f"{quantity:>9}" for quantity in STATE_QUANTITIES)
+    print(f"\n{'profile':<9} {'method':<22} {'time (s)':>9} {'RHS calls':>10} {errors}")
+    for profile in ('fast', 'standard', 'precise'):
+        rows = []
+        for error_control in (False, True):
+            with quiet():
+                simulator = TrajectorySimulator(stages, profile, **options)
+                result, elapsed = best_time(lambda: simulator.simulate_sensitivities(error_control), args.repeat)
+            label = 'variational' + (' + errcon' if error_control else '')
+            rows.append((label, elapsed, result.info['rhs_evaluations'], result))
+
+        result, elapsed = best_time(lambda: finite_difference_sensitivities(stages, profile, **options),
+                                    args.repeat)
+        rows.append((f"finite diff. ({result.info['simulations']} runs)", elapsed, '-', result))
+
+        for label, elapsed, rhs_evaluations, result in rows:
+            error = result.max_relative_error(reference)
+            print(f"{profile:<9} {label:<22} {elapsed:>9.3f} {rhs_evaluations:>10} "
+                  + ' '.join(f"{error[quantity]:>9.1e}" for quantity in STATE_QUANTITIES))
+
+if __name__ == "__main__":
+    main()
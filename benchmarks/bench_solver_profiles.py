@@ -0,0 +1,104 @@
+# benchmarks/bench_solver_profiles.py
+
+"""
+Compares the solver accuracy profiles on speed and accuracy.
+
+The reference vehicle is a single stage burning to depletion under constant
+gravity, which has a closed-form solution (Tsiolkovsky plus gravity loss):
+    v(t) = ve * ln(m0 / m) - g * t
+    h(t) = ve * (t + (m / mdot) * ln(m / m0)) - g * t**2 / 2
+with m = m0 - mdot * t. Constant gravity is obtained by making the Earth
+radius effectively infinite for the duration of the benchmark.
+
+Usage:
+    python benchmarks/bench_solver_profiles.py [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from engines.liquid_engine import LiquidEngine
+from mission.mission_loader import Stage
+from mission.trajectory_simulator import SOLVER_PROFILES, TrajectorySimulator
+from utils import constants
+
+# Reference vehicle: one Merlin-class stage burning for about 160 s
+THRUST = 845000 * 9
+ISP = 282
+DRY_MASS = 25000
+FUEL_MASS = 400000
+
+def analytic_burnout():
+    """
+    Returns (time, velocity, altitude) at propellant depletion under constant gravity.
+    """
+    ve = ISP * constants.G
+    mdot = THRUST / ve
+    m0 = DRY_MASS + FUEL_MASS
+    t = FUEL_MASS / mdot
+    m = m0 - mdot * t
+    velocity = ve * np.log(m0 / m) - constants.G * t
+    altitude = ve * (t + (m / mdot) * np.log(m / m0)) - constants.G * t**2 / 2
+    return t, velocity, altitude
+
+@contextlib.contextmanager
+def constant_gravity():
+    earth_radius = constants.EARTH_RADIUS
+    constants.EARTH_RADIUS = 1e30
+    try:
+        yield
+    finally:
+        constants.EARTH_RADIUS = earth_radius
+
+def run_profile(profile, repeat):
+    """
+    Simulates the reference vehicle with a profile.
+    Returns:
+        dict: Best wall time, RHS evaluations, sample count and burnout errors.
+    """
+    # Burn time longer than the propellant lasts, so the engine never cuts off early
+    engine = LiquidEngine("Reference", THRUST, ISP, burn_time=1e6)
+    stages = [Stage("Reference Stage", DRY_MASS, FUEL_MASS, engine, 1)]
+
+    best = np.inf
+    for _ in range(repeat):
+        simulator = TrajectorySimulator(stages, profile)
+        with constant_gravity(), contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            results = simulator.simulate()
+            best = min(best, time.perf_counter() - start)
+
+    _, velocity, altitude = analytic_burnout()
+    burnout = results.find_event('propellant_depletion')
+    return {
+        'wall_ms': best * 1000,
+        'rhs_evals': simulator.rhs_evaluations,
+        'samples': results.num_samples,
+        'velocity_error': abs(burnout['velocity'] - velocity) / velocity,
+        'altitude_error': abs(burnout['altitude'] * 1000 - altitude) / altitude,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the solver accuracy profiles")
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per profile; the best is reported.')
+    args = parser.parse_args()
+
+    t, velocity, altitude = analytic_burnout()
+    print(f"Analytic burnout: T+ {t:.2f}s, {velocity:.2f} m/s, {altitude / 1000:.2f} km\n")
+    print(f"{'profile':<10} {'wall (ms)':>10} {'RHS evals':>10} {'samples':>8} "
+          f"{'vel rel err':>12} {'alt rel err':>12}")
+    for profile in SOLVER_PROFILES:
+        row = run_profile(profile, args.repeat)
+        print(f"{profile:<10} {row['wall_ms']:>10.2f} {row['rhs_evals']:>10d} {row['samples']:>8d} "
+              f"{row['velocity_error']:>12.2e} {row['altitude_error']:>12.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_surrogate.py
+
+"""
+Cost and accuracy of surrogate previews against full simulations.
+
+Builds the surrogate of a mission for several grid resolutions (without the
+result cache), then times predictions against simulate() and validates the
+predictions and their error bars at random points of the grid.
+
+Usage:
+    python benchmarks/bench_surrogate.py [--mission FILE] [--levels 3,5,7] [--samples 40]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from mission.mission_loader import load_mission_from_dict
+from mission.surrogate import fit_surrogate, validate_surrogate
+from mission.trajectory_simulator import TrajectorySimulator
+from utils.log import quiet
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark surrogate previews against simulations")
+    parser.add_argument('--mission', default='data/missions/LEO.json', help='Mission JSON file.')
+    parser.add_argument('--levels', default='3,5,7', help='Comma-separated grid resolutions.')
+    parser.add_argument('--samples', type=int, default=40, help='Random validation points.')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count).')
+    args = parser.parse_args()
+
+    with open(args.mission, 'r') as f:
+        mission_data = json.load(f)
+    with quiet():
+        simulator = TrajectorySimulator(load_mission_from_dict(mission_data))
+        start = time.perf_counter()
+        simulator.simulate()
+    simulate_time = time.perf_counter() - start
+    print(f"simulate(): {simulate_time * 1e3:.1f} ms")
+
+    for levels in map(int, args.levels.split(',')):
+        with quiet():
+            model = fit_surrogate(mission_data, levels=levels, max_workers=args.workers, use_cache=False)
+        repeat = 10000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            model.predict(model.nominal)
+        predict_time = (time.perf_counter() - start) / repeat
+        print(f"\n--- {levels} levels: {model.info['points']} simulations in {model.info['elapsed']:.1f}s, "
+              f"prediction {predict_time * 1e6:.0f} us ({simulate_time / predict_time:,.0f}x faster) ---")
+        with quiet():
+            validation = validate_surrogate(model, mission_data, args.samples, seed=0, max_workers=args.workers)
+        print(validation.to_string(float_format=lambda value: f"{value:.3g}"))
+
+if __name__ == "__main__":
+    main()
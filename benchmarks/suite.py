@@ -0,0 +1,308 @@
+# benchmarks/suite.py
+
+"""
+Benchmark suite for the simulator, the mission loader and the plot builders,
+with a JSON history for regression tracking.
+
+Synthetic missions range from 1 to 15 stages, each with short or long burns.
+Every stage carries a quarter of the vehicle's mass as propellant, so all
+missions lift off and stay comparable as they grow. For every case the suite
+records the best wall time over a few runs, the peak traced memory of one run
+(tracemalloc, so only Python and NumPy allocations), and for simulations the
+RHS evaluations per stage.
+
+Usage:
+    python benchmarks/suite.py run [--repeat N] [--quick] [--save-baseline]
+    python benchmarks/suite.py compare [--threshold 0.25] [--baseline FILE] [--run FILE]
+
+`run` appends a record to the history file. `compare` checks the latest history
+record (or --run) against the baseline and exits with status 1 if any metric
+got worse by more than the threshold.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import matplotlib
+matplotlib.use('Agg') # Render off-screen; plot_results_matplotlib's show() becomes a no-op
+import matplotlib.pyplot as plt
+
+from engines import base_engine
+from mission.mission_loader import load_mission_from_json
+from mission.simulation_result import SimulationResult
+from mission.trajectory_simulator import TrajectorySimulator
+from visualization.plotter import plot_results_matplotlib, plot_results_plotly
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_HISTORY = os.path.join(RESULTS_DIR, 'history.json')
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+# Relative slowdown (or growth) above which compare reports a regression. Wall
+# times on a shared machine vary by 10-20% between runs; RHS calls are exact.
+DEFAULT_THRESHOLD = 0.25
+
+# Metrics compared against the baseline; higher is worse for all of them
+TRACKED_METRICS = ('wall_time', 'peak_memory', 'rhs_calls')
+
+# Wall times below this are dominated by timer noise and are not compared
+MIN_COMPARED_WALL_TIME = 1e-3 # seconds
+
+STAGE_COUNTS = (1, 2, 5, 10, 15)
+QUICK_STAGE_COUNTS = (1, 5, 10)
+# Burn durations in seconds; thrust to weight is 75 / burn at each ignition
+BURNS = {'short': 10.0, 'long': 60.0}
+
+PAYLOAD_MASS = 1000.0
+ISP = 300.0
+
+def write_mission(directory, num_stages, burn_time):
+    """
+    Writes a synthetic mission and its engine configs to a directory.
+    Each stage doubles the mass of the vehicle above it and is half propellant.
+    Returns:
+        str: Path of the mission JSON file.
+    """
+    stages = []
+    mass_above = PAYLOAD_MASS
+    for i in range(num_stages):
+        stage_mass = mass_above
+        fuel_mass = stage_mass / 2
+        thrust = fuel_mass * ISP * 9.80665 / burn_time
+        engine_path = os.path.join(directory, f"engine_{num_stages}_{burn_time:g}_{i}.json")
+        with open(engine_path, 'w') as f:
+            json.dump({
+                "name": f"Synthetic Engine {i + 1}",
+                "type": "LiquidEngine",
+                "thrust": thrust,
+                "isp": ISP,
+                "burn_time": burn_time,
+                "throttle_range": [0.5, 1.0],
+            }, f)
+        stages.append({
+            "stage_name": f"Stage {num_stages - i}",
+            "dry_mass": stage_mass - fuel_mass,
+            "fuel_mass": fuel_mass,
+            "engine_config": engine_path,
+            "num_engines": 1,
+            "reference_area": 1.0 + i,
+        })
+        mass_above += stage_mass
+
+    mission_path = os.path.join(directory, f"mission_{num_stages}_{burn_time:g}.json")
+    with open(mission_path, 'w') as f:
+        json.dump({"name": f"Synthetic {num_stages}-stage mission", "stages": stages[::-1]}, f)
+    return mission_path
+
+def measure(function, repeat):
+    """
+    Runs a function `repeat` times for the best wall time, then once under tracemalloc.
+    Returns:
+        tuple: (best wall time in seconds, peak traced memory in bytes, last return value)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak, value
+
+def simulate_by_stage(stages):
+    """
+    Simulates a mission, counting RHS evaluations per stage from the streamed chunks.
+    Returns:
+        tuple: (SimulationResult chunks, dict of RHS calls keyed by stage label)
+    """
+    simulator = TrajectorySimulator(stages)
+    chunks = []
+    rhs_calls = {}
+    counted = 0
+    for chunk in simulator.iter_simulate():
+        stage = int(chunk['stage'][0]) if chunk.num_samples else 0
+        label = f"stage_{stage}" if stage else 'coast'
+        rhs_calls[label] = rhs_calls.get(label, 0) + simulator.rhs_evaluations - counted
+        counted = simulator.rhs_evaluations
+        chunks.append(chunk)
+    return chunks, rhs_calls
+
+def run_cases(stage_counts, repeat):
+    """
+    Runs every benchmark case.
+    Returns:
+        dict: Metrics keyed by case name.
+    """
+    cases = {}
+    with tempfile.TemporaryDirectory() as directory, \
+            contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for num_stages in stage_counts:
+            for burn, burn_time in BURNS.items():
+                mission_path = write_mission(directory, num_stages, burn_time)
+                name = f"stages={num_stages}/burn={burn}"
+
+                def load():
+                    base_engine._config_cache.clear() # Measure cold engine config reads
+                    return load_mission_from_json(mission_path)
+
+                wall, peak, stages = measure(load, repeat)
+                cases[f"load_mission/{name}"] = {'wall_time': wall, 'peak_memory': peak}
+
+                wall, peak, (chunks, rhs_calls) = measure(lambda: simulate_by_stage(stages), repeat)
+                cases[f"simulate/{name}"] = {
+                    'wall_time': wall,
+                    'peak_memory': peak,
+                    'rhs_calls': sum(rhs_calls.values()),
+                    'rhs_calls_per_stage': rhs_calls,
+                    'samples': sum(chunk.num_samples for chunk in chunks),
+                }
+
+                results = SimulationResult.concatenate(chunks)
+
+                wall, peak, _ = measure(lambda: plot_results_plotly(results).to_json(), repeat)
+                cases[f"plot_plotly/{name}"] = {'wall_time': wall, 'peak_memory': peak}
+
+                def plot_matplotlib():
+                    plot_results_matplotlib(results)
+                    plt.gcf().canvas.draw()
+                    plt.close('all')
+
+                wall, peak, _ = measure(plot_matplotlib, repeat)
+                cases[f"plot_matplotlib/{name}"] = {'wall_time': wall, 'peak_memory': peak}
+    return cases
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def run_command(args):
+    stage_counts = QUICK_STAGE_COUNTS if args.quick else STAGE_COUNTS
+    record = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cases': run_cases(stage_counts, args.repeat),
+    }
+
+    print(f"{'case':<40} {'wall (ms)':>10} {'peak (MB)':>10} {'RHS calls':>10}")
+    for name, metrics in record['cases'].items():
+        rhs = metrics.get('rhs_calls', '')
+        print(f"{name:<40} {metrics['wall_time'] * 1000:>10.2f} "
+              f"{metrics['peak_memory'] / 1e6:>10.2f} {rhs:>10}")
+
+    history = load_history(args.history)
+    history.append(record)
+    write_json(args.history, history)
+    print(f"\nAppended run to '{args.history}'")
+    if args.save_baseline:
+        write_json(args.baseline, record)
+        print(f"Saved baseline to '{args.baseline}'")
+
+def compare_records(baseline, current, threshold):
+    """
+    Compares two run records case by case.
+    Returns:
+        list: (case, metric, baseline value, current value, relative change) for
+            every tracked metric that got worse by more than the threshold.
+    """
+    regressions = []
+    for name, metrics in current['cases'].items():
+        reference = baseline['cases'].get(name)
+        if reference is None:
+            continue
+        for metric in TRACKED_METRICS:
+            if metric not in metrics or not reference.get(metric):
+                continue
+            if metric == 'wall_time' and reference[metric] < MIN_COMPARED_WALL_TIME:
+                continue
+            change = metrics[metric] / reference[metric] - 1
+            if change > threshold:
+                regressions.append((name, metric, reference[metric], metrics[metric], change))
+    return regressions
+
+def compare_command(args):
+    if not os.path.exists(args.baseline):
+        print(f"Error: No baseline at '{args.baseline}'. Create one with 'run --save-baseline'.")
+        return 2
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if args.run:
+        with open(args.run, 'r') as f:
+            current = json.load(f)
+    else:
+        history = load_history(args.history)
+        if not history:
+            print(f"Error: No runs recorded in '{args.history}'.")
+            return 2
+        current = history[-1]
+
+    regressions = compare_records(baseline, current, args.threshold)
+    print(f"Baseline {baseline.get('commit')} ({baseline['timestamp']}) vs "
+          f"run {current.get('commit')} ({current['timestamp']}), threshold {args.threshold:.0%}")
+    if not regressions:
+        print("No regressions.")
+        return 0
+    for name, metric, before, after, change in regressions:
+        print(f"REGRESSION {name} {metric}: {before:.6g} -> {after:.6g} (+{change:.1%})")
+    return 1
+
+def main():
+    parser = argparse.ArgumentParser(description="StellarLab benchmark suite")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON history file.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='JSON baseline file.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the suite and append to the history.')
+    run_parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case; the best is kept.')
+    run_parser.add_argument('--quick', action='store_true', help='Run fewer mission sizes.')
+    run_parser.add_argument('--save-baseline', action='store_true',
+                            help='Also save this run as the baseline.')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare a run against the baseline.')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='Relative increase reported as a regression.')
+    compare_parser.add_argument('--run', default=None,
+                                help='Run record to check (default: the latest in the history).')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_command(args)
+    else:
+        sys.exit(compare_command(args))
+
+if __name__ == "__main__":
+    main()
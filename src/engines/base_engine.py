@@ -1,25 +1,140 @@
 # src/engines/base_engine.py
 
 from abc import ABC, abstractmethod
+import importlib
 import json
+import os
+import numpy as np
+
+# Maps the "type" field of engine configs to engine classes
+ENGINE_REGISTRY = {}
+
+# Modules of the engine types that ship with StellarLab
+BUILTIN_ENGINE_MODULES = ('liquid_engine', 'solid_engine', 'hybrid_engine')
+
+# Parsed engine configs keyed by absolute path, validated against the file's mtime and size
+_config_cache = {}
+
+def register_engine_type(type_name, engine_class):
+    """
+    Registers an engine class under the name used in the "type" field of engine configs.
+    """
+    ENGINE_REGISTRY[type_name] = engine_class
+
+def get_engine_class(type_name):
+    """
+    Returns the engine class registered for a config "type".
+    """
+    if type_name not in ENGINE_REGISTRY:
+        # Built-in engines register themselves when their modules are first imported
+        for module in BUILTIN_ENGINE_MODULES:
+            importlib.import_module(f".{module}", __package__)
+    try:
+        return ENGINE_REGISTRY[type_name]
+    except KeyError:
+        raise ValueError(f"Unknown engine type: {type_name}") from None
+
+def load_engine_config(file_path):
+    """
+    Returns the parsed contents of an engine config file.
+    The file is read once per process and re-read only when it changes on disk.
+    The returned dict is shared and must not be modified.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _config_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(path, 'r') as f:
+        config = json.load(f)
+    _config_cache[path] = (signature, config)
+    return config
 
 class RocketEngine(ABC):
     """
     Abstract base class for a rocket engine.
+    Concrete subclasses are registered under their class name automatically.
     """
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not getattr(cls, '__abstractmethods__', None):
+            register_engine_type(cls.__name__, cls)
+
     def __init__(self, name, thrust, isp, burn_time):
         self.name = name
         self.thrust = thrust  # in Newtons
         self.isp = isp  # in seconds
         self.burn_time = burn_time  # in seconds
         self.mass_flow_rate = self.thrust / (self.isp * 9.80665)
+        self._thrust_table = None
 
     @abstractmethod
+    def _build_thrust_table(self):
+        """
+        Tabulates the engine's thrust curve.
+        Returns:
+            tuple: (times, thrust) arrays for linear interpolation. Times are strictly
+                increasing and relative to the ignition command; thrust is zero outside them.
+        """
+        pass
+
+    def update_thrust_table(self):
+        """
+        Rebuilds the thrust table. Call after changing the thrust curve or throttle schedule.
+        """
+        times, thrust = self._build_thrust_table()
+        self._thrust_table = (np.asarray(times, dtype=float), np.asarray(thrust, dtype=float))
+
     def get_thrust(self, time):
         """
         Returns the thrust at a given time.
+        The thrust depends only on the time and the configured thrust curve or throttle
+        schedule, so repeated or out-of-order calls are safe.
+        Args:
+            time (float or np.ndarray): Time(s) since the ignition command in seconds.
+        Returns:
+            float or np.ndarray: Thrust in Newtons, with the shape of `time`.
         """
-        pass
+        if self._thrust_table is None:
+            self.update_thrust_table()
+        times, thrust = self._thrust_table
+        return np.interp(time, times, thrust, left=0.0, right=0.0)
+
+    def get_thrust_table(self):
+        """
+        Returns the (times, thrust) arrays that get_thrust() interpolates, times
+        relative to ignition. The arrays are shared and must not be modified.
+        """
+        if self._thrust_table is None:
+            self.update_thrust_table()
+        return self._thrust_table
+
+    def scale_performance(self, thrust=1.0, isp=1.0):
+        """
+        Scales the engine's thrust level (with its whole thrust curve) and Isp,
+        keeping the burn window, e.g. for dispersion analysis. The mass flow rate
+        follows. Call after any change that rebuilds the thrust table.
+        Args:
+            thrust (float): Thrust factor.
+            isp (float): Specific impulse factor.
+        """
+        times, values = self.get_thrust_table()
+        self._thrust_table = (times, values * thrust)
+        self.thrust *= thrust
+        self.isp *= isp
+        self.mass_flow_rate = self.thrust / (self.isp * 9.80665)
+
+    def get_burn_window(self):
+        """
+        Returns the (start, end) times of the burn, relative to ignition.
+        """
+        if self._thrust_table is None:
+            self.update_thrust_table()
+        times, _ = self._thrust_table
+        return float(times[0]), float(times[-1])
 
     def to_dict(self):
         """
@@ -33,26 +148,59 @@ class RocketEngine(ABC):
             "type": self.__class__.__name__
         }
 
+    @classmethod
+    def resolve_config(cls, config):
+        """
+        Returns an engine config with the contents of the files it refers to in place
+        of their paths, so that the config changes whenever the engine's behaviour does.
+        Engines that read no files return the config unchanged.
+        """
+        return config
+
     @classmethod
     def from_json(cls, file_path):
         """
         Loads an engine configuration from a JSON file.
         """
-        with open(file_path, 'r') as f:
-            config = json.load(f)
-        
-        engine_type = config.pop("type")
-        # This is a simple factory. A more robust implementation
-        # would avoid this direct import logic here.
-        if engine_type == "LiquidEngine":
-            from .liquid_engine import LiquidEngine
-            return LiquidEngine(**config)
-        elif engine_type == "SolidEngine":
-            from .solid_engine import SolidEngine
-            return SolidEngine(**config)
-        elif engine_type == "HybridEngine":
-            from .hybrid_engine import HybridEngine
-            return HybridEngine(**config)
-        else:
-            raise ValueError(f"Unknown engine type: {engine_type}")
+        config = load_engine_config(file_path)
+        engine_class = get_engine_class(config["type"])
+        return engine_class(**{key: value for key, value in config.items() if key != "type"})
+
+def normalize_schedule(schedule):
+    """
+    Converts a throttle schedule into a sorted list of (time, throttle) steps.
+    Args:
+        schedule (float or list): A constant throttle, or [time, throttle] pairs where
+            each throttle holds from its time until the next entry. The first entry
+            also applies before its time.
+    Returns:
+        list: Sorted (time, throttle) tuples.
+    """
+    if np.ndim(schedule) == 0:
+        return [(0.0, float(schedule))]
+    steps = sorted((float(t), float(throttle)) for t, throttle in schedule)
+    if not steps:
+        raise ValueError("A throttle schedule needs at least one entry")
+    return steps
+
+def step_table(schedule, start, end, scale):
+    """
+    Tabulates a piecewise-constant throttle schedule between start and end.
+    Each step is represented by two points one ulp apart, so linear interpolation
+    reproduces the step exactly.
+    Returns:
+        tuple: (times, values) lists.
+    """
+    times, values = [start], [scale * schedule[0][1]]
+    for t, throttle in schedule[1:]:
+        if t <= start:
+            values[0] = scale * throttle
+            continue
+        if t >= end:
+            break
+        times += [np.nextafter(t, -np.inf), t]
+        values += [values[-1], scale * throttle]
+    times.append(end)
+    values.append(values[-1])
+    return times, values
 
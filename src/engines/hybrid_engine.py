@@ -1,40 +1,62 @@
 # src/engines/hybrid_engine.py
 
-from .base_engine import RocketEngine
+from .base_engine import RocketEngine, normalize_schedule
 import numpy as np
 
 class HybridEngine(RocketEngine):
     """
     Represents a hybrid rocket engine.
     """
-    def __init__(self, name, thrust, isp, burn_time, throttle_delay=0.5):
+    def __init__(self, name, thrust, isp, burn_time, throttle_delay=0.5, throttle_schedule=1.0):
         super().__init__(name, thrust, isp, burn_time)
         self.throttle_delay = throttle_delay
-        self.target_throttle = 1.0
-        self.current_throttle = 0.0
+        self.set_throttle_schedule(throttle_schedule)
 
     def set_throttle(self, throttle):
         """
         Sets the target throttle. The engine will ramp up/down to this value.
         """
-        self.target_throttle = np.clip(throttle, 0, 1)
+        self.set_throttle_schedule(throttle)
 
+    def set_throttle_schedule(self, schedule):
+        """
+        Sets the schedule of target throttles. The engine ramps towards each target.
+        Args:
+            schedule (float or list): A constant target, or [time, target] steps.
+        """
+        self.throttle_schedule = [(t, float(np.clip(throttle, 0, 1)))
+                                  for t, throttle in normalize_schedule(schedule)]
+        self.update_thrust_table()
 
-    def get_thrust(self, time):
+    def _build_thrust_table(self):
         """
-        Returns the thrust at a given time, simulating throttle delay.
+        Tabulates the thrust, simulating throttle delay.
+        The throttle starts at zero on ignition and moves towards the scheduled
+        target at a rate of full throttle per `throttle_delay` seconds.
         """
-        # A simple model for throttle response
-        if self.current_throttle < self.target_throttle:
-            self.current_throttle += (1.0 / self.throttle_delay) * 0.1 # simplified time step
-        elif self.current_throttle > self.target_throttle:
-            self.current_throttle -= (1.0 / self.throttle_delay) * 0.1 # simplified time step
-            
-        self.current_throttle = np.clip(self.current_throttle, 0, 1)
+        rate = 1.0 / self.throttle_delay
+        steps = self.throttle_schedule
+        # The target in force at ignition is the last one scheduled at or before it
+        initial = [target for t, target in steps if t <= 0] or [steps[0][1]]
+        segments = [(0.0, initial[-1])] + [step for step in steps if 0 < step[0] < self.burn_time]
+        ends = [t for t, _ in segments[1:]] + [self.burn_time]
+
+        t, throttle = 0.0, 0.0
+        times, throttles = [t], [throttle]
+        for (_, target), t_next in zip(segments, ends):
+            ramp_time = abs(target - throttle) / rate
+            if t + ramp_time < t_next:
+                if ramp_time > 0:
+                    times.append(t + ramp_time)
+                    throttles.append(target)
+                throttle = target
+            else:
+                throttle += np.sign(target - throttle) * rate * (t_next - t)
+            t = t_next
+            times.append(t)
+            throttles.append(throttle)
 
-        if 0 <= time <= self.burn_time:
-            return self.thrust * self.current_throttle
-        return 0
+        return times, self.thrust * np.array(throttles)
 
     def to_dict(self):
         """
@@ -42,4 +64,5 @@ class HybridEngine(RocketEngine):
         """
         data = super().to_dict()
         data["throttle_delay"] = self.throttle_delay
+        data["throttle_schedule"] = [list(step) for step in self.throttle_schedule]
         return data
@@ -1,32 +1,40 @@
 # src/engines/liquid_engine.py
 
-from .base_engine import RocketEngine
+from .base_engine import RocketEngine, normalize_schedule, step_table
 
 class LiquidEngine(RocketEngine):
     """
     Represents a liquid-propellant rocket engine.
     """
-    def __init__(self, name, thrust, isp, burn_time, throttle_range=(0.6, 1.0)):
+    def __init__(self, name, thrust, isp, burn_time, throttle_range=(0.6, 1.0), throttle_schedule=1.0):
         super().__init__(name, thrust, isp, burn_time)
         self.throttle_range = throttle_range
-        self.current_throttle = 1.0
+        self.set_throttle_schedule(throttle_schedule)
 
     def set_throttle(self, throttle):
         """
-        Sets the throttle of the engine.
+        Sets the throttle of the engine for the whole burn.
         """
-        if self.throttle_range[0] <= throttle <= self.throttle_range[1]:
-            self.current_throttle = throttle
-        else:
-            raise ValueError(f"Throttle must be within {self.throttle_range}")
+        self.set_throttle_schedule(throttle)
 
-    def get_thrust(self, time):
+    def set_throttle_schedule(self, schedule):
         """
-        Returns the thrust at a given time, considering the throttle.
+        Sets the throttle schedule of the engine.
+        Args:
+            schedule (float or list): A constant throttle, or [time, throttle] steps.
         """
-        if 0 <= time <= self.burn_time:
-            return self.thrust * self.current_throttle
-        return 0
+        schedule = normalize_schedule(schedule)
+        for _, throttle in schedule:
+            if not self.throttle_range[0] <= throttle <= self.throttle_range[1]:
+                raise ValueError(f"Throttle must be within {self.throttle_range}")
+        self.throttle_schedule = schedule
+        self.update_thrust_table()
+
+    def _build_thrust_table(self):
+        """
+        Tabulates the thrust: the throttle schedule applied between ignition and burn_time.
+        """
+        return step_table(self.throttle_schedule, 0.0, self.burn_time, self.thrust)
 
     def to_dict(self):
         """
@@ -34,4 +42,5 @@ class LiquidEngine(RocketEngine):
         """
         data = super().to_dict()
         data["throttle_range"] = self.throttle_range
+        data["throttle_schedule"] = [list(step) for step in self.throttle_schedule]
         return data
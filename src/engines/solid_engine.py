@@ -1,27 +1,76 @@
 # src/engines/solid_engine.py
 
 from .base_engine import RocketEngine
+import numpy as np
+
+def load_thrust_curve(file_path):
+    """
+    Loads a measured thrust curve from a CSV file with time (s) and thrust (N) columns.
+    A header row and '#' comment lines are skipped.
+    Returns:
+        list: [time, thrust] pairs.
+    """
+    with open(file_path, 'r') as f:
+        lines = [line for line in f if line.strip() and not line.lstrip().startswith('#')]
+    try:
+        float(lines[0].split(',')[0])
+    except ValueError:
+        lines = lines[1:] # Header row
+    curve = np.loadtxt(lines, delimiter=',', usecols=(0, 1), ndmin=2)
+    return curve.tolist()
 
 class SolidEngine(RocketEngine):
     """
     Represents a solid-propellant rocket engine.
     """
-    def __init__(self, name, thrust, isp, burn_time, ignition_delay=0.1):
+    def __init__(self, name, thrust, isp, burn_time, ignition_delay=0.1, thrust_curve=None):
+        """
+        Args:
+            thrust_curve (str or list, optional): Measured thrust curve, either a path to
+                a CSV file or [time, thrust] pairs, with time measured from ignition. The
+                curve replaces the constant `thrust` profile; `thrust` still sets the mass
+                flow rate, so use the curve's average thrust to match its total impulse.
+        """
         super().__init__(name, thrust, isp, burn_time)
         self.ignition_delay = ignition_delay
+        self.thrust_curve = thrust_curve
+        self.update_thrust_table()
 
-    def get_thrust(self, time):
+    def _build_thrust_table(self):
         """
-        Returns the thrust at a given time.
+        Tabulates the thrust: constant thrust for burn_time after the ignition delay,
+        or the measured thrust curve shifted by the ignition delay.
         """
-        if self.ignition_delay <= time <= self.burn_time + self.ignition_delay:
-            return self.thrust
-        return 0
-    
+        if self.thrust_curve is None:
+            return ([self.ignition_delay, self.burn_time + self.ignition_delay],
+                    [self.thrust, self.thrust])
+
+        curve = self.thrust_curve
+        if isinstance(curve, str):
+            curve = load_thrust_curve(curve)
+        # The points the table was built from, also when they were read from a file
+        self._curve_points = [list(point) for point in curve]
+        curve = np.asarray(curve, dtype=float)
+        if curve.ndim != 2 or len(curve) < 2 or np.any(np.diff(curve[:, 0]) <= 0):
+            raise ValueError(f"Thrust curve of '{self.name}' needs at least two points with increasing times")
+        return curve[:, 0] + self.ignition_delay, curve[:, 1]
+
+    @classmethod
+    def resolve_config(cls, config):
+        """
+        Returns the config with a thrust curve CSV path replaced by the curve's points.
+        """
+        if isinstance(config.get("thrust_curve"), str):
+            return dict(config, thrust_curve=load_thrust_curve(config["thrust_curve"]))
+        return config
+
     def to_dict(self):
         """
-        Serializes the engine's configuration to a dictionary.
+        Serializes the engine's configuration to a dictionary. A thrust curve read
+        from a CSV file is given as its [time, thrust] points.
         """
         data = super().to_dict()
         data["ignition_delay"] = self.ignition_delay
+        if self.thrust_curve is not None:
+            data["thrust_curve"] = self._curve_points
         return data
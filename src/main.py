@@ -1,10 +1,462 @@
 # src/main.py
 
 import argparse
-import numpy as np
-from mission.mission_loader import load_mission_from_json
-from mission.trajectory_simulator import TrajectorySimulator
-from visualization.plotter import plot_results
+import json
+import sys
+from contextlib import nullcontext
+# Only lightweight modules are imported up front. The simulator (SciPy), the result
+# cache (NumPy) and the plotting backends are imported where they are used, so that
+# --help, cached and headless runs do not pay for what they do not need.
+from mission.solver_profiles import DEFAULT_PROFILE, SOLVER_PROFILES
+from utils.log import configure_logging
+
+# Missions compared when none are given
+MISSION_DIR = 'data/missions'
+
+# Default seconds of flight time per --stream chunk
+STREAM_CHUNK_DURATION = 10.0
+
+def coast_options(args):
+    """
+    Returns the TrajectorySimulator coast keyword arguments set on the command line.
+    """
+    options = {'coast_until': args.coast_until}
+    if args.max_coast is not None:
+        options['max_coast_duration'] = args.max_coast
+    return options
+
+def run_mission(args):
+    """
+    Runs a single mission simulation and plots the results, or reports a summary
+    of them in headless mode (--no-plot or --summary-json).
+    """
+    from mission.instrumentation import profiled
+    from mission.result_cache import get_default_cache, mission_cache_key
+
+    # With a JSON summary on stdout, everything else goes to stderr
+    messages = sys.stderr if args.summary_json == '-' else sys.stdout
+
+    # Load the mission from the specified file and resolve its cache key
+    try:
+        with open(args.mission, 'r') as f:
+            mission_data = json.load(f)
+        cache_key = mission_cache_key(mission_data, args.profile)
+    except FileNotFoundError as e:
+        print(f"Error: File not found at '{e.filename}'", file=messages)
+        return
+    except Exception as e:
+        print(f"An error occurred while loading the mission: {e}", file=messages)
+        return
+
+    if args.stream:
+        stream_mission(mission_data, args)
+        return
+    if args.record:
+        record_mission(mission_data, args)
+        return
+
+    # Instrumented runs always simulate, so that there are solver stats to report
+    instrument = args.instrument or args.cprofile
+    headless = args.no_plot or args.summary_json
+    # Cache keys only cover the default coast to apogee
+    cacheable = not (args.no_cache or instrument) and coast_options(args) == {'coast_until': 'apogee'}
+    cache = get_default_cache()
+    with profiled(args.cprofile) if args.cprofile else nullcontext():
+        results = cache.get(cache_key) if cacheable else None
+        cache_hit = results is not None
+        if cache_hit:
+            print(f"Loaded cached results for mission: {mission_data['name']}", file=messages)
+        else:
+            # Initialize and run the simulation
+            from mission.mission_loader import load_mission_from_dict
+            from mission.trajectory_simulator import TrajectorySimulator
+            checkpoints = None
+            if not (args.no_cache or instrument):
+                # Resume after the stages unchanged since an earlier run of a similar mission
+                from mission.checkpoints import get_default_checkpoints
+                checkpoints = get_default_checkpoints()
+            simulator = TrajectorySimulator(load_mission_from_dict(mission_data), args.profile,
+                                            checkpoints=checkpoints, **coast_options(args))
+            results = simulator.simulate()
+            if cacheable:
+                cache.put(cache_key, results)
+            if results.stats.reused_stages:
+                stages = ', '.join(map(str, results.stats.reused_stages))
+                print(f"Reused stages from checkpoints: {stages}", file=messages)
+
+        if args.output:
+            from mission.result_io import save_result
+            try:
+                save_result(results, args.output, compress=args.compress)
+            except (ImportError, ValueError, OSError) as e:
+                print(f"Error: Could not write results to '{args.output}': {e}", file=messages)
+            else:
+                print(f"Results written to '{args.output}'", file=messages)
+
+        # Build the plots
+        if results and not headless:
+            from visualization.plotter import plot_results_matplotlib
+            with results.stats.timer('plotting') if results.stats else nullcontext():
+                plot_results_matplotlib(results, show=False)
+
+    if instrument:
+        print("\n--- Performance Stats ---", file=messages)
+        print(results.stats.format_table(), file=messages)
+        if args.cprofile:
+            print(f"cProfile stats written to '{args.cprofile}'", file=messages)
+
+    if args.summary_json:
+        write_summary(mission_data, args, results, cache_hit)
+    elif args.no_plot:
+        print("\n--- Summary ---")
+        for name, value in results.summary().items():
+            print(f"{name:<20} {value:.6g}")
+    elif results:
+        import matplotlib.pyplot as plt
+        plt.show()
+
+def write_summary(mission_data, args, results, cache_hit):
+    """
+    Writes the key metrics and events of a run as JSON to a file or stdout ('-').
+    """
+    summary = {
+        'mission': mission_data['name'],
+        'profile': args.profile,
+        'cache_hit': cache_hit,
+        'num_samples': results.num_samples,
+        'metrics': results.summary(),
+        'events': results.events,
+    }
+    if results.stats is not None:
+        summary['stats'] = results.stats.to_dict()
+
+    if args.summary_json == '-':
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.summary_json, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to '{args.summary_json}'")
+
+def stream_mission(mission_data, args):
+    """
+    Simulates a mission and writes its trajectory as CSV rows while it is integrated.
+    Only one chunk of rows is held in memory at a time, so results are neither
+    cached nor plotted.
+    """
+    from mission.mission_loader import load_mission_from_dict
+    from mission.trajectory_simulator import TrajectorySimulator
+
+    if args.stream == '-':
+        # Keep the simulation log off the CSV
+        out = sys.stdout
+        configure_logging(sys.stderr, json_format=args.log_json)
+    else:
+        out = open(args.stream, 'w', newline='')
+    try:
+        simulator = TrajectorySimulator(load_mission_from_dict(mission_data), args.profile,
+                                        **coast_options(args))
+        for i, chunk in enumerate(simulator.iter_simulate(args.chunk_duration or STREAM_CHUNK_DURATION)):
+            chunk.to_csv(out, header=i == 0)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if out is not sys.stdout:
+        print(f"Trajectory written to '{args.stream}'")
+
+def parse_tolerances(spec):
+    """
+    Parses --record-tolerance 'column=tolerance,...' into a dict.
+    """
+    tolerances = {}
+    for item in spec.split(','):
+        column, _, tolerance = item.partition('=')
+        try:
+            tolerances[column.strip()] = float(tolerance)
+        except ValueError:
+            raise ValueError(f"Invalid tolerance '{item}'. Expected column=tolerance") from None
+    return tolerances
+
+def record_mission(mission_data, args):
+    """
+    Simulates a mission into an append-only recording file, decimated by the
+    --record-* options, holding only a bounded buffer of rows in memory.
+    """
+    from mission.mission_loader import load_mission_from_dict
+    from mission.recorder import (EventDecimation, IntervalDecimation, ToleranceDecimation,
+                                  TrajectoryRecorder)
+    from mission.trajectory_simulator import TrajectorySimulator
+
+    decimation = []
+    try:
+        if args.record_interval:
+            decimation.append(IntervalDecimation(args.record_interval))
+        if args.record_tolerance:
+            decimation.append(ToleranceDecimation(parse_tolerances(args.record_tolerance)))
+        if args.record_events:
+            decimation.append(EventDecimation())
+        recorder = TrajectoryRecorder(decimation, spill_path=args.record)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return
+
+    simulator = TrajectorySimulator(load_mission_from_dict(mission_data), args.profile, **coast_options(args))
+    results = simulator.record(recorder, args.chunk_duration)
+    print(f"Recorded {recorder.rows_recorded} of {recorder.rows_seen} samples to '{args.record}'")
+    print("\n--- Summary ---")
+    for name, value in results.summary().items():
+        print(f"{name:<20} {value:.6g}")
+
+def run_sweep_command(args):
+    """
+    Runs a parameter sweep and prints or saves the summary table.
+    """
+    from mission.sweep import parse_parameter, parse_values, run_sweep
+
+    grid = {}
+    for param in args.param:
+        name, sep, spec = param.partition('=')
+        if not sep:
+            print(f"Error: Sweep parameter '{param}' must look like NAME=VALUES")
+            return
+        try:
+            parse_parameter(name)
+            grid[name] = parse_values(spec)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+
+    try:
+        table = run_sweep(args.mission, grid, max_workers=args.workers,
+                          chunk_size=args.chunk_size, use_cache=not args.no_cache,
+                          profile=args.profile)
+    except FileNotFoundError:
+        print(f"Error: Mission file not found at '{args.mission}'")
+        return
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"Sweep results written to '{args.output}'")
+    else:
+        print(table.to_string(index=False))
+
+def run_compare_command(args):
+    """
+    Simulates several missions concurrently, prints their metrics side by side
+    and plots their trajectories on shared axes.
+    """
+    import glob
+    import os
+    from mission.comparison import run_comparison
+
+    paths = args.missions or sorted(glob.glob(os.path.join(MISSION_DIR, '*.json')))
+    try:
+        store = run_comparison(paths, args.profile, max_workers=args.workers, use_cache=not args.no_cache)
+    except FileNotFoundError as e:
+        print(f"Error: File not found at '{e.filename}'")
+        return
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    for error in store.errors:
+        print(f"Failed {error}")
+    if not len(store):
+        return
+    metrics = store.metrics_frame()
+    print("\n--- Mission comparison ---")
+    print(metrics.to_string(float_format=lambda value: f"{value:.6g}"))
+    if args.output:
+        metrics.to_csv(args.output)
+        print(f"Metrics written to '{args.output}'")
+    if args.html:
+        from visualization.plotter import plot_comparison_plotly
+        plot_comparison_plotly(store).write_html(args.html)
+        print(f"Comparison plot written to '{args.html}'")
+
+def run_optimize_command(args):
+    """
+    Optimizes stage parameters and writes the optimized mission and convergence history.
+    """
+    from mission.optimizer import parse_bounds, parse_constraint, run_optimization
+    from mission.sweep import parse_parameter
+
+    variables = {}
+    try:
+        for var in args.var:
+            name, sep, spec = var.partition('=')
+            if not sep:
+                print(f"Error: Variable '{var}' must look like NAME=LOW:HIGH")
+                return
+            parse_parameter(name)
+            variables[name] = parse_bounds(spec)
+        constraints = [parse_constraint(spec) for spec in args.constraint or []]
+        objective, maximize = (args.maximize, True) if args.maximize else (args.minimize, False)
+        result = run_optimization(
+            args.mission, variables, objective, maximize=maximize, constraints=constraints,
+            resolution=args.resolution, population_size=args.popsize,
+            max_iterations=args.maxiter, seed=args.seed, max_workers=args.workers,
+            use_cache=not args.no_cache, profile=args.profile
+        )
+    except FileNotFoundError:
+        print(f"Error: Mission file not found at '{args.mission}'")
+        return
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    if not result.feasible:
+        print("Warning: No candidate met every constraint; reporting the least violating one.")
+    print(f"\n--- Best candidate ({result.simulations} simulations) ---")
+    for name, value in result.point.items():
+        print(f"{name:<20} {value:.10g}")
+    for metric in dict.fromkeys([objective] + [metric for metric, _, _ in constraints]):
+        if metric not in result.point:
+            print(f"{metric:<20} {result.metrics.get(metric, float('nan')):.10g}")
+
+    if args.output:
+        result.save_mission(args.output)
+        print(f"Optimized mission written to '{args.output}'")
+    else:
+        print(json.dumps(result.mission, indent=2))
+    if args.history:
+        result.history.to_csv(args.history, index=False)
+        print(f"Convergence history written to '{args.history}'")
+
+def run_monte_carlo_command(args):
+    """
+    Runs a Monte Carlo dispersion analysis and prints or saves its statistics.
+    """
+    from mission.monte_carlo import parse_dispersion, run_monte_carlo
+
+    dispersions = {}
+    for spec in args.disperse:
+        name, sep, sigma = spec.partition('=')
+        try:
+            if not sep:
+                raise ValueError(f"Dispersion '{spec}' must look like NAME=SIGMA")
+            parse_dispersion(name)
+            dispersions[name] = float(sigma)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+
+    def report(finished, runs):
+        print(f"  {finished}/{runs} runs", file=sys.stderr)
+
+    try:
+        result = run_monte_carlo(
+            args.mission, dispersions, args.runs, seed=args.seed, max_workers=args.workers,
+            chunk_size=args.chunk_size, profile=args.profile, bin_width=args.bin_width,
+            progress=report
+        )
+    except FileNotFoundError:
+        print(f"Error: Mission file not found at '{args.mission}'")
+        return
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    info = result.info
+    print(f"\n--- Dispersion summary ({info['runs'] - info['failed']} of {info['runs']} runs, "
+          f"seed {info['seed']}) ---")
+    print(result.summary_frame().to_string())
+    for error in info['errors']:
+        print(f"Failed {error}")
+    if args.output:
+        result.save(args.output)
+        print(f"Statistics and envelopes written to '{args.output}'")
+
+def run_sensitivity_command(args):
+    """
+    Computes the Jacobians of the stage and coast boundary states with respect to
+    the mission parameters, optionally checked against finite differences.
+    """
+    from mission.mission_loader import load_mission_from_json
+    from mission.sensitivity import finite_difference_sensitivities
+    from mission.trajectory_simulator import TrajectorySimulator
+
+    try:
+        stages = load_mission_from_json(args.mission)
+    except FileNotFoundError as e:
+        print(f"Error: File not found at '{e.filename}'")
+        return
+    result = TrajectorySimulator(stages, args.profile, coast_until=args.coast_until) \
+        .simulate_sensitivities(error_control=args.error_control)
+
+    unit = "change per 1% parameter change" if args.scaled else "d(state)/d(parameter)"
+    for i, boundary in enumerate(result.boundaries):
+        stage = f"stage {boundary['stage']}" if boundary['stage'] else "coast"
+        print(f"\n--- {boundary['event'].replace('_', ' ').capitalize()} ({stage}), "
+              f"T+ {boundary['state']['time']:.2f}s: {unit} ---")
+        print(result.frame(i, args.scaled).to_string(float_format=lambda value: f"{value:.6g}"))
+    print(f"\nVariational pass: {result.info['elapsed']:.3f}s, {result.info['rhs_evaluations']} RHS evaluations")
+
+    if args.validate:
+        try:
+            reference = finite_difference_sensitivities(stages, args.profile, args.step,
+                                                        coast_until=args.coast_until)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        print(f"Finite differences: {reference.info['elapsed']:.3f}s, "
+              f"{reference.info['simulations']} simulations")
+        print("\n--- Largest relative difference to finite differences ---")
+        for quantity, error in result.max_relative_error(reference).items():
+            print(f"{quantity:<10} {error:.2e}")
+    if args.output:
+        result.save(args.output)
+        print(f"Sensitivities written to '{args.output}'")
+
+def run_surrogate_command(args):
+    """
+    Builds the surrogate of a mission if it is missing or stale, and previews the
+    burnout outcomes of a stage configuration with it.
+    """
+    import time
+    from mission.surrogate import build_surrogate, find_surrogate, validate_surrogate
+
+    try:
+        with open(args.mission, 'r') as f:
+            mission_data = json.load(f)
+        model, stale = find_surrogate(mission_data, args.profile)
+    except FileNotFoundError as e:
+        print(f"Error: File not found at '{e.filename}'")
+        return
+    if model is None or stale or args.rebuild:
+        if stale:
+            print(f"The stored surrogate is out of date ({', '.join(stale)} changed); rebuilding")
+        try:
+            model = build_surrogate(mission_data, args.profile, levels=args.levels,
+                                    max_workers=args.workers, use_cache=not args.no_cache)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+    info = model.info
+    print(f"Surrogate of {info['mission']}: {info['points']} simulations ({info['incomplete']} incomplete), "
+          f"'{info['profile']}' solver profile")
+
+    point = {}
+    for spec in args.set:
+        name, sep, value = spec.partition('=')
+        if not sep or name not in model.parameters:
+            print(f"Error: '{spec}' must look like NAME=VALUE with NAME one of {', '.join(model.parameters)}")
+            return
+        point[name] = float(value)
+    start = time.perf_counter()
+    values, errors = model.predict(point)
+    elapsed = time.perf_counter() - start
+    if not model.in_bounds(point):
+        print("Warning: the point is outside the surrogate's grid; the error bars do not hold")
+    print(f"\n--- Burnout preview ({elapsed * 1e6:.0f} us) ---")
+    for name, value, error in zip(model.outputs, values, errors):
+        print(f"{name:<20} {value:12.6g} +- {error:.3g}")
+
+    if args.validate:
+        print(f"\n--- Validation against {args.validate} random simulations ---")
+        print(validate_surrogate(model, mission_data, args.validate, max_workers=args.workers)
+              .to_string(float_format=lambda value: f"{value:.3g}"))
 
 def main():
     """
@@ -12,30 +464,496 @@ def main():
     """
     parser = argparse.ArgumentParser(description="StellarLab Rocket Propulsion Simulator")
     parser.add_argument(
-        '--mission', 
-        type=str, 
+        '--mission',
+        type=str,
+        help='Path to the mission JSON file.'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always re-simulate instead of reusing cached results.'
+    )
+    parser.add_argument(
+        '--profile',
+        choices=list(SOLVER_PROFILES),
+        default=DEFAULT_PROFILE,
+        help='Solver accuracy profile.'
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        metavar='FILE',
+        help="Write the results to FILE. The format follows the extension: .npz, "
+             ".arrow/.feather, .parquet, .csv, or .npy for a directory of column files."
+    )
+    parser.add_argument(
+        '--compress',
+        action='store_true',
+        help='Compress binary --output files.'
+    )
+    parser.add_argument(
+        '--no-plot',
+        action='store_true',
+        help='Headless run: print a summary of the results instead of plotting them.'
+    )
+    parser.add_argument(
+        '--summary-json',
+        type=str,
+        metavar='FILE',
+        help="Headless run: write the key metrics and events as JSON to FILE ('-' for stdout)."
+    )
+    parser.add_argument(
+        '--instrument',
+        action='store_true',
+        help='Always simulate, then print per-stage solver stats (wall time, RHS '
+             'evaluations, accepted and rejected steps, Jacobian evaluations).'
+    )
+    parser.add_argument(
+        '--cprofile',
+        type=str,
+        metavar='FILE',
+        help='Run under cProfile and dump the stats to FILE. Implies --instrument.'
+    )
+    parser.add_argument(
+        '--log-json',
+        action='store_true',
+        help='Write the simulation log as JSON lines with structured fields.'
+    )
+    parser.add_argument(
+        '--stream',
+        type=str,
+        metavar='FILE',
+        help="Stream the trajectory as CSV rows to FILE ('-' for stdout) while it is "
+             "simulated, instead of caching and plotting it."
+    )
+    parser.add_argument(
+        '--chunk-duration',
+        type=float,
+        help=f'Seconds of flight time per streamed or recorded chunk '
+             f'(default: {STREAM_CHUNK_DURATION:g} for --stream, 600 for --record).'
+    )
+    parser.add_argument(
+        '--coast-until',
+        choices=['apogee', 'impact'],
+        default='apogee',
+        help='End the coast after the last burn at apogee, or continue through reentry to ground impact.'
+    )
+    parser.add_argument(
+        '--max-coast',
+        type=float,
+        metavar='SECONDS',
+        help='Longest coast after the last burn (default: one day).'
+    )
+    parser.add_argument(
+        '--record',
+        type=str,
+        metavar='FILE',
+        help="Record the trajectory to an append-only FILE that load_recording() memory-maps, "
+             "keeping only a bounded buffer in memory. Prints a summary instead of plotting."
+    )
+    parser.add_argument(
+        '--record-interval',
+        type=float,
+        metavar='SECONDS',
+        help='Record decimation: keep one sample per interval of flight time.'
+    )
+    parser.add_argument(
+        '--record-tolerance',
+        type=str,
+        metavar='SPEC',
+        help="Record decimation: keep only the samples needed to interpolate the others "
+             "within tolerances, e.g. 'altitude=0.01,velocity=0.5' (km, m/s)."
+    )
+    parser.add_argument(
+        '--record-events',
+        action='store_true',
+        help='Record decimation: keep the samples at flight events and stage changes. '
+             'Decimation options combine; without any, every sample is recorded.'
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    sweep_parser = subparsers.add_parser(
+        'sweep',
+        help='Run a parameter sweep over a mission in parallel.'
+    )
+    sweep_parser.add_argument(
+        '--mission',
+        type=str,
         required=True,
         help='Path to the mission JSON file.'
     )
-    args = parser.parse_args()
+    sweep_parser.add_argument(
+        '--param',
+        action='append',
+        required=True,
+        help="Stage parameter to sweep, as '<stage_index>.<field>=<start>:<stop>:<num>' "
+             "or '<stage_index>.<field>=<v1>,<v2>,...'. May be given multiple times."
+    )
+    sweep_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: CPU count).'
+    )
+    sweep_parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=None,
+        help='Number of sweep points per worker task.'
+    )
+    sweep_parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Write the summary table to this CSV file instead of stdout.'
+    )
+    sweep_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always re-simulate instead of reusing cached results.'
+    )
+    sweep_parser.add_argument(
+        '--profile',
+        choices=list(SOLVER_PROFILES),
+        default=DEFAULT_PROFILE,
+        help='Solver accuracy profile.'
+    )
 
-    # Load the mission stages from the specified file
-    try:
-        stages = load_mission_from_json(args.mission)
-    except FileNotFoundError:
-        print(f"Error: Mission file not found at '{args.mission}'")
-        return
-    except Exception as e:
-        print(f"An error occurred while loading the mission: {e}")
-        return
+    compare_parser = subparsers.add_parser(
+        'compare',
+        help='Simulate several missions in parallel and compare their metrics and trajectories.'
+    )
+    compare_parser.add_argument(
+        'missions',
+        nargs='*',
+        help=f'Mission JSON files (default: every mission in {MISSION_DIR}).'
+    )
+    compare_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: CPU count).'
+    )
+    compare_parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Write the metrics table to this CSV file.'
+    )
+    compare_parser.add_argument(
+        '--html',
+        type=str,
+        default=None,
+        help='Write the overlaid trajectory plot to this HTML file.'
+    )
+    compare_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always re-simulate instead of reusing cached results.'
+    )
+    compare_parser.add_argument(
+        '--profile',
+        choices=list(SOLVER_PROFILES),
+        default=DEFAULT_PROFILE,
+        help='Solver accuracy profile.'
+    )
+
+    optimize_parser = subparsers.add_parser(
+        'optimize',
+        help='Optimize stage parameters for an objective under constraints.'
+    )
+    optimize_parser.add_argument(
+        '--mission',
+        type=str,
+        required=True,
+        help='Path to the mission JSON file.'
+    )
+    optimize_parser.add_argument(
+        '--var',
+        action='append',
+        required=True,
+        help="Stage parameter to optimize, as '<stage_index>.<field>=<low>:<high>'. "
+             "May be given multiple times."
+    )
+    objective_group = optimize_parser.add_mutually_exclusive_group(required=True)
+    objective_group.add_argument(
+        '--maximize',
+        type=str,
+        metavar='METRIC',
+        help="Metric to maximize: a summary metric, 'liftoff_mass', 'propellant_mass' "
+             "or a stage parameter such as '1.dry_mass'."
+    )
+    objective_group.add_argument(
+        '--minimize',
+        type=str,
+        metavar='METRIC',
+        help='Metric to minimize.'
+    )
+    optimize_parser.add_argument(
+        '--constraint',
+        action='append',
+        help="Constraint such as 'burnout_velocity>=2000' or 'liftoff_mass<=550000'. "
+             "May be given multiple times."
+    )
+    optimize_parser.add_argument(
+        '--resolution',
+        type=float,
+        default=1.0,
+        help='Grid spacing of continuous variables; candidates on the same grid point '
+             'are simulated once.'
+    )
+    optimize_parser.add_argument(
+        '--popsize',
+        type=int,
+        default=15,
+        help='Candidates per generation, as a multiple of the number of variables.'
+    )
+    optimize_parser.add_argument(
+        '--maxiter',
+        type=int,
+        default=40,
+        help='Maximum number of generations.'
+    )
+    optimize_parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Random seed for reproducible runs.'
+    )
+    optimize_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: CPU count).'
+    )
+    optimize_parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Write the optimized mission JSON to this file instead of stdout.'
+    )
+    optimize_parser.add_argument(
+        '--history',
+        type=str,
+        default=None,
+        help='Write the per-generation convergence history to this CSV file.'
+    )
+    optimize_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always re-simulate instead of reusing cached results.'
+    )
+    optimize_parser.add_argument(
+        '--profile',
+        choices=list(SOLVER_PROFILES),
+        default=DEFAULT_PROFILE,
+        help='Solver accuracy profile.'
+    )
+
+    monte_carlo_parser = subparsers.add_parser(
+        'montecarlo',
+        help='Run a Monte Carlo dispersion analysis of a mission in parallel.'
+    )
+    monte_carlo_parser.add_argument(
+        '--mission',
+        type=str,
+        required=True,
+        help='Path to the mission JSON file.'
+    )
+    monte_carlo_parser.add_argument(
+        '--disperse',
+        action='append',
+        required=True,
+        help="Relative 1-sigma dispersion, as '<field>=<sigma>' for every stage or "
+             "'<stage_index>.<field>=<sigma>', with field one of isp, thrust, dry_mass, "
+             "fuel_mass, e.g. 'isp=0.01'. May be given multiple times."
+    )
+    monte_carlo_parser.add_argument(
+        '--runs',
+        type=int,
+        default=1000,
+        help='Number of dispersed runs.'
+    )
+    monte_carlo_parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Random seed for reproducible runs.'
+    )
+    monte_carlo_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: CPU count).'
+    )
+    monte_carlo_parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=None,
+        help='Number of runs per worker task.'
+    )
+    monte_carlo_parser.add_argument(
+        '--bin-width',
+        type=float,
+        default=5.0,
+        help='Width in seconds of the time bins of the altitude and velocity envelopes.'
+    )
+    monte_carlo_parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Write the statistics and envelopes to this JSON file, e.g. to view them in the app.'
+    )
+    monte_carlo_parser.add_argument(
+        '--profile',
+        choices=list(SOLVER_PROFILES),
+        default=DEFAULT_PROFILE,
+        help='Solver accuracy profile.'
+    )
 
-    # Initialize and run the simulation
-    simulator = TrajectorySimulator(stages)
-    results = simulator.simulate()
+    sensitivity_parser = subparsers.add_parser(
+        'sensitivity',
+        help='Compute the sensitivities of the stage boundary states to the stage parameters.'
+    )
+    sensitivity_parser.add_argument(
+        '--mission',
+        type=str,
+        required=True,
+        help='Path to the mission JSON file.'
+    )
+    sensitivity_parser.add_argument(
+        '--profile',
+        choices=list(SOLVER_PROFILES),
+        default=DEFAULT_PROFILE,
+        help='Solver accuracy profile.'
+    )
+    sensitivity_parser.add_argument(
+        '--coast-until',
+        choices=['apogee', 'impact'],
+        default='apogee',
+        help='End the coast after the last burn at apogee, or continue through reentry to ground impact.'
+    )
+    sensitivity_parser.add_argument(
+        '--error-control',
+        action='store_true',
+        help='Include the sensitivities in the step size control: more accurate, several times slower.'
+    )
+    sensitivity_parser.add_argument(
+        '--scaled',
+        action='store_true',
+        help='Report the change of each state quantity per 1%% change of each parameter.'
+    )
+    sensitivity_parser.add_argument(
+        '--validate',
+        action='store_true',
+        help='Also compute central finite differences and report the largest relative difference.'
+    )
+    sensitivity_parser.add_argument(
+        '--step',
+        type=float,
+        default=1e-4,
+        help='Relative parameter step of the --validate finite differences.'
+    )
+    sensitivity_parser.add_argument(
+        '--output',
+        type=str,
+        default=None,
+        help='Write the Jacobians to this JSON file.'
+    )
+
+    surrogate_parser = subparsers.add_parser(
+        'surrogate',
+        help='Build a surrogate model of a mission and preview stage configurations with it.'
+    )
+    surrogate_parser.add_argument(
+        '--mission',
+        type=str,
+        required=True,
+        help='Path to the mission JSON file.'
+    )
+    surrogate_parser.add_argument(
+        '--set',
+        action='append',
+        default=[],
+        help="Stage parameter of the previewed configuration, as '<stage_index>.<field>=<value>' "
+             "with field fuel_mass or num_engines. May be given multiple times; others stay nominal."
+    )
+    surrogate_parser.add_argument(
+        '--levels',
+        type=int,
+        default=5,
+        help='Grid values per propellant load when building the model.'
+    )
+    surrogate_parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Rebuild the model even if the stored one is up to date.'
+    )
+    surrogate_parser.add_argument(
+        '--validate',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Compare the model with N simulations at random points of its grid.'
+    )
+    surrogate_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: CPU count).'
+    )
+    surrogate_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always re-simulate the grid instead of reusing cached results.'
+    )
+    surrogate_parser.add_argument(
+        '--profile',
+        choices=list(SOLVER_PROFILES),
+        default=DEFAULT_PROFILE,
+        help='Solver accuracy profile.'
+    )
+
+    serve_parser = subparsers.add_parser(
+        'serve',
+        help='Run the local simulation job service used by the web app.'
+    )
+    serve_parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='TCP port on 127.0.0.1 to listen on.'
+    )
+    serve_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of worker processes, i.e. concurrent simulations (default: CPU count - 1).'
+    )
+    args = parser.parse_args()
+    # Keep the log off a JSON summary written to stdout
+    log_stream = sys.stderr if getattr(args, 'summary_json', None) == '-' else None
+    configure_logging(log_stream, json_format=getattr(args, 'log_json', False))
 
-    # Plot the results
-    if results:
-        plot_results(results)
+    if args.command == 'sweep':
+        run_sweep_command(args)
+    elif args.command == 'compare':
+        run_compare_command(args)
+    elif args.command == 'optimize':
+        run_optimize_command(args)
+    elif args.command == 'montecarlo':
+        run_monte_carlo_command(args)
+    elif args.command == 'sensitivity':
+        run_sensitivity_command(args)
+    elif args.command == 'surrogate':
+        run_surrogate_command(args)
+    elif args.command == 'serve':
+        from mission.job_service import DEFAULT_WORKERS, serve
+        serve(args.port, args.workers or DEFAULT_WORKERS)
+    elif args.mission:
+        run_mission(args)
+    else:
+        parser.error("the following arguments are required: --mission")
 
 if __name__ == "__main__":
     main()
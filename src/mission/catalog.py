@@ -0,0 +1,271 @@
+# src/mission/catalog.py
+
+"""
+Indexed catalog of mission files.
+
+The index holds a summary of every mission in a directory: name, stage count,
+liftoff and propellant mass, the engines it uses and its ideal delta-v from the
+rocket equation, plus a per-stage breakdown for previews. Listing, searching
+and previewing missions only reads the index. Entries are invalidated by the
+mtime and size of the mission file and of every engine config it references, so
+refresh() only stats files and re-parses the ones that changed. The index is
+kept on disk between runs.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+
+from engines.base_engine import load_engine_config
+from utils import constants
+
+# Bump when the layout of index entries changes
+CATALOG_VERSION = 1
+
+DEFAULT_INDEX_DIR = os.environ.get(
+    'STELLARLAB_CATALOG_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'stellarlab', 'catalog')
+)
+
+def _signature(path):
+    """
+    Returns (mtime_ns, size) of a file, or None if it cannot be read.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def ideal_delta_v(stages):
+    """
+    Computes the ideal (Tsiolkovsky) delta-v of every stage, ignoring gravity and drag.
+    Args:
+        stages (list): Dicts with 'dry_mass', 'fuel_mass' and 'isp', lowest stage first.
+    Returns:
+        list: Delta-v of each stage in m/s.
+    """
+    delta_v = []
+    mass_above = 0.0
+    for stage in reversed(stages):
+        initial_mass = mass_above + stage['dry_mass'] + stage['fuel_mass']
+        final_mass = initial_mass - stage['fuel_mass']
+        delta_v.append(stage['isp'] * constants.G * math.log(initial_mass / final_mass)
+                       if final_mass > 0 else math.inf)
+        mass_above = initial_mass
+    return delta_v[::-1]
+
+def summarize_mission(mission_data):
+    """
+    Builds the catalog entry fields of a parsed mission, resolving its engine configs.
+    Returns:
+        dict: Name, stage count, masses, engines, delta-v and per-stage summaries.
+    """
+    stages = []
+    for stage_data in mission_data['stages']:
+        engine = load_engine_config(stage_data['engine_config'])
+        stages.append({
+            'stage_name': stage_data['stage_name'],
+            'dry_mass': stage_data['dry_mass'],
+            'fuel_mass': stage_data['fuel_mass'],
+            'num_engines': stage_data['num_engines'],
+            'engine_config': stage_data['engine_config'],
+            'engine': engine.get('name', os.path.basename(stage_data['engine_config'])),
+            'engine_type': engine.get('type'),
+            'thrust': engine['thrust'] * stage_data['num_engines'],
+            'isp': engine['isp'],
+        })
+    for stage, delta_v in zip(stages, ideal_delta_v(stages)):
+        stage['delta_v'] = delta_v
+
+    return {
+        'name': mission_data['name'],
+        'num_stages': len(stages),
+        'liftoff_mass': sum(stage['dry_mass'] + stage['fuel_mass'] for stage in stages),
+        'propellant_mass': sum(stage['fuel_mass'] for stage in stages),
+        'delta_v': sum(stage['delta_v'] for stage in stages),
+        'engines': list(dict.fromkeys(stage['engine'] for stage in stages)),
+        'stages': stages,
+    }
+
+class MissionCatalog:
+    """
+    Mtime-invalidated index of the mission files in a directory.
+    """
+    def __init__(self, directory, index_dir=DEFAULT_INDEX_DIR):
+        """
+        Loads the stored index of a directory, if any. Call refresh() to bring it up to date.
+        Args:
+            directory (str): Directory of mission JSON files.
+            index_dir (str, optional): Where the index is stored. None keeps it in memory only.
+        """
+        self.directory = os.path.abspath(directory)
+        self.index_path = None
+        if index_dir is not None:
+            digest = hashlib.sha256(self.directory.encode('utf-8')).hexdigest()[:16]
+            self.index_path = os.path.join(index_dir, f"{digest}.json")
+        # Mission file name -> entry
+        self._entries = {}
+        # Absolute engine config path -> signature at indexing time
+        self._engines = {}
+        # The catalog is shared between app sessions, which refresh it concurrently
+        self._lock = threading.RLock()
+        self._load_index()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def refresh(self):
+        """
+        Re-indexes the missions that were added or changed, or whose engine configs
+        changed, and drops removed ones. Unchanged files are only stat'ed.
+        Returns:
+            int: Number of missions (re-)indexed.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        changed_engines = {path for path, signature in self._engines.items()
+                           if _signature(path) != signature}
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = [stat.st_mtime_ns, stat.st_size]
+
+        indexed = 0
+        for name in set(self._entries) - set(files):
+            del self._entries[name]
+        for name, signature in files.items():
+            entry = self._entries.get(name)
+            if (entry is not None and entry['signature'] == signature
+                    and not changed_engines.intersection(entry['engine_paths'])):
+                continue
+            self._entries[name] = self._index_file(name, signature)
+            indexed += 1
+
+        if indexed or changed_engines:
+            self._engines = {path: _signature(path) for entry in self._entries.values()
+                             for path in entry['engine_paths']}
+            self._save_index()
+        return indexed
+
+    def entries(self):
+        """
+        Returns every entry, sorted by mission name.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+        return sorted(entries, key=lambda entry: (entry['name'].lower(), entry['file']))
+
+    def get(self, file_name):
+        """
+        Returns the entry of a mission file name, or None.
+        """
+        return self._entries.get(file_name)
+
+    def search(self, query=None, engines=None, min_stages=None, max_stages=None,
+               min_delta_v=None, max_delta_v=None, include_errors=False):
+        """
+        Filters the catalog.
+        Args:
+            query (str, optional): Case-insensitive substring of the mission name,
+                file name or a stage name.
+            engines (list, optional): Keep missions using any of these engine names.
+            min_stages, max_stages (int, optional): Inclusive stage count range.
+            min_delta_v, max_delta_v (float, optional): Inclusive ideal delta-v range in m/s.
+            include_errors (bool): Also return files that could not be indexed.
+        Returns:
+            list: Matching entries, sorted by mission name.
+        """
+        query = query.strip().lower() if query else None
+        engines = set(engines or ())
+        matches = []
+        for entry in self.entries():
+            if entry['error'] is not None:
+                if include_errors and (not query or query in entry['file'].lower()):
+                    matches.append(entry)
+                continue
+            if query and not (query in entry['name'].lower() or query in entry['file'].lower()
+                              or any(query in stage['stage_name'].lower() for stage in entry['stages'])):
+                continue
+            if engines and not engines.intersection(entry['engines']):
+                continue
+            if min_stages is not None and entry['num_stages'] < min_stages:
+                continue
+            if max_stages is not None and entry['num_stages'] > max_stages:
+                continue
+            if min_delta_v is not None and entry['delta_v'] < min_delta_v:
+                continue
+            if max_delta_v is not None and entry['delta_v'] > max_delta_v:
+                continue
+            matches.append(entry)
+        return matches
+
+    def engines(self):
+        """
+        Returns the sorted names of all engines used by indexed missions.
+        """
+        return sorted({engine for entry in self.entries() for engine in entry.get('engines', ())})
+
+    def load(self, file_name):
+        """
+        Reads the full mission data of a catalog entry.
+        """
+        with open(os.path.join(self.directory, file_name), 'r') as f:
+            return json.load(f)
+
+    def _index_file(self, name, signature):
+        """
+        Parses one mission file into an index entry. Unreadable files get an entry
+        with an 'error' so that they are not re-parsed until they change.
+        """
+        entry = {'file': name, 'signature': signature, 'engine_paths': [], 'error': None}
+        try:
+            mission_data = self.load(name)
+            entry['engine_paths'] = sorted({os.path.abspath(stage['engine_config'])
+                                            for stage in mission_data['stages']})
+            entry.update(summarize_mission(mission_data))
+        except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError) as e:
+            entry.update(name=name, error=f"{type(e).__name__}: {e}")
+        return entry
+
+    def _load_index(self):
+        if self.index_path is None:
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get('version') != CATALOG_VERSION or index.get('directory') != self.directory:
+            return
+        self._entries = index['missions']
+        self._engines = index['engines']
+
+    def _save_index(self):
+        if self.index_path is None:
+            return
+        index = {
+            'version': CATALOG_VERSION,
+            'directory': self.directory,
+            'engines': self._engines,
+            'missions': self._entries,
+        }
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        # Write to a temporary file and rename so concurrent readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.index_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,117 @@
+# src/mission/checkpoints.py
+
+"""
+Stage-boundary checkpoints for incremental re-simulation.
+
+The flight of a stage depends only on the liftoff mass, the stages up to and
+including it, and the solver settings. The stages above it matter only through
+their mass. A checkpoint holds the rows and events of one stage and the state at
+its end: velocity, altitude, remaining mass and time offset. It is keyed by a
+hash of the stage prefix, so a re-run of a mission whose upper stage changed
+without changing its mass (e.g. a different engine or drag table) resumes after
+the deepest unchanged stage and splices in the stored rows of the earlier ones.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+from mission.result_cache import CACHE_VERSION, ResultCache
+from mission.simulation_result import COLUMNS, SimulationResult
+
+# Bump when the checkpoint layout changes (physics changes bump CACHE_VERSION)
+CHECKPOINT_VERSION = 1
+
+DEFAULT_CHECKPOINT_DIR = os.environ.get(
+    'STELLARLAB_CHECKPOINT_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'stellarlab', 'checkpoints')
+)
+DEFAULT_CHECKPOINT_ENTRIES = 64
+DEFAULT_CHECKPOINT_BYTES = 256 * 1024**2
+
+def stage_signature(stage):
+    """
+    Returns everything about a Stage that affects its flight, as JSON-serializable data.
+    The engine is described by its serialized configuration.
+    """
+    return {
+        'dry_mass': stage.dry_mass,
+        'fuel_mass': stage.fuel_mass,
+        'num_engines': stage.num_engines,
+        'reference_area': stage.reference_area,
+        'drag_coefficient': stage.drag_coefficient.to_list(),
+        'engine': stage.engine.to_dict(),
+    }
+
+def prefix_keys(stages, solver_settings, chunk_duration=None):
+    """
+    Computes the checkpoint key of every stage prefix.
+    Args:
+        stages (list): Stage objects, lowest first.
+        solver_settings (dict): The simulator's solver settings.
+        chunk_duration (float, optional): Streaming chunk duration, which splits
+            the integration and so changes the samples.
+    Returns:
+        list: Hex digests; entry i covers stages 0..i.
+    """
+    digest = hashlib.sha256()
+    base = {
+        'version': [CACHE_VERSION, CHECKPOINT_VERSION],
+        'solver': solver_settings,
+        'chunk_duration': chunk_duration,
+        'liftoff_mass': sum(stage.total_mass for stage in stages),
+    }
+    digest.update(json.dumps(base, sort_keys=True, default=str).encode('utf-8'))
+    keys = []
+    for stage in stages:
+        digest.update(json.dumps(stage_signature(stage), sort_keys=True, default=str).encode('utf-8'))
+        keys.append(digest.copy().hexdigest())
+    return keys
+
+class StageCheckpoint:
+    """
+    The rows and events of one simulated stage and the state at its end.
+    """
+    def __init__(self, result, state):
+        """
+        Args:
+            result (SimulationResult): The stage's rows, with its events.
+            state (dict): 'velocity' (m/s), 'altitude' (m), 'current_mass' (kg, after
+                separation), 'burnout_mass' (kg), 'time_offset' (s) and 'impacted'.
+        """
+        self.result = result
+        self.state = state
+
+class CheckpointStore(ResultCache):
+    """
+    Two-tier store of StageCheckpoints keyed by stage prefix hash, with the
+    memory LRU and disk budget of ResultCache.
+    """
+    def __init__(self, cache_dir=DEFAULT_CHECKPOINT_DIR, max_entries=DEFAULT_CHECKPOINT_ENTRIES,
+                 max_disk_bytes=DEFAULT_CHECKPOINT_BYTES):
+        super().__init__(cache_dir, max_entries, max_disk_bytes)
+
+    def _read(self, path):
+        with np.load(path) as data:
+            columns = {name: data[name] for name, _ in COLUMNS}
+            events = json.loads(str(data['events']))
+            state = json.loads(str(data['state']))
+        return StageCheckpoint(SimulationResult.from_columns(columns, events), state)
+
+    def _write(self, f, checkpoint):
+        # JSON keeps the floats of the state exact, so a resumed run matches a fresh one
+        np.savez(f, **checkpoint.result.to_dict(),
+                 events=np.array(json.dumps(checkpoint.result.events)),
+                 state=np.array(json.dumps(checkpoint.state)))
+
+_default_checkpoints = None
+
+def get_default_checkpoints():
+    """
+    Returns the process-wide checkpoint store shared by the CLI and the job service.
+    """
+    global _default_checkpoints
+    if _default_checkpoints is None:
+        _default_checkpoints = CheckpointStore()
+    return _default_checkpoints
@@ -0,0 +1,235 @@
+# src/mission/comparison.py
+
+"""
+Side-by-side comparison of several missions.
+
+run_comparison() simulates the missions concurrently in a pool of worker
+processes and collects their trajectories in a ComparisonStore: one array
+per result column holding every mission's rows back to back, with row
+offsets per mission. Each mission's trajectory is handed out as a zero-copy
+SimulationResult view of the shared columns, and the whole store as a single
+long DataFrame with a categorical 'mission' column, so no mission is held as
+its own DataFrame or copy.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+from mission.result_cache import get_default_cache, mission_cache_key
+from mission.simulation_result import COLUMNS, SimulationResult
+from mission.trajectory_simulator import DEFAULT_PROFILE
+from utils.log import get_logger, log, quiet
+
+logger = get_logger('comparison')
+
+class ComparisonStore:
+    """
+    Trajectories of several missions in one set of shared column arrays.
+    """
+    def __init__(self, capacity=0):
+        """
+        Args:
+            capacity (int): Total number of rows to preallocate.
+        """
+        self._data = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS}
+        self._size = 0
+        # Mission names in insertion order, and the first row of each mission
+        # followed by the end of the last one
+        self.names = []
+        self._offsets = [0]
+        self._events = []
+        # Per mission: 'cache_hit' and 'elapsed' (seconds) of its run
+        self.info = {}
+        # Missions that could not be simulated, as '<name>: <error>' messages
+        self.errors = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __repr__(self):
+        return f"ComparisonStore({len(self.names)} missions, {self._size} samples)"
+
+    @property
+    def num_samples(self):
+        """
+        Number of rows of all missions.
+        """
+        return self._size
+
+    def add(self, name, result, **info):
+        """
+        Copies a trajectory into the shared columns, growing them if needed.
+        Views handed out before a reallocation keep the old storage alive.
+        Args:
+            name (str): Unique mission label.
+            result (SimulationResult or dict): The trajectory.
+            **info: Run details kept in self.info, e.g. cache_hit=True.
+        """
+        if name in self.names:
+            raise ValueError(f"Mission '{name}' is already in the comparison")
+        count = len(result['time'])
+        end = self._size + count
+        if end > len(self._data['time']):
+            self._reserve(max(end, 2 * len(self._data['time'])))
+        for column, _ in COLUMNS:
+            self._data[column][self._size:end] = result[column]
+        self._size = end
+        self.names.append(name)
+        self._offsets.append(end)
+        self._events.append(list(getattr(result, 'events', ())))
+        self.info[name] = info
+
+    def _reserve(self, capacity):
+        for column, values in self._data.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self._size] = values[:self._size]
+            self._data[column] = grown
+
+    def column(self, name):
+        """
+        Returns a zero-copy view of a column over every mission.
+        """
+        return self._data[name][:self._size]
+
+    def mission_index(self):
+        """
+        Returns the position in self.names of the mission of every row.
+        """
+        return np.repeat(np.arange(len(self.names)), np.diff(self._offsets))
+
+    def result(self, name):
+        """
+        Returns one mission's trajectory as zero-copy views of the shared columns.
+        Raises:
+            KeyError: If the mission is not in the store.
+        """
+        if name not in self.names:
+            raise KeyError(name)
+        i = self.names.index(name)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return SimulationResult.from_columns(
+            {column: self._data[column][start:end] for column, _ in COLUMNS}, self._events[i])
+
+    def to_dataframe(self):
+        """
+        Returns every mission's rows as one DataFrame with a categorical 'mission'
+        column, backed by the shared columns where pandas allows it.
+        """
+        import pandas as pd
+        frame = {'mission': pd.Categorical.from_codes(self.mission_index(), self.names)}
+        frame.update((name, self.column(name)) for name, _ in COLUMNS)
+        return pd.DataFrame(frame, copy=False)
+
+    def metrics_frame(self):
+        """
+        Returns the key metrics side by side: one row per metric, one column per mission.
+        """
+        import pandas as pd
+        metrics = {}
+        for name in self.names:
+            result = self.result(name)
+            # Stage 0 is the coast after the last burn, not a powered stage
+            stage = result['stage']
+            metrics[name] = dict(result.summary(), stages=int(np.unique(stage[stage > 0]).size),
+                                 samples=result.num_samples)
+        return pd.DataFrame(metrics, columns=self.names)
+
+def mission_labels(paths):
+    """
+    Returns unique labels for mission files: the file names without extension.
+    """
+    labels = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    if len(set(labels)) != len(labels):
+        # Files of the same name in different directories keep their path
+        labels = [os.path.splitext(path)[0] for path in paths]
+    return labels
+
+def _run_mission(mission_data, profile, use_cache):
+    """
+    Simulates one mission inside a worker process.
+    Returns:
+        tuple: (dict of column arrays, events, cache hit flag, elapsed seconds).
+    """
+    start = time.perf_counter()
+    with quiet():
+        if use_cache:
+            results, cache_hit = get_default_cache().get_or_simulate(mission_data, profile=profile)
+        else:
+            from mission.mission_loader import load_mission_from_dict
+            from mission.trajectory_simulator import TrajectorySimulator
+            results = TrajectorySimulator(load_mission_from_dict(mission_data), profile).simulate()
+            cache_hit = False
+    # Only the filled rows are sent back to the parent
+    return results.to_dict(), results.events, cache_hit, time.perf_counter() - start
+
+def run_comparison(missions, profile=None, max_workers=None, use_cache=True):
+    """
+    Simulates several missions concurrently and collects them in a ComparisonStore.
+    Missions found in the result cache are loaded without a worker.
+    Args:
+        missions (list or dict): Mission JSON file paths, or a dict mapping
+            labels to parsed mission data.
+        profile (str, optional): Solver profile name.
+        max_workers (int, optional): Number of worker processes. Defaults to the
+            CPU count, capped at the number of missions to simulate.
+        use_cache (bool): Reuse and store results in the shared result cache.
+    Returns:
+        ComparisonStore: The trajectories, in the order of `missions`. Missions that
+            fail are left out and reported in its `errors`.
+    """
+    profile = profile or DEFAULT_PROFILE
+    if not isinstance(missions, dict):
+        paths = list(missions)
+        missions = {}
+        for label, path in zip(mission_labels(paths), paths):
+            with open(path, 'r') as f:
+                missions[label] = json.load(f)
+    if not missions:
+        raise ValueError("Select at least one mission to compare")
+
+    cache = get_default_cache() if use_cache else None
+    outcomes = {}
+    for label, mission_data in missions.items():
+        start = time.perf_counter()
+        try:
+            cached = cache.get(mission_cache_key(mission_data, profile)) if cache else None
+        except Exception:
+            # E.g. a missing engine config: the mission's worker fails and reports it
+            cached = None
+        if cached is not None:
+            outcomes[label] = (cached, cached.events, True, time.perf_counter() - start)
+
+    pending = [label for label in missions if label not in outcomes]
+    max_workers = min(max_workers or os.cpu_count() or 1, max(1, len(pending)))
+    log(logger, f"Comparing {len(missions)} missions: {len(pending)} to simulate on {max_workers} workers",
+        event='comparison_start', missions=len(missions), simulated=len(pending), workers=max_workers)
+
+    store = ComparisonStore()
+    with ProcessPoolExecutor(max_workers=max_workers) if pending else nullcontext() as executor:
+        futures = {label: executor.submit(_run_mission, missions[label], profile, use_cache)
+                   for label in pending}
+        # Missions are stored in input order, each as soon as it and its predecessors are done
+        for label in missions:
+            if label in futures:
+                try:
+                    outcomes[label] = futures.pop(label).result()
+                except Exception as e:
+                    store.errors.append(f"{label}: {type(e).__name__}: {e}")
+                    continue
+            columns, events, cache_hit, elapsed = outcomes.pop(label)
+            store.add(label, SimulationResult.from_columns(columns, events),
+                      cache_hit=cache_hit, elapsed=elapsed)
+
+    log(logger, f"Comparison complete: {len(store)} succeeded, {len(store.errors)} failed",
+        event='comparison_complete', succeeded=len(store), failed=len(store.errors))
+    return store
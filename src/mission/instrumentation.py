@@ -0,0 +1,183 @@
+# src/mission/instrumentation.py
+
+"""
+Solver instrumentation and profiling helpers.
+
+Every simulation collects a SimulationStats with per-phase (stage or coast)
+counters from the ODE solver. It is returned as the `stats` attribute of the
+result. cProfile captures are opt-in through profiled().
+"""
+
+import io
+import time
+from contextlib import contextmanager
+
+# Per-phase counters, in display order
+STAT_FIELDS = (
+    'wall_time',            # seconds spent in the simulator for the phase
+    'solve_time',           # seconds inside solve_ivp
+    'sample_time',          # seconds evaluating dense output at the sample times
+    'segments',             # solve_ivp calls
+    'rhs_evaluations',
+    'accepted_steps',
+    'rejected_steps',       # explicit Runge-Kutta methods only
+    'jacobian_evaluations', # implicit methods only
+    'lu_decompositions',    # implicit methods only
+)
+
+def counting_method(method, counter):
+    """
+    Wraps a solve_ivp method so that rejected steps are counted.
+
+    solve_ivp does not report rejected steps. An explicit Runge-Kutta step attempt
+    costs exactly `n_stages` RHS evaluations, so the attempts of each step are
+    recovered from the change in the solver's evaluation count.
+    Args:
+        method (str or type): A solve_ivp method name or OdeSolver class.
+        counter (dict): Receives the count under 'rejected_steps'.
+    Returns:
+        type: An OdeSolver subclass to pass as solve_ivp's `method`.
+    """
+    import scipy.integrate
+    base = getattr(scipy.integrate, method) if isinstance(method, str) else method
+
+    class CountingSolver(base):
+        def _step_impl(self):
+            before = self.nfev
+            result = super()._step_impl()
+            n_stages = getattr(self, 'n_stages', None)
+            if n_stages:
+                attempts = (self.nfev - before) // n_stages
+                counter['rejected_steps'] = counter.get('rejected_steps', 0) + max(attempts - 1, 0)
+            return result
+
+    CountingSolver.__name__ = base.__name__
+    return CountingSolver
+
+class SimulationStats:
+    """
+    Per-phase solver statistics and named wall-clock timings of one run.
+    """
+    def __init__(self):
+        self.phases = {}
+        # Timings outside the solver, e.g. 'load' or 'plotting', in seconds
+        self.timings = {}
+        # Numbers of the stages spliced in from checkpoints instead of simulated
+        self.reused_stages = []
+
+    def phase(self, name):
+        """
+        Returns the counters of a phase, creating them on first use.
+        """
+        if name not in self.phases:
+            self.phases[name] = dict.fromkeys(STAT_FIELDS, 0)
+        return self.phases[name]
+
+    def add(self, phase, field, value):
+        self.phase(phase)[field] += value
+
+    def record_solve(self, phase, sol, elapsed, rejected_steps):
+        """
+        Adds the counters of one solve_ivp call to a phase.
+        """
+        stats = self.phase(phase)
+        stats['segments'] += 1
+        stats['solve_time'] += elapsed
+        stats['rhs_evaluations'] += sol.nfev
+        stats['accepted_steps'] += len(sol.t) - 1
+        stats['rejected_steps'] += rejected_steps
+        stats['jacobian_evaluations'] += sol.njev
+        stats['lu_decompositions'] += sol.nlu
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Adds the wall time of a block to the named timing.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def totals(self):
+        """
+        Returns the counters summed over all phases.
+        """
+        totals = dict.fromkeys(STAT_FIELDS, 0)
+        for stats in self.phases.values():
+            for field in STAT_FIELDS:
+                totals[field] += stats[field]
+        return totals
+
+    def rows(self):
+        """
+        Returns one dict per phase plus a 'total' row, e.g. for a DataFrame.
+        """
+        rows = [dict(phase=name, **stats) for name, stats in self.phases.items()]
+        if rows:
+            rows.append(dict(phase='total', **self.totals()))
+        return rows
+
+    def to_dict(self):
+        return {'phases': self.phases, 'timings': self.timings, 'reused_stages': self.reused_stages}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds stats from to_dict() output, e.g. received from a job service.
+        """
+        stats = cls()
+        for name, counters in data['phases'].items():
+            stats.phase(name).update(counters)
+        stats.timings.update(data['timings'])
+        stats.reused_stages.extend(data.get('reused_stages', []))
+        return stats
+
+    def format_table(self):
+        """
+        Returns the per-phase counters and timings as a text table.
+        """
+        header = (f"{'phase':<10} {'wall (ms)':>10} {'solve (ms)':>11} {'sample (ms)':>12} "
+                  f"{'RHS':>8} {'accepted':>9} {'rejected':>9} {'jac':>6} {'LU':>6}")
+        lines = [header]
+        for row in self.rows():
+            lines.append(
+                f"{row['phase']:<10} {row['wall_time'] * 1000:>10.2f} {row['solve_time'] * 1000:>11.2f} "
+                f"{row['sample_time'] * 1000:>12.2f} {row['rhs_evaluations']:>8} "
+                f"{row['accepted_steps']:>9} {row['rejected_steps']:>9} "
+                f"{row['jacobian_evaluations']:>6} {row['lu_decompositions']:>6}"
+            )
+        for name, seconds in self.timings.items():
+            lines.append(f"{name}: {seconds * 1000:.2f} ms")
+        if self.reused_stages:
+            lines.append(f"reused from checkpoints: stages {', '.join(map(str, self.reused_stages))}")
+        return "\n".join(lines)
+
+@contextmanager
+def profiled(path=None):
+    """
+    Runs a block under cProfile.
+    Args:
+        path (str, optional): Where to dump the stats for pstats or snakeviz.
+    Yields:
+        cProfile.Profile: The profiler, stopped when the block exits.
+    """
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+
+def profile_summary(profiler, limit=25, sort='cumulative'):
+    """
+    Returns the top functions of a cProfile capture as text.
+    """
+    import pstats
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,589 @@
+# src/mission/job_service.py
+
+"""
+Local simulation job service.
+
+A JobService runs TrajectorySimulator jobs in a bounded pool of worker
+processes, so callers such as the Streamlit app never simulate in their own
+request thread. submit() returns a job id immediately; status(), result() and
+cancel() take that id. An identical job (same mission content, solver profile
+and options) that is queued, running or recently finished is shared instead of
+being simulated again, and finished results go to the shared result cache.
+
+serve() exposes a service over HTTP on the loopback interface only, and
+JobClient is the matching client:
+
+    POST   /jobs              {"mission": {...}, "profile": "standard", "instrument": false}
+    GET    /jobs/<id>         job status
+    GET    /jobs/<id>/partial?start=N
+                              the rows simulated so far, from row N on, as .npz bytes
+    GET    /jobs/<id>/result  the result as .npz bytes (409 until the job is done)
+    DELETE /jobs/<id>         cancel the job
+    GET    /health            service summary
+"""
+
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mission.checkpoints import get_default_checkpoints
+from mission.instrumentation import SimulationStats, profile_summary, profiled
+from mission.mission_loader import load_mission_from_dict
+from mission.result_cache import get_default_cache, mission_cache_key
+from mission.result_io import load_result, result_to_bytes
+from mission.simulation_result import SimulationResult
+from mission.trajectory_simulator import DEFAULT_PROFILE, TrajectorySimulator
+from utils.log import ROOT_LOGGER, capture_logs, get_logger, log
+
+logger = get_logger('jobs')
+
+# The service only ever listens on the loopback interface
+HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_URL = os.environ.get('STELLARLAB_JOB_SERVICE', f"http://{HOST}:{DEFAULT_PORT}")
+
+# Job states; the last three are final
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+FINAL_STATES = ('done', 'failed', 'cancelled')
+
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# Finished jobs kept for status and result requests; older ones are forgotten
+MAX_FINISHED_JOBS = 64
+
+# Flight time per chunk sent back while a job runs, so that clients can draw
+# the partial trajectory. Splitting segments changes the samples only within
+# the solver tolerances (see TrajectorySimulator.iter_simulate).
+PROGRESS_CHUNK_DURATION = 10.0 # seconds
+
+# Progress updates sent by the worker of the current job
+_progress_queue = None
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+    # Job logs are returned with the job; drop console handlers inherited by forked workers
+    logging.getLogger(ROOT_LOGGER).handlers.clear()
+
+def _run_job(job_id, mission_data, profile, instrument):
+    """
+    Simulates a mission inside a worker process.
+    Returns:
+        tuple: (SimulationResult, log text, cProfile summary or None)
+    """
+    if _progress_queue is not None:
+        _progress_queue.put((job_id, None))
+    log_stream = io.StringIO()
+    with capture_logs(log_stream), profiled() if instrument else nullcontext() as profiler:
+        # Instrumented jobs simulate every stage, so that all of them have solver stats
+        simulator = TrajectorySimulator(load_mission_from_dict(mission_data), profile,
+                                        checkpoints=None if instrument else get_default_checkpoints())
+        chunks = []
+        for chunk in simulator.iter_simulate(PROGRESS_CHUNK_DURATION):
+            chunks.append(chunk)
+            if _progress_queue is not None and chunk.num_samples:
+                _progress_queue.put((job_id, chunk.to_dict()))
+        result = SimulationResult.concatenate(chunks)
+        result.events = [event for chunk in chunks for event in chunk.events]
+        result.stats = simulator.stats
+    return result, log_stream.getvalue(), profile_summary(profiler) if profiler else None
+
+class Job:
+    """
+    State of one submitted simulation.
+    """
+    def __init__(self, job_id, key, mission_name):
+        self.job_id = job_id
+        self.key = key
+        self.mission_name = mission_name
+        self.state = 'queued'
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Flight time and stage of the last integrated segment
+        self.progress = None
+        # Rows simulated so far, while the job runs
+        self.partial = None
+        self.cache_hit = False
+        self.result = None
+        self.error = None
+        self.log = ''
+        self.profile_summary = None
+        # Number of submissions sharing the job; it is cancelled when all cancel
+        self.subscribers = 1
+        self.future = None
+        self.done = threading.Event()
+
+    @property
+    def num_samples(self):
+        """
+        Number of rows available: simulated so far, or of the result once done.
+        """
+        if self.result is not None:
+            return self.result.num_samples
+        return self.partial.num_samples if self.partial is not None else 0
+
+    def rows(self, start=0):
+        """
+        Returns the rows from `start` on, simulated so far or of the result, as a new result.
+        """
+        source = self.result if self.result is not None else self.partial
+        if source is None:
+            return SimulationResult()
+        start = max(0, start)
+        return SimulationResult.concatenate([{name: column[start:] for name, column in source.items()}])
+
+    def to_dict(self):
+        """
+        Returns the JSON-serializable status of the job.
+        """
+        status = {
+            'job_id': self.job_id,
+            'state': self.state,
+            'mission': self.mission_name,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': self.progress,
+            'samples': self.num_samples,
+            'cache_hit': self.cache_hit,
+            'error': self.error,
+        }
+        if self.state in FINAL_STATES:
+            status['log'] = self.log
+            status['stats'] = self.result.stats.to_dict() if self.result and self.result.stats else None
+            status['profile_summary'] = self.profile_summary
+        return status
+
+class JobService:
+    """
+    Runs simulation jobs in a bounded process pool.
+    """
+    def __init__(self, max_workers=DEFAULT_WORKERS, cache=None):
+        """
+        Args:
+            max_workers (int): Number of worker processes, and so of concurrent simulations.
+            cache (ResultCache, optional): Result cache. Defaults to the process-wide cache.
+        """
+        self.max_workers = max_workers
+        self.cache = cache or get_default_cache()
+        self._jobs = OrderedDict()
+        # Dedup key -> job id of the newest job for that key
+        self._by_key = {}
+        self._lock = threading.Lock()
+        self._progress = multiprocessing.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                             initargs=(self._progress,))
+        self._closed = False
+        self._progress_thread = threading.Thread(target=self._drain_progress, daemon=True)
+        self._progress_thread.start()
+
+    def submit(self, mission_data, profile=None, instrument=False):
+        """
+        Queues a simulation and returns immediately.
+        Args:
+            mission_data (dict): Mission profile in the mission JSON layout.
+            profile (str, optional): Solver profile name.
+            instrument (bool): Always simulate (bypassing the result cache) and capture
+                a cProfile summary.
+        Returns:
+            str: The job id. Identical submissions share a job while it is queued or
+                running, and, unless instrumented, after it is done.
+        """
+        profile = profile or DEFAULT_PROFILE
+        cache_key = mission_cache_key(mission_data, profile)
+        key = (cache_key, bool(instrument))
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The job service is shut down")
+            job = self._jobs.get(self._by_key.get(key))
+            # Instrumented submissions only join a job that has not finished yet
+            if job is not None and (job.state in ('queued', 'running')
+                                    or job.state == 'done' and not instrument):
+                job.subscribers += 1
+                self._jobs.move_to_end(job.job_id)
+                return job.job_id
+
+            job = Job(uuid.uuid4().hex, key, mission_data.get('name'))
+            self._jobs[job.job_id] = job
+            self._by_key[key] = job.job_id
+            self._forget_finished()
+
+        result = None if instrument else self.cache.get(cache_key)
+        if result is not None:
+            job.cache_hit = True
+            self._finish(job, 'done', result=result)
+        else:
+            job.future = self._executor.submit(_run_job, job.job_id, mission_data, profile, instrument)
+            job.future.add_done_callback(lambda future: self._collect(job, future))
+        log(logger, f"Submitted job {job.job_id} for mission: {job.mission_name}",
+            event='job_submitted', job_id=job.job_id, mission=job.mission_name, cache_hit=job.cache_hit)
+        return job.job_id
+
+    def status(self, job_id):
+        """
+        Returns the status of a job as a dict (see Job.to_dict).
+        Raises:
+            KeyError: If the job is unknown or was forgotten.
+        """
+        with self._lock:
+            return self._jobs[job_id].to_dict()
+
+    def result(self, job_id, timeout=None):
+        """
+        Waits for a job and returns its result.
+        Args:
+            timeout (float, optional): Seconds to wait. None waits until the job ends.
+        Returns:
+            SimulationResult: The result, shared with the cache and to be treated as read-only.
+        Raises:
+            KeyError: If the job is unknown.
+            TimeoutError: If the job is still queued or running after the timeout.
+            RuntimeError: If the job failed or was cancelled.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+        if not job.done.wait(timeout):
+            raise TimeoutError(f"Job {job_id} is still {job.state}")
+        if job.state != 'done':
+            raise RuntimeError(f"Job {job_id} {job.state}" + (f": {job.error}" if job.error else ""))
+        return job.result
+
+    def partial(self, job_id, start=0):
+        """
+        Returns the rows of a job simulated so far, for drawing a running job.
+        Args:
+            start (int): First row to return, e.g. the number of rows fetched before.
+        Returns:
+            SimulationResult: A copy of the rows from `start` on, without events.
+                All of the result's rows once the job is done; none if it failed.
+        Raises:
+            KeyError: If the job is unknown.
+        """
+        with self._lock:
+            return self._jobs[job_id].rows(start)
+
+    def cancel(self, job_id):
+        """
+        Withdraws one submission of a job. The job is cancelled once every submission
+        sharing it is withdrawn. A job that is already running finishes in its worker,
+        but its result is discarded.
+        Returns:
+            dict: The job status.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.state not in FINAL_STATES:
+                job.subscribers -= 1
+                if job.subscribers <= 0:
+                    if job.future is not None:
+                        job.future.cancel()
+                    self._finish_locked(job, 'cancelled')
+            return job.to_dict()
+
+    def summary(self):
+        """
+        Returns the number of jobs in each state and the pool size.
+        """
+        with self._lock:
+            counts = dict.fromkeys(JOB_STATES, 0)
+            for job in self._jobs.values():
+                counts[job.state] += 1
+        return {'workers': self.max_workers, 'jobs': counts}
+
+    def shutdown(self, wait=True):
+        """
+        Cancels queued jobs and stops the worker pool.
+        """
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._progress.put(None)
+
+    def _collect(self, job, future):
+        """
+        Records the outcome of a worker run (called from the pool's thread).
+        """
+        try:
+            result, job_log, summary = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            self._finish(job, 'failed', error=f"{type(e).__name__}: {e}")
+            return
+        # Results of cancelled jobs are still good for the cache
+        if not job.key[1]:
+            self.cache.put(job.key[0], result)
+        self._finish(job, 'done', result=result, log=job_log, summary=summary)
+
+    def _finish(self, job, state, **outcome):
+        with self._lock:
+            self._finish_locked(job, state, **outcome)
+
+    def _finish_locked(self, job, state, result=None, error=None, log='', summary=None):
+        if job.state in FINAL_STATES:
+            return
+        job.state = state
+        job.result = result
+        job.error = error
+        job.log = log
+        job.profile_summary = summary
+        job.partial = None
+        job.finished_at = time.time()
+        job.done.set()
+
+    def _forget_finished(self):
+        finished = [job for job in self._jobs.values() if job.state in FINAL_STATES]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.job_id]
+            if self._by_key.get(job.key) == job.job_id:
+                del self._by_key[job.key]
+
+    def _drain_progress(self):
+        """
+        Applies progress updates from the workers to the jobs.
+        """
+        while True:
+            try:
+                update = self._progress.get()
+            except (EOFError, OSError):
+                return
+            if update is None:
+                return
+            job_id, chunk = update
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.state in FINAL_STATES:
+                    continue
+                if chunk is None:
+                    job.state = 'running'
+                    job.started_at = time.time()
+                    job.partial = SimulationResult()
+                else:
+                    job.partial.append(**chunk)
+                    job.progress = {'time': float(chunk['time'][-1]), 'stage': int(chunk['stage'][-1])}
+
+class _JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    Maps the HTTP API onto the server's JobService.
+    """
+    def log_message(self, format, *args):
+        log(logger, format % args, level=logging.DEBUG, event='http_request')
+
+    def _send_json(self, code, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self):
+        """
+        Returns the job id and the sub-resource ('result', 'partial' or None) of the path.
+        """
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        if parts[:1] != ['jobs'] or len(parts) > 3 or (len(parts) == 3 and parts[2] not in ('result', 'partial')):
+            return None, None
+        return (parts[1] if len(parts) > 1 else None), (parts[2] if len(parts) == 3 else None)
+
+    def _send_result(self, result):
+        data = result_to_bytes(result, 'npz')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/health':
+            self._send_json(200, service.summary())
+            return
+        job_id, resource = self._route()
+        if job_id is None:
+            self._send_json(404, {'error': 'Not found'})
+            return
+        try:
+            status = service.status(job_id)
+            if resource == 'partial':
+                query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+                self._send_result(service.partial(job_id, int(query.get('start', ['0'])[0])))
+                return
+        except KeyError:
+            self._send_json(404, {'error': f"Unknown job {job_id}"})
+            return
+        except ValueError:
+            self._send_json(400, {'error': "start must be an integer"})
+            return
+        if resource is None:
+            self._send_json(200, status)
+        elif status['state'] != 'done':
+            self._send_json(409, {'error': f"Job {job_id} is {status['state']}"})
+        else:
+            self._send_result(service.result(job_id))
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length))
+            job_id = self.server.service.submit(payload['mission'], payload.get('profile'),
+                                                payload.get('instrument', False))
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            self._send_json(400, {'error': f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(202, self.server.service.status(job_id))
+
+    def do_DELETE(self):
+        job_id, resource = self._route()
+        if job_id is None or resource:
+            self._send_json(404, {'error': 'Not found'})
+            return
+        try:
+            self._send_json(200, self.server.service.cancel(job_id))
+        except KeyError:
+            self._send_json(404, {'error': f"Unknown job {job_id}"})
+
+def make_server(service, port=DEFAULT_PORT):
+    """
+    Creates an HTTP server for a service on the loopback interface.
+    Args:
+        service (JobService): The service to expose.
+        port (int): TCP port; 0 picks a free one (see server.server_address).
+    Returns:
+        ThreadingHTTPServer: The server, not yet serving.
+    """
+    server = ThreadingHTTPServer((HOST, port), _JobRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+def start_background_server(max_workers=DEFAULT_WORKERS, port=0):
+    """
+    Starts a service and its HTTP server on a daemon thread of this process.
+    Returns:
+        str: The service URL.
+    """
+    server = make_server(JobService(max_workers), port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+def serve(port=DEFAULT_PORT, max_workers=DEFAULT_WORKERS):
+    """
+    Runs a job service in the foreground until interrupted.
+    """
+    service = JobService(max_workers)
+    server = make_server(service, port)
+    log(logger, f"Job service listening on http://{HOST}:{port} with {max_workers} workers",
+        event='service_start', port=port, workers=max_workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown(wait=False)
+
+class JobClient:
+    """
+    Client of a job service's HTTP API.
+    """
+    def __init__(self, url=DEFAULT_URL, timeout=10.0):
+        """
+        Args:
+            url (str): Base URL of the service.
+            timeout (float): Seconds to wait for each HTTP response.
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None):
+        data = None if body is None else json.dumps(body).encode('utf-8')
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+                if response.headers.get('Content-Type') == 'application/json':
+                    return json.loads(content)
+                return content
+        except urllib.error.HTTPError as e:
+            message = json.loads(e.read() or b'{}').get('error', e.reason)
+            if e.code == 404:
+                raise KeyError(message) from None
+            raise RuntimeError(message) from None
+
+    def available(self):
+        """
+        Returns True if the service answers.
+        """
+        try:
+            self._request('GET', '/health')
+        except (OSError, RuntimeError, ValueError):
+            return False
+        return True
+
+    def submit(self, mission_data, profile=None, instrument=False):
+        """
+        Queues a simulation and returns its job id (see JobService.submit).
+        """
+        body = {'mission': mission_data, 'profile': profile, 'instrument': instrument}
+        return self._request('POST', '/jobs', body)['job_id']
+
+    def status(self, job_id):
+        return self._request('GET', f"/jobs/{job_id}")
+
+    def cancel(self, job_id):
+        return self._request('DELETE', f"/jobs/{job_id}")
+
+    def partial(self, job_id, start=0):
+        """
+        Downloads the rows of a job simulated so far, from row `start` on (see JobService.partial).
+        Returns:
+            SimulationResult: The rows, without events or stats.
+        """
+        data = self._request('GET', f"/jobs/{job_id}/partial?start={int(start)}")
+        return load_result(io.BytesIO(data), 'npz')
+
+    def result(self, job_id):
+        """
+        Downloads the result of a finished job.
+        Returns:
+            SimulationResult: The result, with its solver stats if the job simulated.
+        """
+        data = self._request('GET', f"/jobs/{job_id}/result")
+        result = load_result(io.BytesIO(data), 'npz')
+        stats = self.status(job_id).get('stats')
+        if stats:
+            result.stats = SimulationStats.from_dict(stats)
+        return result
+
+    def wait(self, job_id, poll_interval=0.25, timeout=None):
+        """
+        Polls a job until it reaches a final state.
+        Returns:
+            dict: The final status.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(job_id)
+            if status['state'] in FINAL_STATES:
+                return status
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} is still {status['state']}")
+            time.sleep(poll_interval)
@@ -2,22 +2,36 @@
 
 import json
 from engines.base_engine import RocketEngine
+from utils.aerodynamics import DEFAULT_CD_TABLE, DragCoefficient
+from utils.log import get_logger, log
+
+logger = get_logger('loader')
 
 class Stage:
     """
     Represents a single stage of a rocket.
     """
-    def __init__(self, stage_name, dry_mass, fuel_mass, engine, num_engines):
+    def __init__(self, stage_name, dry_mass, fuel_mass, engine, num_engines,
+                 reference_area=0.0, drag_coefficient=DEFAULT_CD_TABLE):
+        """
+        Args:
+            reference_area (float): Frontal area in m^2 used for drag while this stage
+                is the lowest one attached. 0 disables drag.
+            drag_coefficient (float or list): Constant Cd, or [mach, cd] pairs.
+        """
         self.stage_name = stage_name
         self.dry_mass = dry_mass
         self.fuel_mass = fuel_mass
         self.engine = engine
         self.num_engines = num_engines
         self.total_mass = self.dry_mass + self.fuel_mass
+        self.reference_area = reference_area
+        self.drag_coefficient = DragCoefficient(drag_coefficient)
 
     def get_thrust(self, time):
         """
         Calculates the total total thrust from all engines in the stage.
+        Accepts a scalar time or a NumPy array of times.
         """
         return self.engine.get_thrust(time) * self.num_engines
 
@@ -34,11 +48,22 @@ def load_mission_from_json(file_path):
     with open(file_path, 'r') as f:
         mission_data = json.load(f)
 
-    print(f"Loading mission: {mission_data['name']}")
+    return load_mission_from_dict(mission_data)
+
+def load_mission_from_dict(mission_data):
+    """
+    Builds the stages of a mission from already parsed mission data.
+    Args:
+        mission_data (dict): Mission profile in the mission JSON layout.
+    Returns:
+        list: A list of Stage objects.
+    """
+    log(logger, f"Loading mission: {mission_data['name']}", event='load_mission', mission=mission_data['name'])
     
     stages = []
     for stage_data in mission_data['stages']:
-        print(f"  - Loading stage: {stage_data['stage_name']}")
+        log(logger, f"  - Loading stage: {stage_data['stage_name']}", event='load_stage',
+            stage_name=stage_data['stage_name'])
         engine_config_path = stage_data['engine_config']
         engine = RocketEngine.from_json(engine_config_path)
         
@@ -47,7 +72,9 @@ def load_mission_from_json(file_path):
             dry_mass=stage_data['dry_mass'],
             fuel_mass=stage_data['fuel_mass'],
             engine=engine,
-            num_engines=stage_data['num_engines']
+            num_engines=stage_data['num_engines'],
+            reference_area=stage_data.get('reference_area', 0.0),
+            drag_coefficient=stage_data.get('drag_coefficient', DEFAULT_CD_TABLE)
         )
         stages.append(stage)
         
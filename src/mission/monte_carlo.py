@@ -0,0 +1,343 @@
+# src/mission/monte_carlo.py
+
+"""
+Monte Carlo dispersion analysis.
+
+Every run simulates the mission with its engines' Isp and thrust and its
+stages' dry and propellant masses scaled by random factors. A factor is
+1 + sigma * z with z drawn from a standard normal distribution truncated at
+TRUNCATION. Run i draws from a generator seeded with (seed, i), so a run's
+variant does not depend on the number of workers or how runs are split.
+
+Runs are reduced as they finish: every worker task folds its runs into a
+DispersionAggregate of streaming statistics (mean, variance, quantile sketches
+of the summary metrics and time-binned envelopes of altitude and velocity), and
+the parent merges the task aggregates in order. No trajectory outlives its run,
+and only a bounded number of tasks is in flight, so memory does not grow with
+the number of runs.
+"""
+
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from mission.mission_loader import load_mission_from_dict
+from mission.trajectory_simulator import DEFAULT_PROFILE, TrajectorySimulator
+from utils.log import get_logger, log, quiet
+from utils.streaming_stats import QuantileSketch, RunningStats, TimeBinnedEnvelope
+
+logger = get_logger('monte_carlo')
+
+# Stage fields a dispersion can scale; Isp and thrust apply to the stage's engines
+DISPERSION_FIELDS = ('isp', 'thrust', 'dry_mass', 'fuel_mass')
+
+# Random factors are drawn within this many standard deviations of 1
+TRUNCATION = 3.0
+
+# Per-run metrics (see SimulationResult.summary) and their reported percentiles
+METRICS = ('max_altitude', 'max_velocity', 'burnout_altitude', 'burnout_velocity', 'total_time')
+PERCENTILES = (1, 5, 50, 95, 99)
+
+# Result columns with time-binned envelopes, and the percentiles of their bands
+ENVELOPE_COLUMNS = ('altitude', 'velocity')
+ENVELOPE_PERCENTILES = (5, 50, 95)
+DEFAULT_BIN_WIDTH = 5.0 # seconds
+
+# Error messages kept from failed runs
+MAX_ERRORS = 10
+
+def parse_dispersion(name):
+    """
+    Splits a dispersion name of the form '<stage_index>.<field>', or '<field>' for all stages.
+    Returns:
+        tuple: (stage_index or None, field).
+    """
+    stage_index, _, field = name.rpartition('.')
+    if field not in DISPERSION_FIELDS or (stage_index and not stage_index.isdigit()):
+        raise ValueError(
+            f"Invalid dispersion '{name}'. Expected '[<stage_index>.]<field>' "
+            f"with field one of {DISPERSION_FIELDS}"
+        )
+    return (int(stage_index) if stage_index else None), field
+
+def expand_dispersions(dispersions, num_stages):
+    """
+    Resolves dispersions into one entry per stage and field. Stage-specific entries
+    override entries for all stages.
+    Args:
+        dispersions (dict): Maps dispersion names to relative 1-sigma values, e.g.
+            {'isp': 0.01, '1.fuel_mass': 0.005}.
+        num_stages (int): Number of stages of the mission.
+    Returns:
+        list: (stage_index, field, sigma) tuples in stage and field order.
+    """
+    sigmas = {}
+    for name, sigma in sorted(dispersions.items(), key=lambda item: '.' in item[0]):
+        stage_index, field = parse_dispersion(name)
+        if sigma < 0:
+            raise ValueError(f"Dispersion '{name}' must not be negative")
+        if stage_index is not None and stage_index >= num_stages:
+            raise ValueError(f"Dispersion '{name}' refers to stage {stage_index}, "
+                             f"but the mission has {num_stages} stages")
+        for index in range(num_stages) if stage_index is None else [stage_index]:
+            sigmas[index, field] = float(sigma)
+    return [(index, field, sigmas[index, field])
+            for index in range(num_stages) for field in DISPERSION_FIELDS
+            if sigmas.get((index, field))]
+
+def sample_factors(expanded, seed, run_index):
+    """
+    Draws the scale factors of one run.
+    Args:
+        expanded (list): Output of expand_dispersions().
+        seed (int): Seed of the analysis.
+        run_index (int): Index of the run.
+    Returns:
+        np.ndarray: One factor per expanded dispersion.
+    """
+    rng = np.random.default_rng([seed, run_index])
+    z = np.clip(rng.standard_normal(len(expanded)), -TRUNCATION, TRUNCATION)
+    return 1.0 + np.array([sigma for _, _, sigma in expanded]) * z
+
+def disperse_stages(stages, expanded, factors):
+    """
+    Scales loaded stages in place by a run's factors.
+    """
+    for (stage_index, field, _), factor in zip(expanded, factors):
+        stage = stages[stage_index]
+        if field in ('isp', 'thrust'):
+            stage.engine.scale_performance(**{field: factor})
+        else:
+            setattr(stage, field, getattr(stage, field) * factor)
+    for stage in stages:
+        stage.total_mass = stage.dry_mass + stage.fuel_mass
+
+class DispersionAggregate:
+    """
+    Streaming statistics of a set of runs. Aggregates of disjoint sets of runs merge.
+    """
+    def __init__(self, bin_width=DEFAULT_BIN_WIDTH):
+        self.runs = 0
+        self.failed = 0
+        self.errors = []
+        self.metrics = RunningStats(len(METRICS))
+        self.sketches = [QuantileSketch() for _ in METRICS]
+        self.envelopes = {column: TimeBinnedEnvelope(bin_width) for column in ENVELOPE_COLUMNS}
+
+    def add(self, result):
+        """
+        Folds in a successful run's SimulationResult.
+        """
+        self.runs += 1
+        summary = result.summary()
+        values = [summary[name] for name in METRICS]
+        self.metrics.update(values)
+        for sketch, value in zip(self.sketches, values):
+            sketch.update(value)
+        for column, envelope in self.envelopes.items():
+            envelope.update(result['time'], result[column])
+
+    def add_failure(self, error):
+        self.runs += 1
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(error)
+
+    def merge(self, other):
+        self.runs += other.runs
+        self.failed += other.failed
+        self.errors.extend(other.errors[:MAX_ERRORS - len(self.errors)])
+        self.metrics.merge(other.metrics)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        for column, envelope in self.envelopes.items():
+            envelope.merge(other.envelopes[column])
+
+class MonteCarloResult:
+    """
+    Summary statistics and envelopes of a dispersion analysis.
+    """
+    def __init__(self, info, metrics, envelopes):
+        """
+        Args:
+            info (dict): Mission name, runs, failed runs, seed, dispersions, profile,
+                bin width, errors and elapsed time.
+            metrics (dict): Maps every metric to its mean, std, min, max and percentiles.
+            envelopes (dict): Maps every envelope column to lists of bin times, counts,
+                mean, std, min, max and band percentiles.
+        """
+        self.info = info
+        self.metrics = metrics
+        self.envelopes = envelopes
+
+    @classmethod
+    def from_aggregate(cls, aggregate, info):
+        quantiles = np.array(PERCENTILES) / 100
+        metrics = {}
+        stats = aggregate.metrics
+        for i, name in enumerate(METRICS):
+            row = {'mean': stats.mean[i], 'std': stats.std[i], 'min': stats.min[i], 'max': stats.max[i]}
+            row.update(zip(_percentile_names(PERCENTILES), aggregate.sketches[i].quantile(quantiles)))
+            metrics[name] = {key: float(value) if stats.count[i] else None for key, value in row.items()}
+
+        envelopes = {}
+        for column, envelope in aggregate.envelopes.items():
+            bands = envelope.quantile(np.array(ENVELOPE_PERCENTILES) / 100)
+            data = {
+                'time': envelope.centers,
+                'count': envelope.stats.count,
+                'mean': envelope.stats.mean,
+                'std': envelope.stats.std,
+                'min': envelope.stats.min,
+                'max': envelope.stats.max,
+            }
+            data.update(zip(_percentile_names(ENVELOPE_PERCENTILES), bands))
+            envelopes[column] = {key: np.asarray(values).tolist() for key, values in data.items()}
+
+        info = dict(info, runs=aggregate.runs, failed=aggregate.failed, errors=aggregate.errors)
+        return cls(info, metrics, envelopes)
+
+    def summary_frame(self):
+        """
+        Returns a DataFrame with one row of statistics per metric.
+        """
+        import pandas as pd
+        return pd.DataFrame.from_dict(self.metrics, orient='index')
+
+    def envelope_frame(self, column):
+        """
+        Returns a DataFrame with one row of statistics per time bin of an envelope column.
+        """
+        import pandas as pd
+        return pd.DataFrame(self.envelopes[column])
+
+    def to_dict(self):
+        return {'info': self.info, 'metrics': self.metrics, 'envelopes': self.envelopes}
+
+    def save(self, path):
+        """
+        Writes the result as JSON (NaN statistics become null).
+        """
+        with open(path, 'w') as f:
+            json.dump(_json_safe(self.to_dict()), f, indent=2)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['info'], data['metrics'], data['envelopes'])
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a result written by save().
+        """
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+def _percentile_names(percentiles):
+    return [f"p{p:g}" for p in percentiles]
+
+def _json_safe(data):
+    """
+    Replaces non-finite floats with None, which strict JSON readers require.
+    """
+    if isinstance(data, dict):
+        return {key: _json_safe(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_json_safe(value) for value in data]
+    if isinstance(data, float) and not math.isfinite(data):
+        return None
+    return data
+
+def _run_chunk(mission_data, expanded, seed, start, stop, profile=None, bin_width=DEFAULT_BIN_WIDTH):
+    """
+    Simulates runs start..stop-1 inside a worker process.
+    Returns:
+        DispersionAggregate: The statistics of the runs.
+    """
+    aggregate = DispersionAggregate(bin_width)
+    for run_index in range(start, stop):
+        try:
+            with quiet():
+                stages = load_mission_from_dict(mission_data)
+                disperse_stages(stages, expanded, sample_factors(expanded, seed, run_index))
+                result = TrajectorySimulator(stages, profile or DEFAULT_PROFILE).simulate()
+        except Exception as e:
+            aggregate.add_failure(f"run {run_index}: {type(e).__name__}: {e}")
+        else:
+            aggregate.add(result)
+    return aggregate
+
+def run_monte_carlo(mission, dispersions, runs, seed=None, max_workers=None, chunk_size=None,
+                    profile=None, bin_width=DEFAULT_BIN_WIDTH, progress=None):
+    """
+    Runs a Monte Carlo dispersion analysis of a mission in a pool of worker processes.
+    Args:
+        mission (str or dict): Path to a mission JSON file, or parsed mission data.
+        dispersions (dict): Maps '[<stage_index>.]<field>' names to relative 1-sigma
+            values, e.g. {'isp': 0.01} for 1% Isp dispersion on every stage.
+        runs (int): Number of runs.
+        seed (int, optional): Seed for reproducible runs. A random one is drawn
+            (and reported in the result) if omitted.
+        max_workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        chunk_size (int, optional): Runs per task. Defaults to an even split into
+            about four tasks per worker, at most 100 runs each.
+        profile (str, optional): Solver profile name. Defaults to the simulator's default.
+        bin_width (float): Width of the envelope time bins in seconds.
+        progress (callable, optional): Called with (finished runs, runs) after every task.
+    Returns:
+        MonteCarloResult: Metric statistics and envelopes; failed runs are counted
+            in its info and excluded from the statistics.
+    """
+    if isinstance(mission, str):
+        with open(mission, 'r') as f:
+            mission = json.load(f)
+    if runs < 1:
+        raise ValueError("runs must be at least 1")
+    expanded = expand_dispersions(dispersions, len(mission['stages']))
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2**32)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = min(100, max(1, -(-runs // (4 * max_workers))))
+    starts = range(0, runs, chunk_size)
+
+    log(logger, f"Running {runs} dispersed runs of '{mission['name']}' in {len(starts)} tasks "
+        f"on {max_workers} workers (seed {seed})",
+        event='monte_carlo_start', runs=runs, tasks=len(starts), workers=max_workers, seed=seed)
+
+    start_time = time.perf_counter()
+    aggregate = DispersionAggregate(bin_width)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Tasks are merged in submission order, with a bounded number in flight
+        pending = deque()
+        for start in starts:
+            pending.append(executor.submit(_run_chunk, mission, expanded, seed, start,
+                                           min(start + chunk_size, runs), profile, bin_width))
+            if len(pending) >= 2 * max_workers:
+                _merge_task(aggregate, pending.popleft(), progress, runs)
+        while pending:
+            _merge_task(aggregate, pending.popleft(), progress, runs)
+    elapsed = time.perf_counter() - start_time
+
+    log(logger, f"Monte Carlo complete: {aggregate.runs - aggregate.failed} succeeded, "
+        f"{aggregate.failed} failed in {elapsed:.1f}s",
+        event='monte_carlo_complete', succeeded=aggregate.runs - aggregate.failed,
+        failed=aggregate.failed, elapsed=elapsed)
+    return MonteCarloResult.from_aggregate(aggregate, {
+        'mission': mission['name'],
+        'seed': seed,
+        'dispersions': dict(dispersions),
+        'profile': profile or DEFAULT_PROFILE,
+        'bin_width': bin_width,
+        'elapsed': elapsed,
+    })
+
+def _merge_task(aggregate, future, progress, runs):
+    aggregate.merge(future.result())
+    if progress is not None:
+        progress(aggregate.runs, runs)
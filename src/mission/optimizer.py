@@ -0,0 +1,347 @@
+# src/mission/optimizer.py
+
+"""
+Staging and propellant-allocation optimizer.
+
+Searches stage parameters ('<stage_index>.<field>', as in parameter sweeps) for
+the best value of an objective metric under constraints, e.g. the largest upper
+stage dry mass (payload) that still reaches a burnout velocity within a liftoff
+mass cap. The search is scipy's differential evolution. Every generation is
+simulated in parallel in a pool of worker processes, and candidates are snapped
+to a grid and memoized, so a candidate that comes up again is not re-simulated.
+"""
+
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import differential_evolution
+from mission.sweep import SUMMARY_METRICS, SWEEP_FIELDS, _run_chunk, apply_point, parse_parameter
+from utils.log import get_logger, log
+
+logger = get_logger('optimizer')
+
+# Metrics computed from the mission data alone, without simulating
+STATIC_METRICS = ('liftoff_mass', 'propellant_mass')
+
+# Constraint operators
+CONSTRAINT_OPERATORS = ('>=', '<=')
+
+# Grid spacing of continuous variables (kg for the mass fields). Candidates are
+# snapped to it so that nearby candidates share one simulation.
+DEFAULT_RESOLUTION = 1.0
+
+DEFAULT_POPULATION_SIZE = 15
+DEFAULT_MAX_ITERATIONS = 40
+
+# Scores of infeasible and failed candidates. Any feasible candidate beats an
+# infeasible one, and among infeasible ones the smaller violation wins.
+INFEASIBLE_SCORE = 1e12
+FAILED_SCORE = 1e15
+
+def static_metrics(mission_data):
+    """
+    Returns the metrics that follow from the mission data: liftoff and propellant
+    mass, and every stage parameter under its '<stage_index>.<field>' name.
+    """
+    stages = mission_data['stages']
+    metrics = {
+        'liftoff_mass': float(sum(stage['dry_mass'] + stage['fuel_mass'] for stage in stages)),
+        'propellant_mass': float(sum(stage['fuel_mass'] for stage in stages)),
+    }
+    for i, stage in enumerate(stages):
+        for field in SWEEP_FIELDS:
+            metrics[f"{i}.{field}"] = float(stage[field])
+    return metrics
+
+def check_metric(name):
+    """
+    Validates an objective or constraint metric name.
+    Returns:
+        bool: True if the metric needs a simulation, False if it is static.
+    """
+    if name in SUMMARY_METRICS:
+        return True
+    if name not in STATIC_METRICS:
+        try:
+            parse_parameter(name)
+        except ValueError:
+            raise ValueError(
+                f"Unknown metric '{name}'. Expected one of {SUMMARY_METRICS + STATIC_METRICS} "
+                f"or a stage parameter '<stage_index>.<field>'"
+            ) from None
+    return False
+
+def parse_bounds(spec):
+    """
+    Parses a command-line variable range 'low:high'.
+    Returns:
+        tuple: (low, high).
+    """
+    low, sep, high = spec.partition(':')
+    if not sep:
+        raise ValueError(f"Invalid range '{spec}'. Expected '<low>:<high>'")
+    low, high = float(low), float(high)
+    if not low < high:
+        raise ValueError(f"Invalid range '{spec}': the lower bound must be below the upper bound")
+    return low, high
+
+def parse_constraint(spec):
+    """
+    Parses a constraint of the form '<metric>>=<value>' or '<metric><=<value>'.
+    Returns:
+        tuple: (metric, operator, value).
+    """
+    for operator in CONSTRAINT_OPERATORS:
+        metric, sep, value = spec.partition(operator)
+        if sep:
+            metric = metric.strip()
+            check_metric(metric)
+            return metric, operator, float(value)
+    raise ValueError(f"Invalid constraint '{spec}'. Expected '<metric>>=<value>' or '<metric><=<value>'")
+
+def violation(metrics, constraints):
+    """
+    Returns the total constraint violation, each relative to its limit (0 if feasible).
+    Constraints on metrics that were not computed (a candidate that was not
+    simulated) are left out.
+    """
+    total = 0.0
+    for metric, operator, limit in constraints:
+        if metric not in metrics:
+            continue
+        excess = limit - metrics[metric] if operator == '>=' else metrics[metric] - limit
+        total += max(excess, 0.0) / max(abs(limit), 1.0)
+    return total
+
+class OptimizationResult:
+    """
+    Outcome of an optimization run.
+    """
+    def __init__(self, mission, point, metrics, feasible, history, simulations, message):
+        # The base mission with the best point applied
+        self.mission = mission
+        self.point = point
+        # Static and simulated metrics of the best point
+        self.metrics = metrics
+        # False if no candidate met every constraint; the point then violates them least
+        self.feasible = feasible
+        # pd.DataFrame with one row per generation
+        self.history = history
+        self.simulations = simulations
+        self.message = message
+
+    def save_mission(self, path):
+        """
+        Writes the optimized mission as JSON.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.mission, f, indent=2)
+
+class _CandidateEvaluator:
+    """
+    Scores candidates, simulating each distinct one once in a process pool.
+    """
+    def __init__(self, mission_data, variables, objective, maximize, constraints,
+                 resolution, executor, max_workers, use_cache, profile):
+        self.mission_data = mission_data
+        self.names = list(variables)
+        self.bounds = [variables[name] for name in self.names]
+        self.integral = [parse_parameter(name)[1] == 'num_engines' for name in self.names]
+        self.objective = objective
+        self.sign = -1.0 if maximize else 1.0
+        self.constraints = constraints
+        self.static_constraints = [c for c in constraints if not check_metric(c[0])]
+        self.needs_simulation = check_metric(objective) or len(self.static_constraints) < len(constraints)
+        self.resolution = resolution
+        self.executor = executor
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+        self.profile = profile
+
+        # Snapped candidate -> (metrics, error)
+        self.memo = {}
+        self.simulations = 0
+        self.history = []
+        self.best = None # (score, key)
+
+    def snap(self, x):
+        """
+        Rounds a candidate to the variable grid and returns it as a hashable key.
+        """
+        key = []
+        for value, (low, high), integral in zip(x, self.bounds, self.integral):
+            if integral:
+                value = int(round(value))
+            else:
+                value = low + round((value - low) / self.resolution) * self.resolution
+            key.append(min(max(value, low), high))
+        return tuple(key)
+
+    def point(self, key):
+        return dict(zip(self.names, key))
+
+    def score(self, x):
+        """
+        Returns the minimized score of an evaluated candidate.
+        """
+        metrics, error = self.memo[self.snap(x)]
+        if error is not None:
+            return FAILED_SCORE
+        excess = violation(metrics, self.constraints)
+        if excess > 0:
+            return INFEASIBLE_SCORE * (1 + excess)
+        return self.sign * metrics[self.objective]
+
+    def map(self, func, candidates):
+        """
+        Map-like callable for differential_evolution's `workers`: simulates the new
+        candidates of a generation in parallel, then scores all of them with `func`.
+        """
+        candidates = list(candidates)
+        keys = [self.snap(x) for x in candidates]
+        pending = {}
+        new = skipped = 0
+        for key in keys:
+            if key in self.memo or key in pending:
+                continue
+            new += 1
+            metrics = static_metrics(apply_point(self.mission_data, self.point(key)))
+            if not self.needs_simulation:
+                self.memo[key] = (metrics, None)
+            elif violation(metrics, self.static_constraints) > 0:
+                # Simulating cannot make this candidate feasible
+                self.memo[key] = (metrics, None)
+                skipped += 1
+            else:
+                pending[key] = metrics
+
+        self._simulate(pending)
+        scores = [func(x) for x in candidates]
+
+        for key, score in zip(keys, scores):
+            if self.best is None or score < self.best[0]:
+                self.best = (score, key)
+        best_score, best_key = self.best
+        best_metrics, _ = self.memo[best_key]
+        feasible = best_score < INFEASIBLE_SCORE
+        record = {
+            'generation': len(self.history),
+            'candidates': len(candidates),
+            'simulations': len(pending),
+            'memo_hits': len(candidates) - new,
+            'skipped': skipped,
+            'feasible_candidates': sum(score < INFEASIBLE_SCORE for score in scores),
+            'best_objective': best_metrics.get(self.objective, np.nan) if feasible else np.nan,
+            'best_violation': violation(best_metrics, self.constraints),
+        }
+        record.update(self.point(best_key))
+        self.history.append(record)
+        log(logger, f"Generation {record['generation']}: best {self.objective} = "
+            f"{record['best_objective']:.6g} ({len(pending)} simulated, {record['memo_hits']} memoized)",
+            event='generation', **{k: v for k, v in record.items() if k not in self.names})
+        return scores
+
+    def _simulate(self, pending):
+        """
+        Simulates candidates in the pool and stores their metrics in the memo.
+        """
+        if not pending:
+            return
+        indexed = [(key, self.point(key)) for key in pending]
+        chunk_size = max(1, -(-len(indexed) // self.max_workers))
+        chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+        futures = [self.executor.submit(_run_chunk, self.mission_data, chunk, self.use_cache, self.profile)
+                   for chunk in chunks]
+        for future, chunk in zip(futures, chunks):
+            try:
+                chunk_rows = future.result()
+            except Exception as e:
+                # The worker itself died; mark every candidate of the task as failed
+                chunk_rows = [(key, None, f"{type(e).__name__}: {e}") for key, _ in chunk]
+            for key, metrics, error in chunk_rows:
+                self.memo[key] = (dict(pending[key], **(metrics or {})), error)
+        self.simulations += len(pending)
+
+def run_optimization(mission, variables, objective, maximize=True, constraints=(),
+                     resolution=DEFAULT_RESOLUTION, population_size=DEFAULT_POPULATION_SIZE,
+                     max_iterations=DEFAULT_MAX_ITERATIONS, seed=None, max_workers=None,
+                     use_cache=True, profile=None):
+    """
+    Optimizes stage parameters of a mission with differential evolution.
+    Args:
+        mission (str or dict): Path to a mission JSON file, or parsed mission data.
+        variables (dict): Maps parameter names ('<stage_index>.<field>') to
+            (low, high) bounds. 'num_engines' variables take integer values.
+        objective (str): Metric to optimize: a summary metric (e.g. 'burnout_velocity'),
+            'liftoff_mass', 'propellant_mass' or a stage parameter (e.g. '1.dry_mass').
+        maximize (bool): Maximize the objective instead of minimizing it.
+        constraints (list): (metric, operator, value) tuples or '<metric>>=<value>'
+            strings, with operator '>=' or '<='.
+        resolution (float): Grid spacing of continuous variables.
+        population_size (int): Candidates per generation, as a multiple of the
+            number of variables.
+        max_iterations (int): Maximum number of generations.
+        seed (int, optional): Random seed, for reproducible runs.
+        max_workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        use_cache (bool): Reuse and store candidate results in the shared result cache.
+        profile (str, optional): Solver profile name.
+    Returns:
+        OptimizationResult: The best candidate, the optimized mission and the
+            convergence history.
+    """
+    import pandas as pd
+
+    if isinstance(mission, str):
+        with open(mission, 'r') as f:
+            mission = json.load(f)
+    if not variables:
+        raise ValueError("At least one variable is required")
+    for name, (low, high) in variables.items():
+        stage_index, _ = parse_parameter(name)
+        if stage_index >= len(mission['stages']):
+            raise ValueError(f"Variable '{name}' refers to a stage the mission does not have")
+        if not low < high:
+            raise ValueError(f"Invalid bounds for '{name}': the lower bound must be below the upper bound")
+    check_metric(objective)
+    constraints = [parse_constraint(c) if isinstance(c, str) else tuple(c) for c in constraints]
+    for metric, operator, _ in constraints:
+        check_metric(metric)
+        if operator not in CONSTRAINT_OPERATORS:
+            raise ValueError(f"Invalid constraint operator '{operator}'")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    log(logger, f"Optimizing {len(variables)} variables on {max_workers} workers",
+        event='optimization_start', variables=list(variables), objective=objective,
+        workers=max_workers)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        evaluator = _CandidateEvaluator(mission, variables, objective, maximize, constraints,
+                                        resolution, executor, max_workers, use_cache, profile)
+        solution = differential_evolution(
+            evaluator.score,
+            evaluator.bounds,
+            popsize=population_size,
+            maxiter=max_iterations,
+            seed=seed,
+            polish=False, # Gradient polishing would simulate serially and ignore the grid
+            integrality=evaluator.integral,
+            updating='deferred',
+            workers=evaluator.map,
+        )
+
+    best_score, best_key = evaluator.best
+    point = evaluator.point(best_key)
+    metrics, _ = evaluator.memo[best_key]
+    feasible = best_score < INFEASIBLE_SCORE
+    log(logger, f"Optimization complete after {evaluator.simulations} simulations: "
+        f"{objective} = {metrics.get(objective, math.nan):.6g}"
+        + ("" if feasible else " (no feasible candidate found)"),
+        event='optimization_complete', simulations=evaluator.simulations, feasible=feasible,
+        status=solution.message)
+
+    history = pd.DataFrame.from_records(evaluator.history)
+    return OptimizationResult(apply_point(mission, point), point, metrics, feasible, history,
+                              evaluator.simulations, solution.message)
@@ -0,0 +1,309 @@
+# src/mission/recorder.py
+
+"""
+Bounded-memory recording of long trajectories.
+
+simulate() keeps every sample, so memory grows with flight time. A
+TrajectoryRecorder instead takes the chunks of iter_simulate() one at a time:
+
+1. Decimation picks the rows to keep. Policies can be combined; a row is kept
+   if any policy keeps it, and the first and last rows are always kept.
+       IntervalDecimation   the first row of every fixed time interval
+       EventDecimation      the rows at flight events and stage changes
+       ToleranceDecimation  only the rows needed so that linear interpolation
+                            between kept rows stays within a tolerance of every
+                            dropped row (swinging door compression)
+2. Kept rows go to a preallocated ring buffer of the most recent rows.
+3. With a spill file, every full block of the ring is appended to it as raw
+   records, and the file's events go to a JSON sidecar. load_recording()
+   memory-maps the file back as a SimulationResult.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+from mission.simulation_result import COLUMNS, SimulationResult
+
+# Row layout of the ring buffer and of spill files
+RECORD_DTYPE = np.dtype([(name, dtype) for name, dtype in COLUMNS])
+
+DEFAULT_BUFFER_SIZE = 65536 # rows
+
+# Flight time per simulated chunk when recording. It also bounds the dense
+# output that the solver holds for a segment.
+RECORD_CHUNK_DURATION = 600.0 # seconds
+
+# Bump when the spill file layout changes
+RECORDING_VERSION = 1
+
+def _sidecar_path(path):
+    return f"{path}.json"
+
+class IntervalDecimation:
+    """
+    Keeps the first row of every `interval` seconds of flight time.
+    """
+    def __init__(self, interval):
+        if interval <= 0:
+            raise ValueError("The decimation interval must be positive")
+        self.interval = interval
+        self._last_bin = None
+
+    def select(self, chunk):
+        bins = np.floor(chunk['time'] / self.interval)
+        previous = np.concatenate(([self._last_bin if self._last_bin is not None else np.nan], bins[:-1]))
+        self._last_bin = bins[-1]
+        return np.flatnonzero(bins != previous)
+
+class EventDecimation:
+    """
+    Keeps the rows nearest to the chunk's flight events, and the rows on both
+    sides of every stage change.
+    """
+    def __init__(self):
+        self._last_stage = None
+
+    def select(self, chunk):
+        time, stage = chunk['time'], chunk['stage']
+        keep = []
+        for event in chunk.events:
+            index = int(np.searchsorted(time, event['time']))
+            if index == len(time) or (index > 0 and event['time'] - time[index - 1] < time[index] - event['time']):
+                index -= 1
+            keep.append(index)
+        previous = np.concatenate(([self._last_stage if self._last_stage is not None else stage[0]], stage[:-1]))
+        changes = np.flatnonzero(stage != previous)
+        self._last_stage = stage[-1]
+        # -1 is the previous chunk's last row
+        return np.union1d(np.array(keep, dtype=np.intp), np.concatenate((changes - 1, changes)))
+
+class ToleranceDecimation:
+    """
+    Swinging door compression. Keeps a row only when the straight line from the
+    last kept row to the next one would pass farther than the tolerance from some
+    row in between, so linear interpolation between kept rows reproduces every
+    dropped row within the tolerances.
+    """
+    def __init__(self, tolerances):
+        """
+        Args:
+            tolerances (dict): Maps column names to absolute tolerances in the
+                column's unit, e.g. {'altitude': 0.01, 'velocity': 0.5}.
+        """
+        if not tolerances or any(tolerance <= 0 for tolerance in tolerances.values()):
+            raise ValueError("Tolerance decimation needs positive tolerances")
+        unknown = set(tolerances) - set(RECORD_DTYPE.names)
+        if unknown:
+            raise ValueError(f"Unknown columns for tolerance decimation: {', '.join(sorted(unknown))}")
+        self.tolerances = dict(tolerances)
+        self._anchor = None
+        self._previous = None
+        self._upper = self._lower = None
+
+    def _restart(self, t, values):
+        self._anchor = (t, values)
+        self._upper = [math.inf] * len(values)
+        self._lower = [-math.inf] * len(values)
+
+    def _fits(self, t, values):
+        """
+        Whether the line from the anchor to a row passes within tolerance of every
+        row since the anchor. The row then narrows the slopes allowed for the next.
+        """
+        anchor_time, anchor_values = self._anchor
+        dt = t - anchor_time
+        if dt <= 0:
+            return all(abs(value - anchor) <= tolerance for value, anchor, tolerance
+                       in zip(values, anchor_values, self.tolerances.values()))
+        fits = True
+        for j, tolerance in enumerate(self.tolerances.values()):
+            offset = values[j] - anchor_values[j]
+            fits = fits and self._lower[j] <= offset / dt <= self._upper[j]
+            self._upper[j] = min(self._upper[j], (offset + tolerance) / dt)
+            self._lower[j] = max(self._lower[j], (offset - tolerance) / dt)
+        return fits
+
+    def select(self, chunk):
+        time = chunk['time'].tolist()
+        columns = [chunk[name].tolist() for name in self.tolerances]
+        keep = []
+        for i, t in enumerate(time):
+            values = [column[i] for column in columns]
+            if self._anchor is None:
+                keep.append(i)
+                self._restart(t, values)
+            elif not self._fits(t, values):
+                # The previous row (-1: the previous chunk's last) becomes the new anchor
+                keep.append(i - 1)
+                self._restart(*self._previous)
+                self._fits(t, values)
+            self._previous = (t, values)
+        return np.array(keep, dtype=int)
+
+class TrajectoryRecorder:
+    """
+    Decimates trajectory chunks into a ring buffer of recent rows, optionally
+    spilling every full block of rows to an append-only file.
+    """
+    def __init__(self, decimation=(), buffer_size=DEFAULT_BUFFER_SIZE, block_size=None, spill_path=None):
+        """
+        Args:
+            decimation (policy or list): Decimation policies; none keeps every row.
+            buffer_size (int): Rows held in memory.
+            block_size (int, optional): Rows per spill; at most half the buffer.
+                Defaults to a quarter of the buffer.
+            spill_path (str, optional): Append-only file receiving every kept row.
+                Without one, only the latest `buffer_size` rows are retained.
+        """
+        if not isinstance(decimation, (list, tuple)):
+            decimation = [decimation]
+        block_size = block_size or max(1, buffer_size // 4)
+        if block_size > buffer_size // 2:
+            raise ValueError("block_size must be at most half of buffer_size")
+        self.decimation = list(decimation)
+        self.block_size = block_size
+        self.spill_path = spill_path
+        self.events = []
+        # Rows seen in chunks and rows kept by decimation
+        self.rows_seen = 0
+        self.rows_recorded = 0
+        self._ring = np.empty(buffer_size, dtype=RECORD_DTYPE)
+        self._spilled = 0
+        self._last_row = None
+        self._last_row_kept = False
+        self._file = None
+        if spill_path is not None:
+            self._file = open(spill_path, 'wb')
+            self._write_sidecar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def buffer_size(self):
+        return len(self._ring)
+
+    def record(self, chunk):
+        """
+        Decimates a chunk (a SimulationResult from iter_simulate) and records the kept rows.
+        """
+        self.events.extend(chunk.events)
+        if not chunk.num_samples:
+            return
+        rows = chunk.to_numpy()
+        if self.decimation:
+            keep = np.unique(np.concatenate([policy.select(chunk) for policy in self.decimation]))
+        else:
+            keep = np.arange(len(rows))
+        if self.rows_seen == 0:
+            keep = np.union1d([0], keep)
+        # Empty selections from any policy must still index as integers
+        keep = keep.astype(np.intp, copy=False)
+
+        if len(keep) and keep[0] == -1:
+            if not self._last_row_kept:
+                self._push(self._last_row)
+            keep = keep[1:]
+        self._push(rows[keep])
+        self.rows_seen += len(rows)
+        self._last_row = rows[-1:]
+        self._last_row_kept = bool(len(keep)) and keep[-1] == len(rows) - 1
+
+    def recent(self):
+        """
+        Returns a copy of the rows in the ring buffer, oldest first.
+        """
+        count = min(self.rows_recorded, self.buffer_size)
+        start = self.rows_recorded % self.buffer_size if count == self.buffer_size else 0
+        table = np.concatenate((self._ring[start:], self._ring[:start]))[:count]
+        return SimulationResult.from_columns({name: table[name] for name in table.dtype.names}, self.events)
+
+    def close(self):
+        """
+        Records the final row if decimation dropped it, and completes the spill file.
+        """
+        if self._last_row is not None and not self._last_row_kept:
+            self._push(self._last_row)
+            self._last_row_kept = True
+        if self._file is not None:
+            self._spill()
+            self._file.close()
+            self._file = None
+            self._write_sidecar()
+
+    def result(self):
+        """
+        Returns the recording: the memory-mapped spill file if there is one,
+        otherwise the rows in the ring buffer. Call after close().
+        """
+        if self.spill_path is not None:
+            return load_recording(self.spill_path)
+        return self.recent()
+
+    def _push(self, rows):
+        """
+        Appends rows to the ring, spilling full blocks before they can be overwritten.
+        """
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start:start + self.block_size]
+            position = self.rows_recorded % self.buffer_size
+            head = min(len(block), self.buffer_size - position)
+            self._ring[position:position + head] = block[:head]
+            self._ring[:len(block) - head] = block[head:]
+            self.rows_recorded += len(block)
+            if self._file is not None and self.rows_recorded - self._spilled >= self.block_size:
+                self._spill()
+
+    def _spill(self):
+        """
+        Appends the rows recorded since the last spill to the spill file.
+        """
+        start = self._spilled % self.buffer_size
+        end = start + self.rows_recorded - self._spilled
+        self._file.write(self._ring[start:min(end, self.buffer_size)].tobytes())
+        if end > self.buffer_size:
+            self._file.write(self._ring[:end - self.buffer_size].tobytes())
+        self._file.flush()
+        self._spilled = self.rows_recorded
+
+    def _write_sidecar(self):
+        with open(_sidecar_path(self.spill_path), 'w') as f:
+            json.dump({
+                'version': RECORDING_VERSION,
+                'dtype': [[name, np.dtype(dtype).str] for name, dtype in COLUMNS],
+                'rows_seen': self.rows_seen,
+                'rows_recorded': self.rows_recorded,
+                'events': self.events,
+            }, f, default=float)
+
+def load_recording(path):
+    """
+    Memory-maps a spill file written by a TrajectoryRecorder.
+    The rows written so far are readable while the recording is still running;
+    its events are only complete once the recorder is closed.
+    Args:
+        path (str): The spill file.
+    Returns:
+        SimulationResult: A result whose columns are views of the mapped file.
+    """
+    rows = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    if rows:
+        table = np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(rows,))
+    else:
+        table = np.empty(0, dtype=RECORD_DTYPE)
+    events = []
+    try:
+        with open(_sidecar_path(path), 'r') as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        pass
+    else:
+        if sidecar.get('version') != RECORDING_VERSION:
+            raise ValueError(f"'{path}' was recorded in an unsupported layout")
+        events = sidecar['events']
+    return SimulationResult.from_columns({name: table[name] for name in RECORD_DTYPE.names}, events)
@@ -0,0 +1,246 @@
+# src/mission/result_cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from engines.base_engine import get_engine_class, load_engine_config
+from mission.result_io import load_result, save_result
+from mission.solver_profiles import DEFAULT_PROFILE, get_solver_profile
+
+# Bump when a change to the physics or result layout invalidates stored results
+CACHE_VERSION = 5
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'STELLARLAB_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'stellarlab', 'results')
+)
+DEFAULT_MEMORY_ENTRIES = 32
+DEFAULT_DISK_BYTES = 512 * 1024**2
+
+def resolve_mission(mission_data):
+    """
+    Returns the mission with every engine config path replaced by the config's
+    contents, including the files the config refers to (see RocketEngine.resolve_config).
+    Args:
+        mission_data (dict): Mission profile in the mission JSON layout.
+    Returns:
+        dict: The resolved mission.
+    """
+    resolved = {'name': mission_data.get('name'), 'stages': []}
+    for stage_data in mission_data['stages']:
+        stage = dict(stage_data)
+        config = load_engine_config(stage['engine_config'])
+        stage['engine_config'] = get_engine_class(config['type']).resolve_config(config)
+        resolved['stages'].append(stage)
+    return resolved
+
+def mission_cache_key(mission_data, profile=None):
+    """
+    Computes a content hash of a mission, its engine configs and the solver settings.
+    Args:
+        mission_data (dict): Mission profile in the mission JSON layout.
+        profile (str or dict, optional): Solver profile name or settings.
+            Defaults to the simulator's default profile.
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    payload = {
+        'version': CACHE_VERSION,
+        'mission': resolve_mission(mission_data),
+        'solver': get_solver_profile(profile or DEFAULT_PROFILE),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """
+    Two-tier cache of simulation results keyed by mission content hash.
+
+    The memory tier is a bounded LRU of SimulationResult objects. The disk tier
+    stores one .npz file per key and evicts the least recently used files once
+    the directory grows past its size budget. Cached results are shared between
+    callers and should be treated as read-only.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MEMORY_ENTRIES,
+                 max_disk_bytes=DEFAULT_DISK_BYTES):
+        """
+        Initializes the cache.
+        Args:
+            cache_dir (str, optional): Directory of the disk tier. None disables it.
+            max_entries (int): Maximum number of results held in memory.
+            max_disk_bytes (int): Size budget of the disk tier in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        """
+        Hit/miss counters and the current tier sizes.
+        """
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+        }
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key):
+        """
+        Looks up a result, promoting disk hits into memory.
+        Returns:
+            SimulationResult or None: The cached result, or None on a miss.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+        result = self._load(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        """
+        Stores a result in both tiers.
+        """
+        with self._lock:
+            self._remember(key, result)
+        self._store(key, result)
+
+    def get_or_simulate(self, mission_data, simulate=None, profile=None):
+        """
+        Returns the cached result for a mission, simulating and storing it on a miss.
+        Args:
+            mission_data (dict): Mission profile in the mission JSON layout.
+            simulate (callable, optional): Maps (mission data, profile) to a
+                SimulationResult. Defaults to running TrajectorySimulator.
+            profile (str or dict, optional): Solver profile name or settings.
+        Returns:
+            tuple: (SimulationResult, bool) where the flag is True on a cache hit.
+        """
+        key = mission_cache_key(mission_data, profile)
+        result = self.get(key)
+        if result is not None:
+            return result, True
+
+        if simulate is None:
+            simulate = _simulate_mission
+        result = simulate(mission_data, profile)
+        self.put(key, result)
+        return result, False
+
+    def clear(self):
+        """
+        Empties the memory tier and deletes every file of the disk tier.
+        """
+        with self._lock:
+            self._memory.clear()
+        for path in self._disk_entries():
+            _remove_quietly(path)
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            result = self._read(path)
+            os.utime(path) # Mark as recently used for eviction
+        except (OSError, ValueError, KeyError):
+            return None
+        return result
+
+    def _store(self, key, result):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary file and rename so concurrent readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self._write(f, result)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            _remove_quietly(tmp_path)
+            return
+        self._evict()
+
+    def _read(self, path):
+        """
+        Reads a disk entry. Subclasses storing other kinds of entries override
+        this together with _write.
+        """
+        return load_result(path, 'npz')
+
+    def _write(self, f, result):
+        save_result(result, f, 'npz')
+
+    def _disk_entries(self):
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return []
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                if name.endswith('.npz')]
+
+    def _evict(self):
+        entries = []
+        for path in self._disk_entries():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            _remove_quietly(path)
+            total -= size
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _simulate_mission(mission_data, profile=None):
+    from mission.mission_loader import load_mission_from_dict
+    from mission.trajectory_simulator import DEFAULT_PROFILE, TrajectorySimulator
+    stages = load_mission_from_dict(mission_data)
+    return TrajectorySimulator(stages, profile or DEFAULT_PROFILE).simulate()
+
+_default_cache = None
+
+def get_default_cache():
+    """
+    Returns the process-wide cache shared by the CLI, the app and the sweep runner.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
@@ -0,0 +1,145 @@
+# src/mission/result_io.py
+
+"""
+Binary export and reload of simulation results.
+
+Supported formats, chosen by file extension or the `file_format` argument:
+    npz      One .npz archive with a member per column. Compact, loaded into memory.
+    npy      A directory with one raw .npy file per column. Memory-mapped on load.
+    arrow    An Arrow IPC (Feather v2) file. Memory-mapped on load.
+    parquet  A Parquet file, for exchange with other tools. Decoded on load.
+    csv      Plain text, export only.
+Every binary format stores the result's events with the columns. Arrow and
+Parquet need the optional pyarrow package.
+"""
+
+import json
+import os
+import numpy as np
+from mission.simulation_result import COLUMNS, SimulationResult
+
+EXTENSIONS = {
+    '.npz': 'npz',
+    '.npy': 'npy',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.parquet': 'parquet',
+    '.csv': 'csv',
+}
+FORMATS = ('npz', 'npy', 'arrow', 'parquet', 'csv')
+
+# Name of the events member in every format
+EVENTS_KEY = 'events'
+
+def result_format(path, file_format=None):
+    """
+    Returns the format of a result file from an explicit name or the path's extension.
+    """
+    if file_format is None:
+        extension = os.path.splitext(str(path).rstrip('/\\'))[1].lower()
+        file_format = EXTENSIONS.get(extension)
+        if file_format is None and os.path.isdir(path):
+            file_format = 'npy'
+    if file_format not in FORMATS:
+        raise ValueError(
+            f"Cannot tell the result format of '{path}'. Use one of the extensions "
+            f"{sorted(EXTENSIONS)} or pass one of {list(FORMATS)}"
+        )
+    return file_format
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Arrow and Parquet export need the pyarrow package: pip install pyarrow") from None
+    return pyarrow
+
+def _events_json(result):
+    return json.dumps(getattr(result, 'events', []), default=float)
+
+def save_result(result, path, file_format=None, compress=False):
+    """
+    Writes a simulation result in a binary columnar format (or CSV).
+    Args:
+        result (SimulationResult): The result to write.
+        path (str or file-like): Destination. File objects are accepted by every
+            format except 'npy', which writes a directory.
+        file_format (str, optional): One of FORMATS. Inferred from the path if omitted.
+        compress (bool): Compress the 'npz', 'arrow' and 'parquet' formats. The
+            'arrow' format can no longer be memory-mapped when compressed.
+    """
+    file_format = result_format(path, file_format)
+    columns = {name: np.asarray(result[name]) for name, _ in COLUMNS}
+
+    if file_format == 'npz':
+        save = np.savez_compressed if compress else np.savez
+        save(path, **{EVENTS_KEY: _events_json(result)}, **columns)
+    elif file_format == 'npy':
+        os.makedirs(path, exist_ok=True)
+        for name, values in columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), values)
+        with open(os.path.join(path, f"{EVENTS_KEY}.json"), 'w') as f:
+            f.write(_events_json(result))
+    elif file_format == 'csv':
+        result.to_csv(path)
+    else:
+        pa = _import_pyarrow()
+        table = pa.table(columns).replace_schema_metadata({EVENTS_KEY: _events_json(result)})
+        if file_format == 'arrow':
+            pa.feather.write_feather(table, path, compression='zstd' if compress else 'uncompressed')
+        else:
+            pa.parquet.write_table(table, path, compression='zstd' if compress else 'none')
+
+def result_to_bytes(result, file_format, compress=False):
+    """
+    Returns a result encoded in a single-file format, e.g. for a download button.
+    """
+    if file_format == 'csv':
+        return result.to_csv().encode('utf-8')
+    if file_format == 'npy':
+        raise ValueError("The 'npy' format is a directory and cannot be encoded as bytes")
+    import io
+    buffer = io.BytesIO()
+    save_result(result, buffer, file_format, compress)
+    return buffer.getvalue()
+
+def load_result(path, file_format=None, mmap=True):
+    """
+    Reads a result written by save_result.
+
+    With `mmap`, the 'npy' and uncompressed 'arrow' formats are memory-mapped and the
+    returned columns are read-only views of the file, so only the pages that are
+    touched are read from disk. Appending to such a result copies it into memory.
+    Args:
+        path (str): Result file (or directory for 'npy').
+        file_format (str, optional): One of FORMATS except 'csv'. Inferred if omitted.
+        mmap (bool): Memory-map the file where the format allows it.
+    Returns:
+        SimulationResult: The loaded result.
+    """
+    file_format = result_format(path, file_format)
+    if file_format == 'csv':
+        raise ValueError("CSV exports cannot be reloaded as results; use a binary format")
+
+    if file_format == 'npz':
+        with np.load(path) as data:
+            columns = {name: data[name] for name, _ in COLUMNS}
+            events = str(data[EVENTS_KEY])
+    elif file_format == 'npy':
+        mmap_mode = 'r' if mmap else None
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                   for name, _ in COLUMNS}
+        with open(os.path.join(path, f"{EVENTS_KEY}.json"), 'r') as f:
+            events = f.read()
+    else:
+        pa = _import_pyarrow()
+        if file_format == 'arrow':
+            table = pa.feather.read_table(path, memory_map=mmap)
+        else:
+            table = pa.parquet.read_table(path, memory_map=mmap)
+        columns = {name: table.column(name).to_numpy() for name, _ in COLUMNS}
+        events = (table.schema.metadata or {}).get(EVENTS_KEY.encode(), b'[]').decode()
+
+    return SimulationResult.from_columns(columns, json.loads(events))
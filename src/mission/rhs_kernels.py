@@ -0,0 +1,92 @@
+# src/mission/rhs_kernels.py
+
+"""
+Numba-compiled RHS kernels for the numba backend of mission.vehicle_model.
+
+Importing this module needs the optional numba package; vehicle_model only
+imports it when that backend is selected or auto-detected. The kernels follow
+the python backend's closures line by line, taking the CompiledStage values as
+arrays and floats. Compiled code is cached next to this file.
+"""
+
+import numba
+import numpy as np
+from utils.aerodynamics import MACH_STEP
+from utils.atmosphere import ALTITUDE_STEP
+from utils.constants import EARTH_RADIUS, G
+
+@numba.njit(cache=True)
+def drag_acceleration(velocity, altitude, mass, cd_grid, reference_area, density_table, sound_table):
+    """
+    Drag acceleration from the tabulated atmosphere and uniform-grid Cd table.
+    """
+    if reference_area == 0.0:
+        return 0.0
+    x = altitude / ALTITUDE_STEP
+    if x <= 0:
+        density, speed_of_sound = density_table[0], sound_table[0]
+    else:
+        i = int(x)
+        if i >= len(density_table) - 1:
+            return 0.0
+        f = x - i
+        density = density_table[i] + f * (density_table[i + 1] - density_table[i])
+        speed_of_sound = sound_table[i] + f * (sound_table[i + 1] - sound_table[i])
+        if density == 0.0:
+            return 0.0
+
+    x = abs(velocity) / speed_of_sound / MACH_STEP
+    i = int(x)
+    cd_last = len(cd_grid) - 1
+    if i >= cd_last:
+        cd = cd_grid[cd_last]
+    else:
+        cd = cd_grid[i] + (x - i) * (cd_grid[i + 1] - cd_grid[i])
+    return 0.5 * density * velocity * abs(velocity) * cd * reference_area / mass
+
+@numba.njit(cache=True)
+def rocket_rhs(t, y, initial_stage_mass, mass_flow_rate, num_engines, engine_on,
+               thrust_times, thrust_values, thrust_slopes, cd_grid, reference_area,
+               density_table, sound_table):
+    """
+    Powered-flight derivatives [acceleration, velocity].
+    """
+    velocity, altitude = y[0], y[1]
+    current_mass = initial_stage_mass - mass_flow_rate * t
+
+    # Thrust interpolated like np.interp, zero outside the table
+    thrust = 0.0
+    last = len(thrust_times) - 1
+    if engine_on and t == thrust_times[last]:
+        thrust = thrust_values[last] * num_engines
+    elif engine_on and thrust_times[0] <= t < thrust_times[last]:
+        j = np.searchsorted(thrust_times, t, side='right') - 1
+        if thrust_times[j] == t:
+            thrust = thrust_values[j] * num_engines
+        else:
+            thrust = (thrust_slopes[j] * (t - thrust_times[j]) + thrust_values[j]) * num_engines
+
+    g = G * (EARTH_RADIUS / (EARTH_RADIUS + altitude))**2
+    acceleration = (thrust / current_mass) - g - drag_acceleration(
+        velocity, altitude, current_mass, cd_grid, reference_area, density_table, sound_table)
+
+    # The launch pad holds the vehicle down until thrust exceeds weight
+    if altitude <= 0 and velocity <= 0 and acceleration < 0:
+        acceleration = 0.0
+    derivatives = np.empty(2)
+    derivatives[0] = acceleration
+    derivatives[1] = velocity
+    return derivatives
+
+@numba.njit(cache=True)
+def coast_rhs(t, y, mass, cd_grid, reference_area, density_table, sound_table):
+    """
+    Unpowered-flight derivatives [acceleration, velocity].
+    """
+    velocity, altitude = y[0], y[1]
+    g = G * (EARTH_RADIUS / (EARTH_RADIUS + altitude))**2
+    derivatives = np.empty(2)
+    derivatives[0] = -g - drag_acceleration(
+        velocity, altitude, mass, cd_grid, reference_area, density_table, sound_table)
+    derivatives[1] = velocity
+    return derivatives
@@ -0,0 +1,361 @@
+# src/mission/sensitivity.py
+
+"""
+Parameter sensitivities of the trajectory.
+
+TrajectorySimulator.simulate_sensitivities() integrates the forward sensitivity
+(variational) equations alongside the state in the same solver pass. For the
+state y = [velocity, altitude] with dy/dt = f(t, y, p), the sensitivities
+S = dy/dp follow
+
+    dS/dt = df/dy S + df/dp
+
+The parameters are every stage's isp, thrust (scaling its whole thrust curve),
+dry_mass and fuel_mass. They enter through the thrust, the mass flow rate, the
+stage's initial mass and the drag-to-mass ratio; drag derivatives come from the
+slopes of the tabulated atmosphere and Cd tables. Sensitivities are integrated
+scaled by the parameter values (p dy/dp), so they share the state's units and
+error tolerances.
+
+A segment that ends at a parameter-dependent time T(p), at propellant depletion
+or on an event such as apogee or impact, adds f(T) dT/dp to the end state's
+sensitivities: the jump at stage separation.
+
+finite_difference_sensitivities() computes the same Jacobians by central finite
+differences of simulate(), which takes two simulations per parameter.
+"""
+
+import copy
+import json
+
+import numpy as np
+from utils import aerodynamics, atmosphere, constants
+
+# Stage fields with sensitivities, in the order of the parameters of each stage
+SENSITIVITY_FIELDS = ('isp', 'thrust', 'dry_mass', 'fuel_mass')
+
+# State quantities at every boundary; altitude in km like SimulationResult
+STATE_QUANTITIES = ('time', 'velocity', 'altitude', 'mass')
+
+# Events that end a stage or the coast
+BOUNDARY_EVENTS = ('propellant_depletion', 'ground_impact', 'apogee', 'coast_limit')
+
+# Relative parameter step of finite_difference_sensitivities()
+DEFAULT_RELATIVE_STEP = 1e-4
+
+def parameter_names(num_stages):
+    """
+    Returns the parameter names, '<stage_index>.<field>' like dispersion names.
+    """
+    return [f"{index}.{field}" for index in range(num_stages) for field in SENSITIVITY_FIELDS]
+
+def parameter_values(stages):
+    """
+    Returns the nominal parameter values of loaded stages.
+    """
+    return np.array([getattr(stage.engine if field in ('isp', 'thrust') else stage, field)
+                     for stage in stages for field in SENSITIVITY_FIELDS], dtype=float)
+
+def _index(stage_index, field):
+    return stage_index * len(SENSITIVITY_FIELDS) + SENSITIVITY_FIELDS.index(field)
+
+def stage_sensitivities(stages, index):
+    """
+    Returns the scaled sensitivities (p d/dp) of a stage's burn quantities.
+    Args:
+        stages (list): Stage objects of the mission.
+        index (int): Index of the burning stage.
+    Returns:
+        tuple: (initial_mass, mass_flow_rate, burn_duration) sensitivity vectors and
+            the index of the stage's thrust parameter. The burn duration is
+            fuel_mass / mass_flow_rate.
+    """
+    num_parameters = len(stages) * len(SENSITIVITY_FIELDS)
+    stage = stages[index]
+    initial_mass = np.zeros(num_parameters)
+    for upper in range(index, len(stages)):
+        initial_mass[_index(upper, 'dry_mass')] = stages[upper].dry_mass
+        initial_mass[_index(upper, 'fuel_mass')] = stages[upper].fuel_mass
+
+    # The mass flow rate is num_engines * thrust / (isp * g0)
+    mass_flow_rate = stage.get_mass_flow_rate()
+    mass_flow = np.zeros(num_parameters)
+    mass_flow[_index(index, 'thrust')] = mass_flow_rate
+    mass_flow[_index(index, 'isp')] = -mass_flow_rate
+
+    burn_duration = -mass_flow * (stage.fuel_mass / mass_flow_rate) / mass_flow_rate
+    burn_duration[_index(index, 'fuel_mass')] += stage.fuel_mass / mass_flow_rate
+    return initial_mass, mass_flow, burn_duration, _index(index, 'thrust')
+
+def make_variational_rhs(stage, mass, mass_sensitivity, mass_flow_rate=0.0, mass_flow_sensitivity=None,
+                         thrust_index=None, engine_on=False):
+    """
+    Builds the RHS of the state augmented with its scaled sensitivities. With the
+    defaults it is the coast RHS; the state part matches mission.vehicle_model.
+    Args:
+        stage (CompiledStage): The lowest attached stage.
+        mass (float): Vehicle mass at the segment's local time 0.
+        mass_sensitivity (np.ndarray): Its scaled sensitivities.
+        mass_flow_rate (float): Mass flow rate, also after engine cutoff.
+        mass_flow_sensitivity (np.ndarray, optional): Its scaled sensitivities.
+        thrust_index (int, optional): Parameter that scales the thrust.
+        engine_on (bool): Whether the engine fires during the segment.
+    Returns:
+        callable: fun(t, y) for solve_ivp with y = [velocity, altitude,
+            p dvelocity/dp..., p daltitude/dp...].
+    """
+    num_parameters = len(mass_sensitivity)
+    if mass_flow_sensitivity is None:
+        mass_flow_sensitivity = np.zeros(num_parameters)
+    times, values = np.array(stage.thrust_times), np.array(stage.thrust_values)
+    num_engines = stage.num_engines
+    drag = _make_drag_partials(stage)
+    G, EARTH_RADIUS = constants.G, constants.EARTH_RADIUS
+
+    def variational_rhs(t, y):
+        velocity, altitude = y[0], y[1]
+        sensitivity = y[2:].reshape(2, num_parameters)
+        current_mass = mass - mass_flow_rate * t
+        thrust = float(np.interp(t, times, values, left=0.0, right=0.0)) * num_engines if engine_on else 0.0
+        g = G * (EARTH_RADIUS / (EARTH_RADIUS + altitude))**2
+        force, dforce_dv, dforce_dh = drag(velocity, altitude)
+        acceleration = (thrust / current_mass) - g - force / current_mass
+
+        derivatives = np.empty_like(y)
+        derivatives[1] = velocity
+        derivatives[2 + num_parameters:] = sensitivity[0]
+        # The launch pad holds the vehicle down until thrust exceeds weight
+        if altitude <= 0 and velocity <= 0 and acceleration < 0:
+            derivatives[0] = 0.0
+            derivatives[2:2 + num_parameters] = 0.0
+            return derivatives
+
+        dmass = mass_sensitivity - mass_flow_sensitivity * t
+        dacceleration = dmass * (-(thrust - force) / current_mass**2)
+        if thrust_index is not None:
+            dacceleration[thrust_index] += thrust / current_mass
+        derivatives[0] = acceleration
+        derivatives[2:2 + num_parameters] = (
+            (-dforce_dv / current_mass) * sensitivity[0]
+            + (2 * g / (EARTH_RADIUS + altitude) - dforce_dh / current_mass) * sensitivity[1]
+            + dacceleration
+        )
+        return derivatives
+    return variational_rhs
+
+def _make_drag_partials(stage):
+    """
+    Builds the drag force of a stage and its partial derivatives as a function of
+    (velocity, altitude), returning (force, dforce/dvelocity, dforce/daltitude).
+    """
+    reference_area = stage.reference_area
+    if not reference_area:
+        return lambda velocity, altitude: (0.0, 0.0, 0.0)
+
+    cd_grid = stage.cd_grid
+    cd_last = len(cd_grid) - 1
+    density_table, sound_table = atmosphere.DENSITY.tolist(), atmosphere.SPEED_OF_SOUND.tolist()
+    top = len(density_table) - 1
+    ALTITUDE_STEP, MACH_STEP = atmosphere.ALTITUDE_STEP, aerodynamics.MACH_STEP
+
+    def drag(velocity, altitude):
+        x = altitude / ALTITUDE_STEP
+        if x <= 0:
+            density, speed_of_sound = density_table[0], sound_table[0]
+            ddensity = dsound = 0.0
+        else:
+            i = int(x)
+            if i >= top:
+                return 0.0, 0.0, 0.0
+            f = x - i
+            ddensity = (density_table[i + 1] - density_table[i]) / ALTITUDE_STEP
+            dsound = (sound_table[i + 1] - sound_table[i]) / ALTITUDE_STEP
+            density = density_table[i] + f * (density_table[i + 1] - density_table[i])
+            speed_of_sound = sound_table[i] + f * (sound_table[i + 1] - sound_table[i])
+            if not density:
+                return 0.0, 0.0, 0.0
+
+        speed = abs(velocity)
+        x = speed / speed_of_sound / MACH_STEP
+        i = int(x)
+        if i >= cd_last:
+            cd, dcd_dmach = cd_grid[cd_last], 0.0
+        else:
+            cd = cd_grid[i] + (x - i) * (cd_grid[i + 1] - cd_grid[i])
+            dcd_dmach = (cd_grid[i + 1] - cd_grid[i]) / MACH_STEP
+        # d(v|v|)/dv = 2|v|, dMach/dv = sign(v) / a and dMach/dh = -|v| a' / a^2
+        q = 0.5 * velocity * speed * reference_area
+        force = q * density * cd
+        dforce_dv = 0.5 * density * reference_area * (
+            2 * speed * cd + velocity * dcd_dmach / speed_of_sound * speed * (1 if velocity >= 0 else -1))
+        dforce_dh = q * (ddensity * cd - density * dcd_dmach * speed * dsound / speed_of_sound**2)
+        return force, dforce_dv, dforce_dh
+    return drag
+
+class SensitivityResult:
+    """
+    Jacobians of the state at every stage and coast boundary with respect to the
+    mission parameters.
+    """
+    def __init__(self, parameters, values, boundaries, info=None):
+        """
+        Args:
+            parameters (list): Parameter names (see parameter_names).
+            values (array-like): Nominal parameter values.
+            boundaries (list): One dict per boundary in flight order, with the
+                'event' and 'stage' that end it (stage 0 for the coast), the 'state'
+                (a dict of STATE_QUANTITIES) and the 'jacobian', an array of shape
+                (len(STATE_QUANTITIES), len(parameters)).
+            info (dict, optional): Method, profile, simulations and elapsed time.
+        """
+        self.parameters = list(parameters)
+        self.values = np.asarray(values, dtype=float)
+        self.boundaries = boundaries
+        self.info = info or {}
+
+    @property
+    def final(self):
+        """
+        The last boundary: apogee, ground impact or the coast limit.
+        """
+        return self.boundaries[-1]
+
+    def jacobian(self, boundary=-1, scaled=False):
+        """
+        Returns the Jacobian at a boundary.
+        Args:
+            boundary (int): Index into self.boundaries.
+            scaled (bool): Report the change per 1% change of each parameter.
+        Returns:
+            np.ndarray: Shape (len(STATE_QUANTITIES), len(parameters)).
+        """
+        jacobian = np.asarray(self.boundaries[boundary]['jacobian'])
+        return jacobian * self.values / 100 if scaled else jacobian
+
+    def frame(self, boundary=-1, scaled=False):
+        """
+        Returns the Jacobian at a boundary as a DataFrame, one row per state quantity.
+        """
+        import pandas as pd
+        return pd.DataFrame(self.jacobian(boundary, scaled), index=STATE_QUANTITIES, columns=self.parameters)
+
+    def max_relative_error(self, reference):
+        """
+        Compares the Jacobians with those of another result, e.g. finite differences.
+        Returns:
+            dict: Maps every state quantity to the largest error over boundaries and
+                parameters of its scaled sensitivities (p dy/dp), relative to the
+                largest reference entry of that quantity.
+        """
+        if [(b['event'], b['stage']) for b in self.boundaries] != \
+                [(b['event'], b['stage']) for b in reference.boundaries]:
+            raise ValueError("The results have different boundaries")
+        ours = np.array([boundary['jacobian'] for boundary in self.boundaries]) * self.values
+        theirs = np.array([boundary['jacobian'] for boundary in reference.boundaries]) * reference.values
+        errors = np.abs(ours - theirs).max(axis=(0, 2))
+        scales = np.abs(theirs).max(axis=(0, 2))
+        return {quantity: float(error / scale) if scale else float(error)
+                for quantity, error, scale in zip(STATE_QUANTITIES, errors, scales)}
+
+    def to_dict(self):
+        return {
+            'info': self.info,
+            'parameters': self.parameters,
+            'values': self.values.tolist(),
+            'boundaries': [dict(boundary, jacobian=np.asarray(boundary['jacobian']).tolist())
+                           for boundary in self.boundaries],
+        }
+
+    def save(self, path):
+        """
+        Writes the result as JSON.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def from_dict(cls, data):
+        boundaries = [dict(boundary, jacobian=np.array(boundary['jacobian']))
+                      for boundary in data['boundaries']]
+        return cls(data['parameters'], data['values'], boundaries, data.get('info'))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a result written by save().
+        """
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+def boundary_states(result):
+    """
+    Extracts the state at every boundary of a simulate() result.
+    Returns:
+        list: (event, stage, state) tuples in flight order.
+    """
+    boundaries = []
+    stage = np.asarray(result['stage'])
+    for event in result.events:
+        is_stage_end = event['stage'] > 0 and event['event'] in ('propellant_depletion', 'ground_impact')
+        if not (is_stage_end or (event['stage'] == 0 and event['event'] in BOUNDARY_EVENTS)):
+            continue
+        # The mass is constant during the coast and at its stage's last row at a stage end
+        rows = np.flatnonzero(stage == event['stage'])
+        boundaries.append((event['event'], event['stage'], {
+            'time': event['time'],
+            'velocity': event['velocity'],
+            'altitude': event['altitude'],
+            'mass': float(result['mass'][rows[-1]]),
+        }))
+    return boundaries
+
+def finite_difference_sensitivities(stages, profile=None, relative_step=DEFAULT_RELATIVE_STEP, **options):
+    """
+    Computes the boundary Jacobians by central finite differences of simulate().
+    Args:
+        stages (list): Loaded Stage objects; copies are perturbed.
+        profile (str or dict, optional): Solver accuracy profile.
+        relative_step (float): Parameter step relative to its value.
+        **options: Further TrajectorySimulator arguments, e.g. coast_until.
+    Returns:
+        SensitivityResult: The Jacobians, in the layout of simulate_sensitivities().
+    """
+    import time
+    from mission.monte_carlo import disperse_stages
+    from mission.trajectory_simulator import DEFAULT_PROFILE, TrajectorySimulator
+    from utils.log import quiet
+
+    profile = profile or DEFAULT_PROFILE
+    start = time.perf_counter()
+
+    def run(stage_index=None, field=None, factor=1.0):
+        variant = copy.deepcopy(stages)
+        if stage_index is not None:
+            disperse_stages(variant, [(stage_index, field, None)], [factor])
+        with quiet():
+            return boundary_states(TrajectorySimulator(variant, profile, **options).simulate())
+
+    nominal = run()
+    names = parameter_names(len(stages))
+    values = parameter_values(stages)
+    jacobians = np.zeros((len(nominal), len(STATE_QUANTITIES), len(names)))
+    for column, name in enumerate(names):
+        stage_index, field = int(name.split('.')[0]), name.split('.')[1]
+        plus = run(stage_index, field, 1 + relative_step)
+        minus = run(stage_index, field, 1 - relative_step)
+        if [b[:2] for b in plus] != [b[:2] for b in nominal] or [b[:2] for b in minus] != [b[:2] for b in nominal]:
+            raise ValueError(f"Perturbing {name} changes the flight's events; use a smaller step")
+        for i, ((_, _, high), (_, _, low)) in enumerate(zip(plus, minus)):
+            jacobians[i, :, column] = [(high[quantity] - low[quantity]) / (2 * relative_step * values[column])
+                                       for quantity in STATE_QUANTITIES]
+
+    boundaries = [{'event': event, 'stage': stage, 'state': state, 'jacobian': jacobian}
+                  for (event, stage, state), jacobian in zip(nominal, jacobians)]
+    info = {
+        'method': 'finite_differences',
+        'profile': profile if isinstance(profile, str) else 'custom',
+        'relative_step': relative_step,
+        'simulations': 2 * len(names) + 1,
+        'elapsed': time.perf_counter() - start,
+    }
+    return SensitivityResult(names, values, boundaries, info)
@@ -0,0 +1,197 @@
+# src/mission/simulation_result.py
+
+from collections.abc import Mapping
+import numpy as np
+
+# Column names and dtypes, in export order
+COLUMNS = (
+    ('time', np.float64),
+    ('altitude', np.float64),
+    ('velocity', np.float64),
+    ('mass', np.float64),
+    ('thrust', np.float64),
+    ('stage', np.int64),
+)
+
+class SimulationResult(Mapping):
+    """
+    Columnar, NumPy-backed container for a simulated trajectory.
+
+    Each column lives in its own preallocated array and is handed out as a
+    zero-copy view of the filled rows. The class behaves like the read-only
+    dict of lists that simulate() used to return, so results['altitude']
+    and pd.DataFrame-style consumers keep working.
+    """
+    def __init__(self, capacity=0):
+        """
+        Initializes an empty result.
+        Args:
+            capacity (int): Number of rows to preallocate.
+        """
+        self._data = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS}
+        self._size = 0
+        # Flight events located by the solver, as dicts with 'event', 'stage',
+        # 'time', 'altitude' and 'velocity' keys
+        self.events = []
+        # SimulationStats of the run that produced the result, if it was simulated
+        # in this process (results loaded from a cache or file have none)
+        self.stats = None
+
+    @classmethod
+    def concatenate(cls, blocks):
+        """
+        Builds a result from a sequence of column blocks, allocating storage once.
+        Args:
+            blocks (list): Dicts (or results) mapping every column name to an array
+                of equal length.
+        Returns:
+            SimulationResult: The concatenated result.
+        """
+        total = sum(len(block['time']) for block in blocks)
+        result = cls(total)
+        for block in blocks:
+            result.append(**block)
+        return result
+
+    @classmethod
+    def from_columns(cls, columns, events=()):
+        """
+        Wraps existing column arrays without copying them, e.g. memory-mapped files.
+        Columns whose dtype differs from COLUMNS are converted.
+        Args:
+            columns (dict): One array per column name, all of the same length.
+            events (list): Flight events of the trajectory.
+        Returns:
+            SimulationResult: A result whose columns are the given arrays.
+        """
+        missing = {name for name, _ in COLUMNS} - set(columns)
+        if missing:
+            raise ValueError(f"Missing result columns: {sorted(missing)}")
+        data = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS}
+        if len({len(column) for column in data.values()}) != 1:
+            raise ValueError("All result columns must have the same length")
+
+        result = cls()
+        result._data = data
+        result._size = len(data['time'])
+        result.events = list(events)
+        return result
+
+    @property
+    def capacity(self):
+        """
+        Number of rows that fit without reallocating.
+        """
+        return len(self._data['time'])
+
+    @property
+    def num_samples(self):
+        """
+        Number of filled rows.
+        """
+        return self._size
+
+    def append(self, **columns):
+        """
+        Copies a block of rows into the preallocated storage, growing it if needed.
+        Args:
+            **columns: One array (or scalar) per column name, all of the same length.
+        """
+        missing = set(self._data) - set(columns)
+        if missing:
+            raise ValueError(f"Missing result columns: {sorted(missing)}")
+
+        count = len(np.atleast_1d(columns['time']))
+        end = self._size + count
+        if end > self.capacity:
+            self._reserve(max(end, 2 * self.capacity))
+
+        for name, values in columns.items():
+            self._data[name][self._size:end] = values
+        self._size = end
+
+    def _reserve(self, capacity):
+        """
+        Reallocates every column to hold at least `capacity` rows.
+        """
+        for name, column in self._data.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._data[name] = grown
+
+    def __getitem__(self, name):
+        return self._data[name][:self._size]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"SimulationResult({self._size} samples, columns={list(self._data)})"
+
+    def find_event(self, name):
+        """
+        Returns the last recorded event with the given name, or None.
+        """
+        for event in reversed(self.events):
+            if event['event'] == name:
+                return event
+        return None
+
+    def summary(self):
+        """
+        Returns the key metrics of the trajectory as plain floats.
+        Burnout is the final propellant depletion, before the coast phase.
+        """
+        burnout = self.find_event('propellant_depletion')
+        if burnout is None:
+            # The vehicle never finished a burn (e.g. it fell back to the ground)
+            burnout = {'altitude': self['altitude'][-1], 'velocity': self['velocity'][-1]}
+        return {
+            'max_altitude': float(np.max(self['altitude'])),
+            'max_velocity': float(np.max(self['velocity'])),
+            'burnout_altitude': float(burnout['altitude']),
+            'burnout_velocity': float(burnout['velocity']),
+            'total_time': float(self['time'][-1]),
+        }
+
+    def separation_indices(self):
+        """
+        Returns the row indices of the last sample of every stage before separation.
+        """
+        return np.flatnonzero(np.diff(self['stage']))
+
+    def to_numpy(self):
+        """
+        Returns the filled rows as a structured array with one field per column.
+        """
+        table = np.empty(self._size, dtype=[(name, dtype) for name, dtype in COLUMNS])
+        for name in self._data:
+            table[name] = self[name]
+        return table
+
+    def to_dict(self):
+        """
+        Returns a plain dict of zero-copy column views.
+        """
+        return {name: self[name] for name in self._data}
+
+    def to_dataframe(self):
+        """
+        Returns a pandas DataFrame backed by the column views where pandas allows it.
+        """
+        import pandas as pd
+        return pd.DataFrame(self.to_dict(), copy=False)
+
+    def to_csv(self, path_or_buffer=None, header=True):
+        """
+        Writes the results as CSV.
+        Args:
+            path_or_buffer (str or file-like, optional): Destination. If omitted,
+                the CSV text is returned.
+            header (bool): Whether to write the column names, e.g. False when
+                appending a later chunk of a streamed trajectory.
+        """
+        return self.to_dataframe().to_csv(path_or_buffer, index=False, header=header)
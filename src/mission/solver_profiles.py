@@ -0,0 +1,60 @@
+# src/mission/solver_profiles.py
+
+"""
+Solver accuracy profiles, kept free of heavy imports (NumPy, SciPy) so that the
+CLI and the result cache key can use them without loading the simulator.
+"""
+
+import math
+
+# Named solver accuracy profiles for simulate(). The settings of the chosen
+# profile are part of the result cache key. Staging, engine cutoff, apogee and
+# impact are located by events, so the solver is free to take large steps.
+# With dense output the trajectory is sampled every `sample_interval` seconds;
+# without it only the solver's own steps are recorded.
+SOLVER_PROFILES = {
+    'fast': {
+        'method': 'RK23',
+        'rtol': 1e-3,
+        'atol': 1e-2,
+        'max_step': math.inf,
+        'dense_output': False,
+        'sample_interval': None,
+    },
+    'standard': {
+        'method': 'RK45',
+        'rtol': 1e-6,
+        'atol': 1e-6,
+        'max_step': math.inf,
+        'dense_output': True,
+        'sample_interval': 1.0,
+    },
+    'precise': {
+        'method': 'DOP853',
+        'rtol': 1e-10,
+        'atol': 1e-8,
+        'max_step': 10.0,
+        'dense_output': True,
+        'sample_interval': 0.5,
+    },
+}
+
+DEFAULT_PROFILE = 'standard'
+
+def get_solver_profile(profile=DEFAULT_PROFILE):
+    """
+    Returns the solver settings of a named profile.
+    Args:
+        profile (str or dict): A profile name from SOLVER_PROFILES, or a dict of
+            settings with the same keys.
+    Returns:
+        dict: The solver settings.
+    """
+    if isinstance(profile, dict):
+        return profile
+    try:
+        return SOLVER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown solver profile: {profile}. Choose from {list(SOLVER_PROFILES)}"
+        ) from None
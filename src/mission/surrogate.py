@@ -0,0 +1,458 @@
+# src/mission/surrogate.py
+
+"""
+Surrogate models for instant mission previews.
+
+A surrogate is built once per mission from a grid of simulations over the
+stages' propellant loads and engine counts, and then predicts the burnout
+altitude, velocity and time of every stage in microseconds:
+
+1. The grid spans DEFAULT_FUEL_SPAN around each stage's propellant load in
+   `levels` steps, and every engine count within DEFAULT_ENGINE_SPAN of the
+   nominal one. It runs in a pool of worker processes and reuses the shared
+   result cache. The grid has levels x engine counts points per stage, and so
+   grows exponentially with the number of stages; pass `ranges` to vary only
+   some of them.
+2. Outcomes are interpolated multilinearly between the grid nodes, so they are
+   exact for simulated points, including every whole engine count at a
+   simulated propellant load. A global fit would smear the kinks where a burn
+   becomes limited by the engine's burn time over the whole grid.
+3. Error bars come from the second differences of the grid along each axis,
+   so they vanish on the nodes and widen in cells with strong curvature.
+
+Models are stored as JSON, one file per mission and solver profile, together
+with fingerprints of the simulator, the engine configs and the rest of the
+mission. A model whose fingerprints no longer match is stale and must be rebuilt.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from mission.result_cache import CACHE_VERSION, get_default_cache, resolve_mission
+from mission.solver_profiles import DEFAULT_PROFILE, get_solver_profile
+from mission.sweep import apply_point, build_grid, parse_parameter
+from utils.log import get_logger, log, quiet
+
+logger = get_logger('surrogate')
+
+# Bump when the model layout or fitting changes
+SURROGATE_VERSION = 2
+
+DEFAULT_SURROGATE_DIR = os.environ.get(
+    'STELLARLAB_SURROGATE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'stellarlab', 'surrogates')
+)
+
+# Stage fields a surrogate covers
+SURROGATE_FIELDS = ('fuel_mass', 'num_engines')
+
+# Outcomes predicted for every stage, named '<stage_index>.<outcome>'
+OUTCOMES = ('burnout_altitude', 'burnout_velocity', 'burnout_time')
+
+# Default grid: propellant loads within +-25% of nominal in DEFAULT_LEVELS steps,
+# and every engine count within +-2 of nominal
+DEFAULT_FUEL_SPAN = 0.25
+DEFAULT_ENGINE_SPAN = 2
+DEFAULT_LEVELS = 5
+
+def default_ranges(mission_data, fuel_span=DEFAULT_FUEL_SPAN, engine_span=DEFAULT_ENGINE_SPAN):
+    """
+    Returns the default parameter ranges around a mission's nominal stages.
+    Returns:
+        dict: Maps '<stage_index>.<field>' to (low, high).
+    """
+    ranges = {}
+    for i, stage in enumerate(mission_data['stages']):
+        fuel_mass = float(stage['fuel_mass'])
+        ranges[f"{i}.fuel_mass"] = ((1 - fuel_span) * fuel_mass, (1 + fuel_span) * fuel_mass)
+        num_engines = int(stage['num_engines'])
+        ranges[f"{i}.num_engines"] = (max(1, num_engines - engine_span), num_engines + engine_span)
+    return ranges
+
+def grid_values(name, low, high, levels):
+    """
+    Returns the grid values of a parameter: every integer in range for engine
+    counts, `levels` evenly spaced values otherwise.
+    """
+    if parse_parameter(name)[1] == 'num_engines':
+        return list(range(int(low), int(high) + 1))
+    return list(np.linspace(low, high, levels))
+
+def fingerprints(mission_data, profile=None, parameters=()):
+    """
+    Hashes everything a surrogate depends on, in three parts so that a stale
+    model can say why it is stale.
+    Args:
+        mission_data (dict): Mission profile in the mission JSON layout.
+        profile (str, optional): Solver profile name.
+        parameters (list): The model's parameters, which are left out of the mission hash.
+    Returns:
+        dict: 'simulator' (physics version and solver settings), 'engines'
+            (engine configurations) and 'mission' (every other stage field) hex digests.
+    """
+    resolved = resolve_mission(mission_data)
+    fixed = [dict(stage) for stage in resolved['stages']]
+    for stage in fixed:
+        del stage['engine_config']
+    for name in parameters:
+        stage_index, field = parse_parameter(name)
+        fixed[stage_index].pop(field, None)
+    parts = {
+        'simulator': [CACHE_VERSION, SURROGATE_VERSION, get_solver_profile(profile or DEFAULT_PROFILE)],
+        'engines': [stage['engine_config'] for stage in resolved['stages']],
+        'mission': fixed,
+    }
+    return {name: hashlib.sha256(json.dumps(part, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+            for name, part in parts.items()}
+
+def surrogate_path(mission_data, profile=None, directory=DEFAULT_SURROGATE_DIR):
+    """
+    Returns the file of a mission's surrogate, named after the mission and the
+    solver profile (not its contents, so that a stale model is found and reported).
+    """
+    identity = [mission_data.get('name'), [stage.get('stage_name') for stage in mission_data['stages']],
+                profile or DEFAULT_PROFILE]
+    digest = hashlib.sha256(json.dumps(identity).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directory, f"{digest}.json")
+
+def stage_outcomes(results, num_stages):
+    """
+    Extracts the burnout altitude, velocity and time of every stage from the
+    propellant depletion events of a simulate() result; NaN for stages that
+    never burned out.
+    """
+    outcomes = np.full((num_stages, len(OUTCOMES)), np.nan)
+    for event in results.events:
+        if event['event'] == 'propellant_depletion' and 1 <= event['stage'] <= num_stages:
+            outcomes[event['stage'] - 1] = (event['altitude'], event['velocity'], event['time'])
+    return outcomes.ravel()
+
+class SurrogateModel:
+    """
+    Multilinear interpolation of the per-stage burnout outcomes over a grid of
+    simulations, with error bars from the grid's second differences.
+    """
+    def __init__(self, parameters, axes, values, outputs, nominal, fingerprints, info=None):
+        """
+        Args:
+            parameters (list): Parameter names, '<stage_index>.<field>'.
+            axes (list): Evenly spaced grid values of every parameter, at least three each.
+            values (array): Simulated outcomes, shaped (grid shape..., outputs).
+                NaN where a stage never burned out.
+            outputs (list): Outcome names, '<stage_index>.<outcome>'.
+            nominal (dict): Mission values of the parameters, used for missing ones.
+            fingerprints (dict): See fingerprints().
+            info (dict, optional): Fit details.
+        """
+        self.parameters = list(parameters)
+        self.axes = [np.asarray(axis, dtype=float) for axis in axes]
+        self.values = np.asarray(values, dtype=float)
+        self.outputs = list(outputs)
+        self.nominal = dict(nominal)
+        self.fingerprints = dict(fingerprints)
+        self.info = info or {}
+        # |f[i-1] - 2 f[i] + f[i+1]| along every axis, copied to the end nodes
+        self._curvature = []
+        for axis in range(len(self.axes)):
+            second = np.abs(np.diff(self.values, n=2, axis=axis))
+            first, last = np.take(second, [0], axis=axis), np.take(second, [-1], axis=axis)
+            self._curvature.append(np.concatenate((first, second, last), axis=axis))
+        # 0/1 offsets of the corners of a grid cell, one row per corner
+        self._corners = np.array(list(itertools.product((0, 1), repeat=len(self.axes))), dtype=int)
+
+    @property
+    def bounds(self):
+        return [(float(axis[0]), float(axis[-1])) for axis in self.axes]
+
+    def vector(self, point):
+        """
+        Returns a point's parameter vector; missing parameters take their nominal value.
+        """
+        return np.array([point.get(name, self.nominal[name]) for name in self.parameters], dtype=float)
+
+    def in_bounds(self, point):
+        """
+        Whether a point lies within the grid. Outside it, predictions are those of
+        the nearest grid boundary and the error bars do not hold.
+        """
+        return all(axis[0] <= x <= axis[-1] for axis, x in zip(self.axes, self.vector(point)))
+
+    def predict(self, point):
+        """
+        Predicts the outcomes at a point.
+        Args:
+            point (dict): Parameter values by name.
+        Returns:
+            tuple: (values, errors) arrays in the order of self.outputs. The error
+                along each axis is t (1 - t) times the largest second difference at
+                the cell's corners, t being the position within the cell: zero on
+                grid nodes, and enough to cover a kink, such as a burn that becomes
+                limited by the engine's burn time, within the cell.
+        """
+        cell, fraction = [], []
+        for axis, x in zip(self.axes, self.vector(point)):
+            i = min(max(int(np.searchsorted(axis, x, side='right')) - 1, 0), len(axis) - 2)
+            cell.append(i)
+            fraction.append(min(max((x - axis[i]) / (axis[i + 1] - axis[i]), 0.0), 1.0))
+        fraction = np.array(fraction)
+        corners = tuple((self._corners + cell).T)
+        weights = np.prod(np.where(self._corners, fraction, 1 - fraction), axis=1)
+        values = weights @ self.values[corners]
+        errors = sum(t * (1 - t) * np.max(curvature[corners], axis=0)
+                     for t, curvature in zip(fraction, self._curvature) if 0 < t < 1)
+        return values, np.zeros_like(values) + errors
+
+    def predict_frame(self, point):
+        """
+        Returns the prediction as a DataFrame with one row per stage and a value
+        and error column per outcome.
+        """
+        import pandas as pd
+        values, errors = self.predict(point)
+        rows = {}
+        for name, value, error in zip(self.outputs, values, errors):
+            stage_index, _, outcome = name.partition('.')
+            row = rows.setdefault(f"Stage {int(stage_index) + 1}", {})
+            row[outcome] = value
+            row[f"{outcome}_error"] = error
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+    def stale_reasons(self, mission_data, profile=None):
+        """
+        Returns the parts (see fingerprints()) that changed since the model was
+        built; an empty list means it is up to date.
+        """
+        current = fingerprints(mission_data, profile or self.info.get('profile'), self.parameters)
+        return [name for name, digest in current.items() if self.fingerprints.get(name) != digest]
+
+    def to_dict(self):
+        return {
+            'version': SURROGATE_VERSION,
+            'info': self.info,
+            'fingerprints': self.fingerprints,
+            'parameters': self.parameters,
+            'axes': [axis.tolist() for axis in self.axes],
+            'outputs': self.outputs,
+            'nominal': self.nominal,
+            # NaN is written as null to keep the file strict JSON
+            'values': np.where(np.isnan(self.values), None, self.values).tolist(),
+        }
+
+    def save(self, path):
+        """
+        Writes the model as JSON, atomically so that readers never see a partial file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != SURROGATE_VERSION:
+            raise ValueError("The surrogate model was built by an incompatible version")
+        values = np.array(data['values'], dtype=float)
+        return cls(data['parameters'], data['axes'], values, data['outputs'], data['nominal'],
+                   data['fingerprints'], data.get('info'))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a model written by save().
+        """
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+def find_surrogate(mission_data, profile=None, directory=DEFAULT_SURROGATE_DIR):
+    """
+    Looks up the stored surrogate of a mission.
+    Returns:
+        tuple: (SurrogateModel or None, list of stale reasons). A stale model is
+            returned too, for its bounds and fit details, but should not be used.
+    """
+    try:
+        model = SurrogateModel.load(surrogate_path(mission_data, profile, directory))
+    except (OSError, ValueError, KeyError):
+        return None, []
+    return model, model.stale_reasons(mission_data, profile)
+
+def _run_chunk(mission_data, chunk, num_stages, use_cache, profile):
+    """
+    Simulates one batch of grid points inside a worker process.
+    Returns:
+        list: (index, outcomes or None, error or None) tuples.
+    """
+    rows = []
+    for index, point in chunk:
+        try:
+            point_mission = apply_point(mission_data, point)
+            with quiet():
+                if use_cache:
+                    results, _ = get_default_cache().get_or_simulate(point_mission, profile=profile)
+                else:
+                    from mission.mission_loader import load_mission_from_dict
+                    from mission.trajectory_simulator import TrajectorySimulator
+                    results = TrajectorySimulator(load_mission_from_dict(point_mission), profile).simulate()
+            rows.append((index, stage_outcomes(results, num_stages), None))
+        except Exception as e:
+            rows.append((index, None, f"{type(e).__name__}: {e}"))
+    return rows
+
+def _simulate_points(mission, points, use_cache, profile, max_workers=None, progress=None):
+    """
+    Simulates mission variants in a pool of worker processes.
+    Returns:
+        tuple: (outcomes, errors): an array with the stage_outcomes() of every
+            point, NaN for failed points, and the error messages of the failures.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = max(1, -(-len(points) // (4 * max_workers)))
+    indexed = list(enumerate(points))
+    chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+    num_stages = len(mission['stages'])
+
+    outcomes = np.full((len(points), num_stages * len(OUTCOMES)), np.nan)
+    errors = []
+    finished = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_chunk, mission, chunk, num_stages, use_cache, profile)
+                   for chunk in chunks]
+        for future, chunk in zip(futures, chunks):
+            try:
+                chunk_rows = future.result()
+            except Exception as e:
+                # The worker itself died; every point of the task stays NaN
+                chunk_rows = [(index, None, f"{type(e).__name__}: {e}") for index, _ in chunk]
+            for index, row, error in chunk_rows:
+                if error is None:
+                    outcomes[index] = row
+                else:
+                    errors.append(error)
+            finished += len(chunk)
+            if progress is not None:
+                progress(finished, len(points))
+    return outcomes, errors
+
+def fit_surrogate(mission, ranges=None, levels=DEFAULT_LEVELS, profile=None, max_workers=None,
+                  use_cache=True, progress=None):
+    """
+    Simulates a parameter grid and builds a surrogate from it.
+    Args:
+        mission (str or dict): Path to a mission JSON file, or parsed mission data.
+        ranges (dict, optional): Maps '<stage_index>.<field>' to (low, high), with
+            field one of SURROGATE_FIELDS. Defaults to default_ranges(mission).
+        levels (int): Grid values per propellant load, at least three; engine
+            counts take every integer in range.
+        profile (str, optional): Solver profile of the simulations.
+        max_workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        use_cache (bool): Reuse and store the grid's results in the shared result cache.
+        progress (callable, optional): Called as progress(finished, points) after every task.
+    Returns:
+        SurrogateModel: The model.
+    Raises:
+        ValueError: If a range is invalid.
+    """
+    if isinstance(mission, str):
+        with open(mission, 'r') as f:
+            mission = json.load(f)
+    profile = profile or DEFAULT_PROFILE
+    ranges = ranges or default_ranges(mission)
+    grid = {}
+    for name, (low, high) in ranges.items():
+        stage_index, field = parse_parameter(name)
+        if field not in SURROGATE_FIELDS or stage_index >= len(mission['stages']):
+            raise ValueError(f"Surrogate parameters must be '<stage_index>.<field>' with field one of "
+                             f"{SURROGATE_FIELDS}, not '{name}'")
+        grid[name] = grid_values(name, low, high, levels)
+        if not 0 < low < high or len(grid[name]) < 3:
+            raise ValueError(f"The range of '{name}' must satisfy 0 < low < high and span "
+                             f"at least three grid values")
+
+    parameters = list(grid)
+    points = build_grid(grid)
+    log(logger, f"Building a surrogate of '{mission.get('name')}' from {len(points)} grid points",
+        event='surrogate_start', points=len(points))
+    start = time.perf_counter()
+    outcomes, errors = _simulate_points(mission, points, use_cache, profile, max_workers, progress)
+
+    missing = int(np.isnan(outcomes).any(axis=1).sum())
+    info = {
+        'mission': mission.get('name'),
+        'profile': profile,
+        'levels': levels,
+        'points': len(points),
+        # Failed points, and points where some stage never burned out
+        'failed': len(errors),
+        'incomplete': missing,
+        'errors': errors[:10],
+        'elapsed': time.perf_counter() - start,
+        'created': time.time(),
+    }
+    nominal = {}
+    for name in parameters:
+        stage_index, field = parse_parameter(name)
+        nominal[name] = mission['stages'][stage_index][field]
+    outputs = [f"{i}.{outcome}" for i in range(len(mission['stages'])) for outcome in OUTCOMES]
+    # build_grid enumerates points in row-major order, so the rows reshape onto the grid
+    values = outcomes.reshape([len(axis) for axis in grid.values()] + [len(outputs)])
+    model = SurrogateModel(parameters, list(grid.values()), values, outputs, nominal,
+                           fingerprints(mission, profile, parameters), info)
+    log(logger, f"Surrogate built from {len(points)} points in {info['elapsed']:.1f}s "
+                f"({missing} incomplete)", event='surrogate_complete', points=len(points), incomplete=missing)
+    return model
+
+def validate_surrogate(model, mission, samples=20, seed=None, max_workers=None):
+    """
+    Compares a surrogate with full simulations at random points within its grid:
+    propellant loads drawn uniformly, engine counts uniformly among the integers.
+    Args:
+        model (SurrogateModel): The model.
+        mission (dict): The mission it was built for.
+        samples (int): Number of random points.
+        seed (int, optional): Random seed.
+        max_workers (int, optional): Number of worker processes.
+    Returns:
+        pd.DataFrame: One row per output: the RMS and largest absolute error, the
+            mean error bar, and the fraction of points within their error bars.
+    """
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    points = []
+    for _ in range(samples):
+        point = {}
+        for name, (low, high) in zip(model.parameters, model.bounds):
+            if parse_parameter(name)[1] == 'num_engines':
+                point[name] = int(rng.integers(low, high + 1))
+            else:
+                point[name] = float(rng.uniform(low, high))
+        points.append(point)
+
+    actual, _ = _simulate_points(mission, points, False, model.info.get('profile'), max_workers)
+    predicted, bars = map(np.array, zip(*(model.predict(point) for point in points)))
+    error = np.abs(predicted - actual)
+    with np.errstate(invalid='ignore'):
+        return pd.DataFrame({
+            'rms_error': np.sqrt(np.nanmean(error**2, axis=0)),
+            'max_error': np.nanmax(error, axis=0),
+            'mean_error_bar': np.nanmean(bars, axis=0),
+            # Exact outputs (zero error bars) are matched to rounding
+            'within_bars': np.nanmean(np.where(np.isnan(error), np.nan,
+                                               error <= bars + 1e-9 * np.abs(actual)), axis=0),
+        }, index=model.outputs)
+
+def build_surrogate(mission_data, profile=None, directory=DEFAULT_SURROGATE_DIR, **options):
+    """
+    Builds a surrogate of a mission with fit_surrogate() and stores it where
+    find_surrogate() looks for it.
+    Returns:
+        SurrogateModel: The model.
+    """
+    model = fit_surrogate(mission_data, profile=profile, **options)
+    model.save(surrogate_path(mission_data, profile, directory))
+    return model
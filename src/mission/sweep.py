@@ -0,0 +1,165 @@
+# src/mission/sweep.py
+
+import copy
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from mission.mission_loader import load_mission_from_dict
+from mission.result_cache import get_default_cache
+from mission.trajectory_simulator import DEFAULT_PROFILE, TrajectorySimulator
+from utils.log import get_logger, log, quiet
+
+logger = get_logger('sweep')
+
+# Stage fields a sweep is allowed to vary
+SWEEP_FIELDS = ('dry_mass', 'fuel_mass', 'num_engines')
+
+# Summary metrics reported for every sweep point
+SUMMARY_METRICS = ('burnout_altitude', 'burnout_velocity', 'max_velocity', 'total_time')
+
+def parse_parameter(name):
+    """
+    Splits a sweep parameter name of the form '<stage_index>.<field>'.
+    Args:
+        name (str): Parameter name, e.g. '0.fuel_mass'.
+    Returns:
+        tuple: (stage_index, field).
+    """
+    stage_index, _, field = name.partition('.')
+    if not stage_index.isdigit() or field not in SWEEP_FIELDS:
+        raise ValueError(
+            f"Invalid sweep parameter '{name}'. Expected '<stage_index>.<field>' "
+            f"with field one of {SWEEP_FIELDS}"
+        )
+    return int(stage_index), field
+
+def parse_values(spec):
+    """
+    Parses a command-line value spec: 'start:stop:num' for an inclusive range,
+    or a comma-separated list of values.
+    Args:
+        spec (str): The value spec.
+    Returns:
+        list: The parameter values.
+    """
+    if ':' in spec:
+        start, stop, num = spec.split(':')
+        return list(np.linspace(float(start), float(stop), int(num)))
+    return [float(value) for value in spec.split(',')]
+
+def build_grid(grid):
+    """
+    Expands parameter grids into the ordered list of sweep points.
+    Args:
+        grid (dict): Maps parameter names ('<stage_index>.<field>') to sequences of values.
+    Returns:
+        list: One dict of parameter values per point, in row-major grid order.
+    """
+    names = list(grid)
+    for name in names:
+        parse_parameter(name)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+def apply_point(mission_data, point):
+    """
+    Returns a copy of the mission data with the point's stage overrides applied.
+    """
+    mission = copy.deepcopy(mission_data)
+    for name, value in point.items():
+        stage_index, field = parse_parameter(name)
+        if field == 'num_engines':
+            value = int(round(value))
+        mission['stages'][stage_index][field] = value
+    return mission
+
+def summarize(results):
+    """
+    Reduces a simulation result to the sweep summary metrics.
+    """
+    summary = results.summary()
+    return {name: summary[name] for name in SUMMARY_METRICS}
+
+def _run_chunk(mission_data, chunk, use_cache=True, profile=None):
+    """
+    Simulates one batch of sweep points inside a worker process.
+    Args:
+        mission_data (dict): The parsed base mission.
+        chunk (list): (index, point) pairs.
+        use_cache (bool): Reuse and store results in the shared result cache.
+        profile (str, optional): Solver profile name.
+    Returns:
+        list: (index, metrics, error) tuples. Failed points carry an error message.
+    """
+    rows = []
+    for index, point in chunk:
+        try:
+            point_mission = apply_point(mission_data, point)
+            with quiet():
+                if use_cache:
+                    results, _ = get_default_cache().get_or_simulate(point_mission, profile=profile)
+                else:
+                    stages = load_mission_from_dict(point_mission)
+                    results = TrajectorySimulator(stages, profile or DEFAULT_PROFILE).simulate()
+            rows.append((index, summarize(results), None))
+        except Exception as e:
+            rows.append((index, None, f"{type(e).__name__}: {e}"))
+    return rows
+
+def run_sweep(mission, grid, max_workers=None, chunk_size=None, use_cache=True, profile=None):
+    """
+    Runs a parameter sweep over a mission in a pool of worker processes.
+    Args:
+        mission (str or dict): Path to a mission JSON file, or parsed mission data.
+        grid (dict): Maps parameter names ('<stage_index>.<field>') to sequences of values.
+        max_workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        chunk_size (int, optional): Points per task. Defaults to an even split into
+            about four tasks per worker.
+        use_cache (bool): Reuse and store point results in the shared result cache.
+        profile (str, optional): Solver profile name. Defaults to the simulator's default.
+    Returns:
+        pd.DataFrame: One row per point in grid order, with the parameter values,
+            the summary metrics and an 'error' column (None for successful points).
+    """
+    import pandas as pd
+
+    if isinstance(mission, str):
+        with open(mission, 'r') as f:
+            mission = json.load(f)
+
+    points = build_grid(grid)
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(points) // (4 * max_workers)))
+
+    indexed = list(enumerate(points))
+    chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+
+    log(logger, f"Sweeping {len(points)} points in {len(chunks)} tasks on {max_workers} workers",
+        event='sweep_start', points=len(points), tasks=len(chunks), workers=max_workers)
+
+    rows = [None] * len(points)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_chunk, mission, chunk, use_cache, profile) for chunk in chunks]
+        for future, chunk in zip(futures, chunks):
+            try:
+                chunk_rows = future.result()
+            except Exception as e:
+                # The worker itself died; mark every point of the task as failed
+                chunk_rows = [(index, None, f"{type(e).__name__}: {e}") for index, _ in chunk]
+            for index, metrics, error in chunk_rows:
+                rows[index] = (metrics, error)
+
+    records = []
+    for point, (metrics, error) in zip(points, rows):
+        record = dict(point)
+        record.update(metrics or {name: np.nan for name in SUMMARY_METRICS})
+        record['error'] = error
+        records.append(record)
+
+    failed = sum(error is not None for _, error in rows)
+    log(logger, f"Sweep complete: {len(points) - failed} succeeded, {failed} failed",
+        event='sweep_complete', succeeded=len(points) - failed, failed=failed)
+    return pd.DataFrame.from_records(records, columns=list(grid) + list(SUMMARY_METRICS) + ['error'])
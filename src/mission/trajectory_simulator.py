@@ -1,84 +1,287 @@
 # src/mission/trajectory_simulator.py
 
+import time
 import numpy as np
 from scipy.integrate import solve_ivp
-from utils import constants
+from utils import atmosphere, constants
+from utils.log import get_logger, log
+from mission.instrumentation import SimulationStats, counting_method
+from mission.simulation_result import SimulationResult
+from mission.solver_profiles import DEFAULT_PROFILE, SOLVER_PROFILES, get_solver_profile
+from mission.vehicle_model import (DEFAULT_RHS_BACKEND, compile_vehicle, make_coast_rhs,
+                                   make_rocket_rhs, resolve_rhs_backend)
+
+logger = get_logger('simulation')
+
+# Default upper bound on the unpowered coast after the last burn, in seconds
+COAST_MAX_DURATION = 86400.0
+
+# Where the coast after the last burn ends: at apogee, or past it through
+# reentry to ground impact. Both also end on impact or the coast duration limit.
+COAST_MODES = ('apogee', 'impact')
+
+def _event(function, terminal, direction):
+    """
+    Marks a function of (t, y) as a solve_ivp event.
+    """
+    function.terminal = terminal
+    function.direction = direction
+    return function
+
+def _apogee(t, y, *args):
+    # Only armed off the ground, so a vehicle waiting on the pad is not at apogee
+    return y[0] if y[1] > 0 else 1.0
+
+# Impact is detected this far below the surface, so a vehicle resting on the
+# pad (altitude exactly 0) does not trigger it
+GROUND_TOLERANCE = 1e-6 # meters
+
+def _ground_impact(t, y, *args):
+    return y[1] + GROUND_TOLERANCE
+
+def _phase_name(stage_number):
+    """
+    Returns the SimulationStats phase of a stage number (0 for the coast).
+    """
+    return f"stage_{stage_number}" if stage_number else 'coast'
+
+# Stage parameters that can be varied per vehicle in a batch simulation
+BATCH_PARAMETERS = ('fuel_mass', 'dry_mass', 'num_engines', 'thrust', 'isp')
 
 class TrajectorySimulator:
     """
     Simulates the trajectory of a multi-stage rocket.
     """
-    def __init__(self, stages):
+    def __init__(self, stages, profile=DEFAULT_PROFILE, checkpoints=None, rhs_backend=DEFAULT_RHS_BACKEND,
+                 coast_until='apogee', max_coast_duration=COAST_MAX_DURATION):
         """
         Initializes the simulator with a list of stages.
         Args:
             stages (list): A list of Stage objects.
+            profile (str or dict): Solver accuracy profile (see SOLVER_PROFILES).
+            checkpoints (CheckpointStore, optional): Stage-boundary checkpoints. Runs
+                resume after the deepest stored stage prefix and store the stages
+                they simulate.
+            rhs_backend (str): Backend of the compiled RHS (see mission.vehicle_model):
+                'auto', 'python' or 'numba'.
+            coast_until (str): End of the coast after the last burn (see COAST_MODES).
+            max_coast_duration (float): Longest coast after the last burn, in seconds.
         """
+        if coast_until not in COAST_MODES:
+            raise ValueError(f"Unknown coast mode '{coast_until}'. Available: {', '.join(COAST_MODES)}")
+        if max_coast_duration <= 0:
+            raise ValueError("max_coast_duration must be positive")
         self.stages = stages
+        self.coast_until = coast_until
+        self.max_coast_duration = max_coast_duration
+        self.checkpoints = checkpoints
         self.total_initial_mass = sum(s.total_mass for s in self.stages)
+        self.solver_settings = get_solver_profile(profile)
+        self.rhs_backend = resolve_rhs_backend(rhs_backend)
+        # Number of right-hand side evaluations in the last simulate() call
+        self.rhs_evaluations = 0
+        # Per-stage solver statistics of the last run
+        self.stats = SimulationStats()
 
-    def _atmospheric_model(self, altitude):
+    def _drag_acceleration(self, stage, velocity, altitude, mass):
         """
-        A simple exponential atmospheric density model.
+        Computes the deceleration due to aerodynamic drag, opposing the velocity.
         Args:
+            stage (Stage): The lowest attached stage, which sets the reference area and Cd.
+            velocity (float): Velocity in m/s.
             altitude (float): Altitude in meters.
+            mass (float): Current vehicle mass in kg.
         Returns:
-            float: Air density in kg/m^3.
+            float: Drag acceleration in m/s^2, signed like the velocity.
         """
-        # A very simplified model. Real models are more complex.
-        scale_height = 8500  # meters
-        sea_level_density = 1.225  # kg/m^3
-        return sea_level_density * np.exp(-altitude / scale_height)
+        if not stage.reference_area:
+            return 0
+        density, speed_of_sound = atmosphere.density_and_speed_of_sound(altitude)
+        if not density:
+            return 0
+        mach = abs(velocity) / speed_of_sound
+        drag_force = 0.5 * density * velocity * abs(velocity) * stage.drag_coefficient(mach) * stage.reference_area
+        return drag_force / mass
 
-    def _rocket_equation(self, t, y, current_stage, initial_stage_mass):
+    def _rocket_equation(self, t, y, current_stage, initial_stage_mass, engine_on=True):
         """
         Defines the differential equations for the rocket's flight.
-        This function is used by the ODE solver.
+        This is the reference model; the solver runs the equivalent compiled
+        closure from mission.vehicle_model.make_rocket_rhs().
         Args:
             t (float): Current time.
             y (list): State vector [velocity, altitude].
             current_stage (Stage): The currently firing stage.
             initial_stage_mass (float): The mass of the rocket at the start of the current stage burn.
+            engine_on (bool): Whether the engine fires during the integrated segment. Keeps
+                the segment's end points on the right side of ignition and cutoff.
         Returns:
             list: The derivatives [acceleration, velocity].
         """
         velocity, altitude = y
         
-        # Calculate current mass
+        # Calculate current mass. Burnout is a terminal solver event, so the
+        # mass never drops below the stage's burnout mass here.
         mass_flow_rate = current_stage.get_mass_flow_rate()
         current_mass = initial_stage_mass - mass_flow_rate * t
 
-        if current_mass <= current_stage.dry_mass:
-            return [0, velocity] # Burnout
-
         # Get thrust from the engine
-        thrust = current_stage.get_thrust(t)
+        thrust = current_stage.get_thrust(t) if engine_on else 0
 
         # Calculate gravitational acceleration
         g = constants.G * (constants.EARTH_RADIUS / (constants.EARTH_RADIUS + altitude))**2
         
-        # Simple drag model (can be improved)
-        # For this simulation, we'll keep it simple and ignore it for now
-        # to focus on the core propulsion dynamics.
-        # drag_force = 0.5 * self._atmospheric_model(altitude) * velocity**2 * drag_coefficient * area
-        # drag_accel = drag_force / current_mass
-        drag_accel = 0
+        # Aerodynamic drag from the tabulated standard atmosphere
+        drag_accel = self._drag_acceleration(current_stage, velocity, altitude, current_mass)
 
         # Acceleration
         acceleration = (thrust / current_mass) - g - drag_accel
+
+        # The launch pad holds the vehicle down until thrust exceeds weight
+        if altitude <= 0 and velocity <= 0 and acceleration < 0:
+            acceleration = 0
         
         return [acceleration, velocity]
 
+    def _coast_equation(self, t, y, mass, stage):
+        """
+        Defines the differential equations for unpowered flight after the last burn.
+        The solver runs the equivalent closure from mission.vehicle_model.make_coast_rhs().
+        Args:
+            t (float): Time since the start of the coast.
+            y (list): State vector [velocity, altitude].
+            mass (float): The constant mass of the coasting vehicle.
+            stage (Stage): The spent final stage, which sets the drag properties.
+        Returns:
+            list: The derivatives [acceleration, velocity].
+        """
+        velocity, altitude = y
+        g = constants.G * (constants.EARTH_RADIUS / (constants.EARTH_RADIUS + altitude))**2
+        drag_accel = self._drag_acceleration(stage, velocity, altitude, mass)
+        return [-g - drag_accel, velocity]
+
+    def _engine_edges(self, stage, burn_duration):
+        """
+        Returns the engine ignition and cutoff times that fall inside a stage's burn.
+        Thrust is discontinuous at these known times, so they bound the integration
+        segments directly rather than being searched for by the solver.
+        Args:
+            stage (Stage): The firing stage.
+            burn_duration (float): Time until the stage's propellant is depleted.
+        Returns:
+            list: Sorted (time, event name) pairs.
+        """
+        ignition, cutoff = stage.engine.get_burn_window()
+        edges = []
+        if 0 < ignition < burn_duration:
+            edges.append((ignition, 'engine_ignition'))
+        if 0 < cutoff < burn_duration:
+            edges.append((cutoff, 'engine_cutoff'))
+        return sorted(edges)
+
+    def _solve(self, fun, t_span, y0, events, args=(), phase=None, **overrides):
+        """
+        Integrates one smooth flight segment with the configured solver settings,
+        adding its solver counters to `phase` in self.stats. Keyword arguments
+        override solver settings.
+        """
+        settings = {key: value for key, value in self.solver_settings.items()
+                    if key != 'sample_interval'}
+        settings.update(overrides)
+        counter = {}
+        settings['method'] = counting_method(settings.get('method', 'RK45'), counter)
+        start = time.perf_counter()
+        sol = solve_ivp(fun, t_span, y0, args=args, events=events, **settings)
+        self.stats.record_solve(phase, sol, time.perf_counter() - start,
+                                counter.get('rejected_steps', 0))
+        self.rhs_evaluations += sol.nfev
+        return sol
+
+    def _sample(self, sol, include_end):
+        """
+        Returns the recording times of a solved segment and the states at those times.
+        Args:
+            sol (OdeResult): The solved segment.
+            include_end (bool): Whether to record the segment's final point.
+        Returns:
+            tuple: (times, states) with states of shape (2, len(times)).
+        """
+        interval = self.solver_settings.get('sample_interval')
+        if sol.sol is None or not interval:
+            end = len(sol.t) if include_end else len(sol.t) - 1
+            return sol.t[:end], sol.y[:, :end]
+
+        times = np.arange(sol.t[0], sol.t[-1], interval)
+        if include_end:
+            times = np.append(times, sol.t[-1])
+        return times, sol.sol(times)
+
     def simulate(self):
         """
-        Runs the full multi-stage trajectory simulation.
+        Runs the full multi-stage trajectory simulation, followed by an unpowered
+        coast after the last burn: to apogee (or ground impact), or with
+        coast_until='impact' through apogee and reentry to ground impact.
+        Either coast stops after max_coast_duration seconds.
+
+        Each burn is integrated in smooth segments bounded by engine ignition and
+        cutoff, and ends on the terminal propellant depletion or ground impact
+        events, so the solver never steps across a discontinuity.
         Returns:
-            dict: A dictionary containing the simulation results (time, altitude, velocity, etc.).
+            SimulationResult: Columnar simulation results (time, altitude, velocity, etc.).
+                Coast samples have stage 0. Located events are listed in its `events`,
+                and per-stage solver statistics in its `stats` (a SimulationStats).
         """
-        results = {
-            'time': [], 'altitude': [], 'velocity': [], 
-            'mass': [], 'thrust': [], 'stage': []
-        }
+        chunks = list(self.iter_simulate())
+        result = SimulationResult.concatenate(chunks)
+        result.events = [event for chunk in chunks for event in chunk.events]
+        result.stats = self.stats
+        return result
+
+    def record(self, recorder, chunk_duration=None):
+        """
+        Runs the simulation into a TrajectoryRecorder (see mission.recorder), so a
+        long flight is kept decimated, in a bounded buffer or spilled to disk,
+        instead of in full in memory.
+        Args:
+            recorder (TrajectoryRecorder): Receives the chunks; closed at the end.
+            chunk_duration (float, optional): Flight time per chunk, in seconds.
+                Defaults to mission.recorder.RECORD_CHUNK_DURATION.
+        Returns:
+            SimulationResult: The recording (see TrajectoryRecorder.result()),
+                with per-stage solver statistics in its `stats`.
+        """
+        from mission.recorder import RECORD_CHUNK_DURATION
+        with recorder:
+            for chunk in self.iter_simulate(chunk_duration or RECORD_CHUNK_DURATION):
+                recorder.record(chunk)
+        result = recorder.result()
+        result.stats = self.stats
+        return result
+
+    def iter_simulate(self, chunk_duration=None):
+        """
+        Runs the simulation like simulate(), yielding the trajectory in chunks as
+        integration proceeds instead of returning it at the end.
+
+        Without a chunk duration, a chunk is yielded for every integrated segment:
+        each burn between engine edges, and the coast. With one, segments are also
+        split every `chunk_duration` seconds of flight time. Restarting the solver
+        at those points costs a few extra RHS evaluations, so the samples can differ
+        from simulate() within the solver tolerances.
+        Args:
+            chunk_duration (float, optional): Longest stretch of flight time per chunk, in seconds.
+        Yields:
+            SimulationResult: The next rows of the trajectory. Its `events` lists
+                the events located within the chunk. Solver statistics accumulate
+                in self.stats; time spent by the consumer between chunks is not counted.
+        """
+        if chunk_duration is not None and chunk_duration <= 0:
+            raise ValueError("chunk_duration must be positive")
+
+        events = []
+        self.rhs_evaluations = 0
+        self.stats = stats = SimulationStats()
+        resumed = time.perf_counter()
         
         current_mass = self.total_initial_mass
         time_offset = 0
@@ -86,49 +289,520 @@ class TrajectorySimulator:
         # Initial conditions
         y0 = [0, 0] # Initial velocity and altitude
 
+        def log_event(name, stage_number, t, y):
+            events.append({
+                'event': name,
+                'stage': stage_number,
+                'time': float(time_offset + t),
+                'altitude': float(y[1]) / 1000, # convert to km
+                'velocity': float(y[0]),
+            })
+
+        def chunk(sol, stage_number, include_end, mass, thrust):
+            phase = _phase_name(stage_number)
+            start = time.perf_counter()
+            sim_times, (velocity, altitude) = self._sample(sol, include_end)
+            stats.add(phase, 'sample_time', time.perf_counter() - start)
+            result = SimulationResult.concatenate([{
+                'time': sim_times + time_offset,
+                'altitude': altitude / 1000, # convert to km
+                'velocity': velocity,
+                'mass': mass(sim_times),
+                'thrust': thrust(sim_times),
+                'stage': stage_number,
+            }])
+            result.events = events[:]
+            events.clear()
+            # Called right before every yield, so this closes the phase's work since the last resume
+            stats.add(phase, 'wall_time', time.perf_counter() - resumed)
+            return result
+
+        impact = _event(_ground_impact, True, -1)
+        impacted = False
+
+        vehicle = compile_vehicle(self.stages)
+        keys = None
+        if self.checkpoints is not None:
+            from mission.checkpoints import prefix_keys
+            keys = prefix_keys(self.stages, self.solver_settings, chunk_duration)
+
         for i, stage in enumerate(self.stages):
-            print(f"\n--- Simulating Stage {i+1}: {stage.stage_name} ---")
-            
-            burn_duration = stage.fuel_mass / stage.get_mass_flow_rate()
-            t_span = [0, burn_duration]
-            
-            # We need to pass extra arguments to the solver
-            args = (stage, current_mass)
-
-            # Solve the ODEs for this stage
-            sol = solve_ivp(
-                self._rocket_equation, 
-                t_span, 
-                y0, 
-                args=args,
-                dense_output=True,
-                max_step=1.0 # Use smaller steps for better resolution
-            )
-
-            # Record results for this stage
-            sim_times = sol.t
-            for t in sim_times:
-                velocity, altitude = sol.sol(t)
-                mass = current_mass - stage.get_mass_flow_rate() * t
-                
-                results['time'].append(t + time_offset)
-                results['altitude'].append(altitude / 1000) # convert to km
-                results['velocity'].append(velocity)
-                results['mass'].append(mass)
-                results['thrust'].append(stage.get_thrust(t))
-                results['stage'].append(i + 1)
-
-            # Update state for the next stage
-            final_velocity, final_altitude = sol.y[:, -1]
-            y0 = [final_velocity, final_altitude]
-            time_offset += sol.t[-1]
+            # Splice in stored stages for as long as the prefix is unchanged
+            checkpoint = self.checkpoints.get(keys[i]) if keys and len(stats.reused_stages) == i else None
+            if checkpoint is not None:
+                state = checkpoint.state
+                y0 = [state['velocity'], state['altitude']]
+                current_mass = state['current_mass']
+                burnout_mass = state['burnout_mass']
+                time_offset = state['time_offset']
+                impacted = state['impacted']
+                stats.reused_stages.append(i + 1)
+                log(logger, f"Stage {i+1} reused from checkpoint. T+ {time_offset:.2f}s",
+                    event='stage_reused', stage=i + 1, time=time_offset)
+                yield checkpoint.result
+                resumed = time.perf_counter()
+                if impacted:
+                    break
+                continue
+
+            log(logger, f"\n--- Simulating Stage {i+1}: {stage.stage_name} ---",
+                event='stage_start', stage=i + 1, stage_name=stage.stage_name)
             
-            # Jettison the current stage's dry mass
-            current_mass -= stage.dry_mass
-            current_mass -= stage.fuel_mass # Fuel is already burned
+            mass_flow_rate = stage.get_mass_flow_rate()
+            burn_duration = stage.fuel_mass / mass_flow_rate
+            edges = self._engine_edges(stage, burn_duration)
+            ignition, cutoff = stage.engine.get_burn_window()
+            depletion = _event(
+                lambda t, y, *args: stage.fuel_mass - mass_flow_rate * t, True, -1)
+            apogee = _event(_apogee, False, -1)
+            stage_mass = current_mass
+            t_local = 0.0
+            stage_chunks = []
+
+            while True:
+                if edges:
+                    t_bound, name = edges[0]
+                else:
+                    # Integrate slightly past depletion so the depletion event always fires
+                    t_bound, name = burn_duration * (1 + 1e-9) + 1e-9, 'propellant_depletion'
+                if chunk_duration and t_bound - t_local > chunk_duration:
+                    t_bound, name = t_local + chunk_duration, None
+                elif edges:
+                    edges.pop(0)
+
+                engine_on = ignition <= (t_local + t_bound) / 2 <= cutoff
+                sol = self._solve(
+                    make_rocket_rhs(vehicle[i], stage_mass, engine_on, self.rhs_backend),
+                    [t_local, t_bound],
+                    y0,
+                    [depletion, impact, apogee],
+                    phase=_phase_name(i + 1)
+                )
+
+                for t_apogee, y_apogee in zip(sol.t_events[2], sol.y_events[2]):
+                    log_event('apogee', i + 1, t_apogee, y_apogee)
+                if len(sol.t_events[1]):
+                    name = 'ground_impact'
+                elif len(sol.t_events[0]):
+                    name = 'propellant_depletion'
+
+                stage_done = name in ('propellant_depletion', 'ground_impact')
+                t_local = sol.t[-1]
+                y0 = list(sol.y[:, -1])
+                if name is not None:
+                    log_event(name, i + 1, t_local, y0)
+                if stage_done:
+                    break
+                stage_chunks.append(chunk(sol, i + 1, False,
+                                          lambda ts: stage_mass - mass_flow_rate * ts,
+                                          stage.get_thrust if engine_on else np.zeros_like))
+                yield stage_chunks[-1]
+                resumed = time.perf_counter()
+                if name is not None:
+                    log(logger, f"{name.replace('_', ' ').capitalize()}. T+ {time_offset + t_local:.2f}s",
+                        event=name, stage=i + 1, time=time_offset + t_local)
+
+            final_velocity, final_altitude = y0
+            burnout_mass = stage_mass - mass_flow_rate * t_local
+
+            if name == 'ground_impact':
+                impacted = True
+            else:
+                # Jettison the current stage's dry mass
+                current_mass -= stage.dry_mass
+                current_mass -= stage.fuel_mass # Fuel is already burned
+                if i + 1 < len(self.stages):
+                    log_event('stage_separation', i + 1, t_local, y0)
+
+            # The stage's last chunk carries its closing events, so it is cut
+            # before the time offset moves on to the next stage
+            last_chunk = chunk(sol, i + 1, True,
+                               lambda ts: stage_mass - mass_flow_rate * ts,
+                               stage.get_thrust if engine_on else np.zeros_like)
+            time_offset += t_local
+            if keys:
+                self._store_checkpoint(keys[i], stage_chunks + [last_chunk], {
+                    'velocity': y0[0],
+                    'altitude': y0[1],
+                    'current_mass': current_mass,
+                    'burnout_mass': burnout_mass,
+                    'time_offset': time_offset,
+                    'impacted': impacted,
+                })
+            yield last_chunk
+            resumed = time.perf_counter()
+
+            if impacted:
+                log(logger, f"Ground impact during stage {i+1}. T+ {time_offset:.2f}s",
+                    event='ground_impact', stage=i + 1, time=time_offset)
+                break
             
-            print(f"Stage {i+1} separation. T+ {time_offset:.2f}s")
-            print(f"Altitude: {final_altitude/1000:.2f} km, Velocity: {final_velocity:.2f} m/s")
+            if i + 1 < len(self.stages):
+                log(logger, f"Stage {i+1} separation. T+ {time_offset:.2f}s",
+                    event='stage_separation', stage=i + 1, time=time_offset)
+            else:
+                log(logger, f"Stage {i+1} burnout. T+ {time_offset:.2f}s",
+                    event='burnout', stage=i + 1, time=time_offset)
+            log(logger, f"Altitude: {final_altitude/1000:.2f} km, Velocity: {final_velocity:.2f} m/s",
+                event='state', stage=i + 1, time=time_offset,
+                altitude=final_altitude / 1000, velocity=final_velocity)
+
+        if not impacted:
+            log(logger, "\n--- Coasting ---", event='coast_start')
+            t_coast = 0.0
+            name = None
+            to_apogee = self.coast_until == 'apogee'
+            while name is None:
+                t_end = self.max_coast_duration
+                if chunk_duration:
+                    t_end = min(t_coast + chunk_duration, self.max_coast_duration)
+                sol = self._solve(
+                    make_coast_rhs(vehicle[-1], burnout_mass, self.rhs_backend),
+                    [t_coast, t_end],
+                    y0,
+                    [_event(_apogee, to_apogee, -1), impact],
+                    phase=_phase_name(0)
+                )
+
+                if not to_apogee:
+                    # Apogee is passed through; record it on the way
+                    for t_apogee, y_apogee in zip(sol.t_events[0], sol.y_events[0]):
+                        log_event('apogee', 0, t_apogee, y_apogee)
+                if to_apogee and len(sol.t_events[0]):
+                    name = 'apogee'
+                elif len(sol.t_events[1]):
+                    name = 'ground_impact'
+                elif sol.t[-1] >= self.max_coast_duration:
+                    name = 'coast_limit'
+                t_coast = sol.t[-1]
+                y0 = sol.y[:, -1]
+                if name is not None:
+                    log_event(name, 0, t_coast, y0)
+                yield chunk(sol, 0, name is not None,
+                            lambda ts: np.full(len(ts), burnout_mass), np.zeros_like)
+                resumed = time.perf_counter()
+
+            time_offset += t_coast
+            log(logger, f"{name.replace('_', ' ').capitalize()}. T+ {time_offset:.2f}s",
+                event=name, stage=0, time=time_offset)
+            log(logger, f"Altitude: {y0[1]/1000:.2f} km, Velocity: {y0[0]:.2f} m/s",
+                event='state', stage=0, time=time_offset, altitude=y0[1] / 1000, velocity=y0[0])
+
+        log(logger, "\n--- Simulation Complete ---", event='complete',
+            rhs_evaluations=self.rhs_evaluations)
+
+    def _store_checkpoint(self, key, chunks, state):
+        """
+        Stores the rows, events and end state of a simulated stage.
+        """
+        from mission.checkpoints import StageCheckpoint
+        result = SimulationResult.concatenate(chunks)
+        result.events = [event for chunk in chunks for event in chunk.events]
+        self.checkpoints.put(key, StageCheckpoint(result, {
+            name: value if isinstance(value, bool) else float(value) for name, value in state.items()
+        }))
+
+    def simulate_sensitivities(self, error_control=False):
+        """
+        Runs the trajectory like simulate(), integrating the forward sensitivity
+        (variational) equations with respect to every stage's isp, thrust,
+        dry_mass and fuel_mass alongside the state in the same solver pass (see
+        mission.sensitivity).
+        Args:
+            error_control (bool): Whether the sensitivities take part in the solver's
+                step size control. By default steps are chosen for the state alone,
+                as in simulate(), and the sensitivities follow the same steps. Error
+                control on them takes several times more steps.
+        Returns:
+            SensitivityResult: The Jacobians of the time, velocity, altitude and
+                mass at every stage end and at the end of the coast.
+        """
+        from mission.sensitivity import (STATE_QUANTITIES, SensitivityResult, make_variational_rhs,
+                                         parameter_names, parameter_values, stage_sensitivities)
+        start = time.perf_counter()
+        names = parameter_names(len(self.stages))
+        values = parameter_values(self.stages)
+        num_parameters = len(names)
+        self.rhs_evaluations = 0
+        self.stats = SimulationStats()
+        log(logger, f"\n--- Simulating sensitivities to {num_parameters} parameters ---",
+            event='sensitivity_start', parameters=num_parameters)
+
+        boundaries = []
+        vehicle = compile_vehicle(self.stages)
+        impact = _event(_ground_impact, True, -1)
+        y0 = np.zeros(2 + 2 * num_parameters)
+        # Nothing is sampled between boundaries, so no dense output
+        settings = {'dense_output': False}
+        if not error_control:
+            atol = self.solver_settings['atol']
+            settings['atol'] = np.concatenate((np.full(2, atol), np.full(2 * num_parameters, np.inf)))
+        time_offset = 0.0
+        time_sensitivity = np.zeros(num_parameters)
+        current_mass = self.total_initial_mass
+
+        def close_segment(name, stage_number, sol, rhs, duration_sensitivity, mass, mass_flow_rate):
+            """
+            Adds f(T) dT/dp of the segment's end time T to the state's sensitivities
+            and records a boundary.
+            Args:
+                duration_sensitivity (np.ndarray): Scaled dT/dp, or None for a located event.
+                mass (tuple): Mass and its scaled sensitivities at local time 0.
+                mass_flow_rate (tuple): Mass flow rate and its scaled sensitivities.
+            Returns:
+                tuple: The end state with corrected sensitivities, and the end mass
+                    with its sensitivities.
+            """
+            nonlocal time_offset, time_sensitivity
+            t, y = sol.t[-1], sol.y[:, -1]
+            derivatives = rhs(t, y)
+            if duration_sensitivity is None:
+                # Apogee is where the velocity, impact where the altitude crosses zero
+                row = 0 if name == 'apogee' else 1
+                duration_sensitivity = -y[2 + row * num_parameters:2 + (row + 1) * num_parameters] / derivatives[row]
+            sensitivity = y[2:].reshape(2, num_parameters) + np.outer(derivatives[:2], duration_sensitivity)
+            end_mass = mass[0] - mass_flow_rate[0] * t
+            end_mass_sensitivity = mass[1] - mass_flow_rate[1] * t - mass_flow_rate[0] * duration_sensitivity
+            time_offset += t
+            time_sensitivity = time_sensitivity + duration_sensitivity
+            boundaries.append({
+                'event': name,
+                'stage': stage_number,
+                'state': dict(zip(STATE_QUANTITIES,
+                                  (float(time_offset), float(y[0]), float(y[1]) / 1000, float(end_mass)))),
+                # Unscaled, with altitude in km
+                'jacobian': np.vstack((time_sensitivity, sensitivity[0], sensitivity[1] / 1000,
+                                       end_mass_sensitivity)) / values,
+            })
+            return np.concatenate((y[:2], sensitivity.ravel())), (end_mass, end_mass_sensitivity)
+
+        name = None
+        for i, stage in enumerate(self.stages):
+            mass_flow_rate = stage.get_mass_flow_rate()
+            burn_duration = stage.fuel_mass / mass_flow_rate
+            edges = self._engine_edges(stage, burn_duration)
+            ignition, cutoff = stage.engine.get_burn_window()
+            depletion = _event(
+                lambda t, y, *args: stage.fuel_mass - mass_flow_rate * t, True, -1)
+            initial_mass, mass_flow, duration, thrust_index = stage_sensitivities(self.stages, i)
+            t_local = 0.0
+
+            while True:
+                if edges:
+                    t_bound, name = edges.pop(0)
+                else:
+                    t_bound, name = burn_duration * (1 + 1e-9) + 1e-9, 'propellant_depletion'
+                engine_on = ignition <= (t_local + t_bound) / 2 <= cutoff
+                rhs = make_variational_rhs(vehicle[i], current_mass, initial_mass, mass_flow_rate,
+                                           mass_flow, thrust_index, engine_on)
+                sol = self._solve(rhs, [t_local, t_bound], y0, [depletion, impact],
+                                  phase=_phase_name(i + 1), **settings)
+                if len(sol.t_events[1]):
+                    name = 'ground_impact'
+                elif len(sol.t_events[0]):
+                    name = 'propellant_depletion'
+                t_local = sol.t[-1]
+                y0 = sol.y[:, -1]
+                if name in ('propellant_depletion', 'ground_impact'):
+                    break
+
+            # Propellant depletion ends the burn at fuel_mass / mass_flow_rate
+            y0, burnout = close_segment(name, i + 1, sol, rhs, duration if name != 'ground_impact' else None,
+                                        (current_mass, initial_mass), (mass_flow_rate, mass_flow))
+            if name == 'ground_impact':
+                break
+            current_mass -= stage.dry_mass + stage.fuel_mass
+
+        if name != 'ground_impact':
+            rhs = make_variational_rhs(vehicle[-1], burnout[0], burnout[1])
+            no_flow = (0.0, np.zeros(num_parameters))
+            to_apogee = True
+            t_coast = 0.0
+            coast_start = time_sensitivity
+            while True:
+                sol = self._solve(rhs, [0.0, self.max_coast_duration - t_coast], y0,
+                                  [_event(_apogee, to_apogee, -1), impact], phase=_phase_name(0),
+                                  **settings)
+                if to_apogee and len(sol.t_events[0]):
+                    name, duration = 'apogee', None
+                elif len(sol.t_events[1]):
+                    name, duration = 'ground_impact', None
+                else:
+                    # The coast's total duration is fixed
+                    name, duration = 'coast_limit', coast_start - time_sensitivity
+                t_coast += sol.t[-1]
+                y0, _ = close_segment(name, 0, sol, rhs, duration, burnout, no_flow)
+                if name != 'apogee' or self.coast_until == 'apogee':
+                    break
+                # Continue past apogee; the coast does not depend on time, so it restarts at 0
+                to_apogee = False
+
+        log(logger, "\n--- Sensitivity Simulation Complete ---", event='sensitivity_complete',
+            rhs_evaluations=self.rhs_evaluations)
+        info = {
+            'method': 'variational',
+            'profile': next((name for name, settings in SOLVER_PROFILES.items()
+                             if settings == self.solver_settings), 'custom'),
+            'error_control': error_control,
+            'simulations': 1,
+            'rhs_evaluations': self.rhs_evaluations,
+            'elapsed': time.perf_counter() - start,
+        }
+        return SensitivityResult(names, values, boundaries, info)
+
+    def _expand_batch_parameters(self, parameter_sets):
+        """
+        Expands a batch description into per-vehicle, per-stage parameter arrays.
+        Args:
+            parameter_sets (list or dict): Either a list of dicts (one per vehicle) or a
+                dict of arrays with one row per vehicle. Each value is a scalar applied to
+                every stage or a sequence with one entry per stage (None keeps the base value).
+        Returns:
+            dict: Arrays of shape (num_vehicles, num_stages) for each batch parameter.
+        """
+        num_stages = len(self.stages)
+        base = {
+            'fuel_mass': [s.fuel_mass for s in self.stages],
+            'dry_mass': [s.dry_mass for s in self.stages],
+            'num_engines': [s.num_engines for s in self.stages],
+            'thrust': [s.engine.thrust for s in self.stages],
+            'isp': [s.engine.isp for s in self.stages],
+        }
+
+        if isinstance(parameter_sets, dict):
+            lengths = {len(np.atleast_1d(v)) for v in parameter_sets.values()}
+            if len(lengths) != 1:
+                raise ValueError("All parameter arrays must have the same number of vehicles")
+            num_vehicles = lengths.pop()
+            parameter_sets = [
+                {key: np.atleast_1d(value)[n] for key, value in parameter_sets.items()}
+                for n in range(num_vehicles)
+            ]
+
+        num_vehicles = len(parameter_sets)
+        if num_vehicles == 0:
+            raise ValueError("At least one parameter set is required")
+
+        params = {key: np.tile(np.asarray(values, dtype=float), (num_vehicles, 1))
+                  for key, values in base.items()}
+        for n, overrides in enumerate(parameter_sets):
+            for key, value in overrides.items():
+                if key not in BATCH_PARAMETERS:
+                    raise ValueError(f"Unknown batch parameter: {key}")
+                if np.ndim(value) == 0:
+                    params[key][n, :] = value
+                    continue
+                if len(value) != num_stages:
+                    raise ValueError(f"'{key}' needs one value per stage ({num_stages})")
+                for i, stage_value in enumerate(value):
+                    if stage_value is not None:
+                        params[key][n, i] = stage_value
+        return params
+
+    def simulate_batch(self, parameter_sets):
+        """
+        Simulates many variants of the vehicle together, advancing them as one NumPy state.
+
+        Every stage is split into up to three segments per vehicle (before ignition,
+        burning, after engine cutoff). Thrust comes from each engine's tabulated
+        thrust curve, evaluated for all vehicles at once. Each vehicle runs on its own normalized clock
+        in which every segment has unit length, so staging and cutoff points line up
+        across the whole batch and are hit exactly even though their physical times
+        differ per vehicle. Zero-length segments are masked out with a zero time scale.
+        Args:
+            parameter_sets (list or dict): Variants of 'fuel_mass', 'dry_mass',
+                'num_engines', 'thrust' and 'isp' (see _expand_batch_parameters).
+        Returns:
+            dict: 'time', 'altitude' (km), 'velocity', 'mass', 'thrust' and 'stage', each an
+                array of shape (num_vehicles, num_samples). The batch ends at final
+                burnout; unlike simulate() it has no coast phase.
+        """
+        params = self._expand_batch_parameters(parameter_sets)
+        num_vehicles, num_stages = params['fuel_mass'].shape
+
+        mass_flow = params['thrust'] / (params['isp'] * constants.G) * params['num_engines']
+        burn_duration = params['fuel_mass'] / mass_flow
+        stage_mass = params['fuel_mass'] + params['dry_mass']
+        # Vehicle mass at each stage ignition: this stage plus everything above it
+        initial_mass = np.cumsum(stage_mass[:, ::-1], axis=1)[:, ::-1]
+
+        log(logger, f"\n--- Simulating batch of {num_vehicles} vehicles ({num_stages} stages) ---",
+            event='batch_start', vehicles=num_vehicles, stages=num_stages)
+        self.stats = SimulationStats()
+        self.rhs_evaluations = 0
+
+        chunks = {key: [] for key in ('time', 'altitude', 'velocity', 'mass', 'thrust', 'stage')}
+        y0 = np.zeros(2 * num_vehicles)
+        time_offset = np.zeros(num_vehicles)
+
+        for i, stage in enumerate(self.stages):
+            window = np.clip(stage.engine.get_burn_window(), 0, burn_duration[:, i, None])
+            edges = np.column_stack((np.zeros(num_vehicles), window, burn_duration[:, i]))
+            # Per-vehicle scaling of the engine's tabulated thrust curve
+            thrust_scale = params['thrust'][:, i] / stage.engine.thrust * params['num_engines'][:, i]
+            m0 = initial_mass[:, i]
+            mdot = mass_flow[:, i]
+
+            for segment in range(3):
+                start = edges[:, segment]
+                length = edges[:, segment + 1] - start
+                if not length.any():
+                    continue
+                engine_on = segment == 1
+
+                def thrust_at(local_t, engine_on=engine_on):
+                    if not engine_on:
+                        return np.zeros_like(local_t)
+                    return thrust_scale.reshape((-1,) + (1,) * (local_t.ndim - 1)) * stage.engine.get_thrust(local_t)
+
+                def rhs(tau, y, start=start, length=length, thrust_at=thrust_at):
+                    velocity = y[:num_vehicles]
+                    altitude = y[num_vehicles:]
+                    local_t = start + tau * length
+                    mass = m0 - mdot * local_t
+                    g = constants.G * (constants.EARTH_RADIUS / (constants.EARTH_RADIUS + altitude))**2
+                    acceleration = thrust_at(local_t) / mass - g
+                    if stage.reference_area:
+                        density = atmosphere.density(altitude)
+                        mach = np.abs(velocity) / atmosphere.speed_of_sound(altitude)
+                        drag = (0.5 * density * velocity * np.abs(velocity)
+                                * stage.drag_coefficient(mach) * stage.reference_area)
+                        acceleration -= drag / mass
+                    # The launch pad holds vehicles down until thrust exceeds weight
+                    on_pad = (altitude <= 0) & (velocity <= 0) & (acceleration < 0)
+                    acceleration = np.where(on_pad, 0.0, acceleration)
+                    return np.concatenate((acceleration * length, velocity * length))
+
+                counter = {}
+                start_time = time.perf_counter()
+                sol = solve_ivp(
+                    rhs,
+                    [0, 1],
+                    y0,
+                    method=counting_method(self.solver_settings['method'], counter),
+                    rtol=self.solver_settings['rtol'],
+                    atol=self.solver_settings['atol'],
+                    max_step=self.solver_settings['max_step'] / length.max()
+                )
+                elapsed = time.perf_counter() - start_time
+                self.stats.record_solve(_phase_name(i + 1), sol, elapsed, counter.get('rejected_steps', 0))
+                self.stats.add(_phase_name(i + 1), 'wall_time', elapsed)
+                self.rhs_evaluations += sol.nfev
+
+                local_t = start[:, None] + sol.t[None, :] * length[:, None]
+                chunks['time'].append(local_t + time_offset[:, None])
+                chunks['velocity'].append(sol.y[:num_vehicles])
+                chunks['altitude'].append(sol.y[num_vehicles:] / 1000) # convert to km
+                chunks['mass'].append(m0[:, None] - mdot[:, None] * local_t)
+                chunks['thrust'].append(thrust_at(local_t))
+                chunks['stage'].append(np.full(local_t.shape, i + 1))
+                y0 = sol.y[:, -1]
+
+            time_offset += burn_duration[:, i]
+            log(logger, f"Stage {i+1} separation. T+ {time_offset.min():.2f}s to {time_offset.max():.2f}s",
+                event='stage_separation', stage=i + 1,
+                time_min=time_offset.min(), time_max=time_offset.max())
 
-        print("\n--- Simulation Complete ---")
-        return results
+        log(logger, "--- Batch Simulation Complete ---", event='batch_complete',
+            rhs_evaluations=self.rhs_evaluations)
+        return {key: np.concatenate(values, axis=1) for key, values in chunks.items()}
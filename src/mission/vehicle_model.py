@@ -0,0 +1,225 @@
+# src/mission/vehicle_model.py
+
+"""
+Compiled vehicle model for the trajectory RHS.
+
+TrajectorySimulator._rocket_equation walks Stage and engine methods, the drag
+and atmosphere helpers and the constants module on every call. compile_vehicle()
+flattens a loaded mission into CompiledStages once per run: plain numbers and
+lists for the thrust table, drag table and mass flow rate. make_rocket_rhs() and
+make_coast_rhs() then build a closure over one stage's values, so the solver's
+hot path only touches local variables.
+
+Two backends build the closures:
+    python  Pure Python with the tables inlined. Bit-identical to the reference
+            equations in TrajectorySimulator.
+    numba   A Numba-compiled kernel, used when the optional numba package is
+            installed. Matches the reference within rounding.
+'auto' (the default, or the STELLARLAB_RHS_BACKEND environment variable) picks
+numba when it can be imported and python otherwise.
+"""
+
+import os
+from bisect import bisect_right
+
+import numpy as np
+from utils import aerodynamics, atmosphere, constants
+
+RHS_BACKENDS = ('auto', 'python', 'numba')
+DEFAULT_RHS_BACKEND = os.environ.get('STELLARLAB_RHS_BACKEND', 'auto')
+
+# Atmosphere table as Python lists, the fastest to index from Python
+_DENSITY = atmosphere.DENSITY.tolist()
+_SPEED_OF_SOUND = atmosphere.SPEED_OF_SOUND.tolist()
+
+class CompiledStage:
+    """
+    The values of a Stage that the equations of motion read, flattened.
+    """
+    __slots__ = ('num_engines', 'mass_flow_rate', 'thrust_times', 'thrust_values',
+                 'thrust_slopes', 'reference_area', 'cd_grid')
+
+    def __init__(self, stage):
+        """
+        Args:
+            stage (Stage): The stage to compile.
+        """
+        times, thrust = stage.engine.get_thrust_table()
+        self.num_engines = stage.num_engines
+        self.mass_flow_rate = stage.get_mass_flow_rate()
+        self.thrust_times = times.tolist()
+        self.thrust_values = thrust.tolist()
+        # Slopes computed like np.interp does, so the interpolation matches it exactly
+        self.thrust_slopes = ((thrust[1:] - thrust[:-1]) / (times[1:] - times[:-1])).tolist()
+        self.reference_area = stage.reference_area
+        # Cd on the uniform Mach grid of the drag table (see DragCoefficient)
+        self.cd_grid = stage.drag_coefficient._grid_cd
+
+def compile_vehicle(stages):
+    """
+    Compiles the stages of a mission.
+    Args:
+        stages (list): Stage objects, lowest first.
+    Returns:
+        list: A CompiledStage per stage.
+    """
+    return [CompiledStage(stage) for stage in stages]
+
+_numba_kernels = None
+
+def _load_numba_kernels():
+    """
+    Returns the (rocket, coast) Numba kernels of mission.rhs_kernels, or None if
+    numba is not installed.
+    """
+    global _numba_kernels
+    if _numba_kernels is None:
+        try:
+            from mission import rhs_kernels
+        except ImportError:
+            return None
+        _numba_kernels = (rhs_kernels.rocket_rhs, rhs_kernels.coast_rhs)
+    return _numba_kernels
+
+def resolve_rhs_backend(backend=DEFAULT_RHS_BACKEND):
+    """
+    Resolves a backend name to the backend that will be used.
+    Args:
+        backend (str): One of RHS_BACKENDS.
+    Returns:
+        str: 'python' or 'numba'.
+    """
+    if backend not in RHS_BACKENDS:
+        raise ValueError(f"Unknown RHS backend '{backend}'. Use one of {list(RHS_BACKENDS)}")
+    if backend == 'python':
+        return backend
+    if _load_numba_kernels() is not None:
+        return 'numba'
+    if backend == 'numba':
+        raise ImportError("The numba RHS backend needs the numba package: pip install numba")
+    return 'python'
+
+def make_rocket_rhs(stage, initial_stage_mass, engine_on=True, backend='python'):
+    """
+    Builds the powered-flight RHS of a stage, equivalent to
+    TrajectorySimulator._rocket_equation with these arguments bound.
+    Args:
+        stage (CompiledStage): The currently firing stage.
+        initial_stage_mass (float): The mass of the rocket at the start of the stage burn.
+        engine_on (bool): Whether the engine fires during the integrated segment.
+        backend (str): 'python' or 'numba' (see resolve_rhs_backend).
+    Returns:
+        callable: fun(t, y) for solve_ivp, returning [acceleration, velocity].
+    """
+    if backend == 'numba':
+        kernel = _load_numba_kernels()[0]
+        arrays = (np.array(stage.thrust_times), np.array(stage.thrust_values),
+                  np.array(stage.thrust_slopes), np.array(stage.cd_grid))
+        initial_stage_mass = float(initial_stage_mass)
+        mass_flow_rate = float(stage.mass_flow_rate)
+        num_engines = float(stage.num_engines)
+        reference_area = float(stage.reference_area)
+        density, speed_of_sound = atmosphere.DENSITY, atmosphere.SPEED_OF_SOUND
+
+        def numba_rhs(t, y):
+            return kernel(t, y, initial_stage_mass, mass_flow_rate, num_engines, engine_on,
+                          *arrays, reference_area, density, speed_of_sound)
+        return numba_rhs
+
+    mass_flow_rate = stage.mass_flow_rate
+    num_engines = stage.num_engines
+    times, values, slopes = stage.thrust_times, stage.thrust_values, stage.thrust_slopes
+    first_time, last_time, last_value = times[0], times[-1], values[-1]
+    drag = _make_drag(stage)
+    G, EARTH_RADIUS = constants.G, constants.EARTH_RADIUS
+
+    def rocket_rhs(t, y):
+        velocity, altitude = y.tolist()
+        current_mass = initial_stage_mass - mass_flow_rate * t
+
+        # Thrust interpolated like np.interp, zero outside the table
+        if not engine_on:
+            thrust = 0
+        elif t == last_time:
+            thrust = last_value * num_engines
+        elif first_time <= t < last_time:
+            j = bisect_right(times, t) - 1
+            start = times[j]
+            thrust = (values[j] if start == t else slopes[j] * (t - start) + values[j]) * num_engines
+        else:
+            thrust = 0.0
+
+        g = G * (EARTH_RADIUS / (EARTH_RADIUS + altitude))**2
+        acceleration = (thrust / current_mass) - g - drag(velocity, altitude, current_mass)
+
+        # The launch pad holds the vehicle down until thrust exceeds weight
+        if altitude <= 0 and velocity <= 0 and acceleration < 0:
+            acceleration = 0
+        return [acceleration, velocity]
+    return rocket_rhs
+
+def make_coast_rhs(stage, mass, backend='python'):
+    """
+    Builds the unpowered-flight RHS after the last burn, equivalent to
+    TrajectorySimulator._coast_equation with these arguments bound.
+    Args:
+        stage (CompiledStage): The spent final stage, which sets the drag properties.
+        mass (float): The constant mass of the coasting vehicle.
+        backend (str): 'python' or 'numba' (see resolve_rhs_backend).
+    Returns:
+        callable: fun(t, y) for solve_ivp, returning [acceleration, velocity].
+    """
+    if backend == 'numba':
+        kernel = _load_numba_kernels()[1]
+        cd_grid = np.array(stage.cd_grid)
+        mass = float(mass)
+        reference_area = float(stage.reference_area)
+        density, speed_of_sound = atmosphere.DENSITY, atmosphere.SPEED_OF_SOUND
+
+        def numba_rhs(t, y):
+            return kernel(t, y, mass, cd_grid, reference_area, density, speed_of_sound)
+        return numba_rhs
+
+    drag = _make_drag(stage)
+    G, EARTH_RADIUS = constants.G, constants.EARTH_RADIUS
+
+    def coast_rhs(t, y):
+        velocity, altitude = y.tolist()
+        g = G * (EARTH_RADIUS / (EARTH_RADIUS + altitude))**2
+        return [-g - drag(velocity, altitude, mass), velocity]
+    return coast_rhs
+
+def _make_drag(stage):
+    """
+    Builds the drag acceleration of a stage as a function of (velocity, altitude, mass),
+    with the atmosphere and Cd lookups inlined.
+    """
+    reference_area = stage.reference_area
+    if not reference_area:
+        return lambda velocity, altitude, mass: 0
+
+    cd_grid = stage.cd_grid
+    cd_last = len(cd_grid) - 1
+    density_table, sound_table = _DENSITY, _SPEED_OF_SOUND
+    top = len(density_table) - 1
+    ALTITUDE_STEP, MACH_STEP = atmosphere.ALTITUDE_STEP, aerodynamics.MACH_STEP
+
+    def drag(velocity, altitude, mass):
+        x = altitude / ALTITUDE_STEP
+        if x <= 0:
+            density, speed_of_sound = density_table[0], sound_table[0]
+        else:
+            i = int(x)
+            if i >= top:
+                return 0
+            f = x - i
+            density = density_table[i] + f * (density_table[i + 1] - density_table[i])
+            speed_of_sound = sound_table[i] + f * (sound_table[i + 1] - sound_table[i])
+            if not density:
+                return 0
+
+        x = abs(velocity) / speed_of_sound / MACH_STEP
+        i = int(x)
+        cd = cd_grid[cd_last] if i >= cd_last else cd_grid[i] + (x - i) * (cd_grid[i + 1] - cd_grid[i])
+        return 0.5 * density * velocity * abs(velocity) * cd * reference_area / mass
+    return drag
@@ -0,0 +1,67 @@
+# src/utils/aerodynamics.py
+
+"""
+Drag coefficient tables as a function of Mach number.
+"""
+
+import numpy as np
+
+# Resolution of the uniform Mach grid used for scalar lookups
+MACH_STEP = 0.01
+
+# Typical slender launch vehicle: flat subsonic, transonic rise peaking near
+# Mach 1.1-1.2, then a slow supersonic decline. Columns are (Mach, Cd).
+DEFAULT_CD_TABLE = (
+    (0.0, 0.30),
+    (0.5, 0.30),
+    (0.8, 0.32),
+    (0.9, 0.40),
+    (1.0, 0.55),
+    (1.1, 0.60),
+    (1.2, 0.58),
+    (1.5, 0.50),
+    (2.0, 0.40),
+    (3.0, 0.30),
+    (5.0, 0.25),
+    (10.0, 0.22),
+)
+
+class DragCoefficient:
+    """
+    Drag coefficient interpolated from a Mach table, held constant beyond its ends.
+    """
+    def __init__(self, table=DEFAULT_CD_TABLE):
+        """
+        Args:
+            table (float or list): A constant Cd, or [mach, cd] pairs with increasing Mach.
+        """
+        if np.ndim(table) == 0:
+            table = ((0.0, float(table)),)
+        table = np.asarray(table, dtype=float)
+        if table.ndim != 2 or table.shape[1] != 2 or np.any(np.diff(table[:, 0]) <= 0):
+            raise ValueError("A drag coefficient table needs [mach, cd] pairs with increasing Mach")
+        self.mach = table[:, 0]
+        self.cd = table[:, 1]
+        # Resampled onto a uniform grid so scalar lookups need no search
+        grid = np.arange(0.0, self.mach[-1] + MACH_STEP, MACH_STEP)
+        self._grid_cd = np.interp(grid, self.mach, self.cd).tolist()
+        self._last = len(self._grid_cd) - 1
+
+    def __call__(self, mach):
+        """
+        Returns the drag coefficient at a Mach number (scalar or array).
+        """
+        if not isinstance(mach, (int, float)):
+            return np.interp(mach, self.mach, self.cd)
+        x = mach / MACH_STEP
+        i = int(x)
+        if i >= self._last:
+            return self._grid_cd[self._last]
+        cd = self._grid_cd
+        return cd[i] + (x - i) * (cd[i + 1] - cd[i])
+
+    def to_list(self):
+        """
+        Serializes the table as [mach, cd] pairs.
+        """
+        return np.column_stack((self.mach, self.cd)).tolist()
@@ -0,0 +1,173 @@
+# src/utils/atmosphere.py
+
+"""
+U.S. Standard Atmosphere 1976, tabulated once at import for fast lookups.
+
+Below 86 km the table is built from the standard's layer equations. Above it,
+density, pressure and temperature are interpolated (log-linear for density and
+pressure) from the standard's published values up to 1000 km. Beyond 1000 km
+the atmosphere is treated as vacuum. The speed of sound uses the sea-level
+molar mass at all altitudes, which is only an approximation above 86 km where
+it no longer matters for drag.
+"""
+
+import math
+import numpy as np
+from utils import constants
+
+# Physical constants of the 1976 standard
+R_STAR = 8.31432            # universal gas constant, J/(mol K)
+MOLAR_MASS = 0.0289644      # mean molar mass of sea-level air, kg/mol
+GAMMA = 1.4                 # ratio of specific heats
+EARTH_RADIUS_EFFECTIVE = 6356766.0  # m, for geometric-to-geopotential conversion
+R_AIR = R_STAR / MOLAR_MASS
+
+# Lower atmosphere layers: (base geopotential altitude in m, lapse rate in K/m)
+LAYERS = (
+    (0.0, -0.0065),
+    (11000.0, 0.0),
+    (20000.0, 0.001),
+    (32000.0, 0.0028),
+    (47000.0, 0.0),
+    (51000.0, -0.0028),
+    (71000.0, -0.002),
+)
+SEA_LEVEL_TEMPERATURE = 288.15  # K
+SEA_LEVEL_PRESSURE = 101325.0   # Pa
+
+# Upper atmosphere from the 1976 tables: geometric altitude (km), temperature (K),
+# pressure (Pa), density (kg/m^3)
+UPPER_TABLE = (
+    (86, 186.87, 3.734e-1, 6.958e-6),
+    (90, 186.87, 1.836e-1, 3.416e-6),
+    (100, 195.08, 3.201e-2, 5.604e-7),
+    (110, 240.00, 7.104e-3, 9.708e-8),
+    (120, 360.00, 2.538e-3, 2.222e-8),
+    (130, 469.27, 1.251e-3, 8.152e-9),
+    (150, 634.39, 4.541e-4, 2.076e-9),
+    (200, 854.56, 8.474e-5, 2.541e-10),
+    (250, 941.33, 2.484e-5, 6.073e-11),
+    (300, 976.01, 8.770e-6, 1.916e-11),
+    (400, 995.83, 1.452e-6, 2.803e-12),
+    (500, 999.24, 3.019e-7, 5.215e-13),
+    (600, 999.85, 8.213e-8, 1.137e-13),
+    (700, 999.97, 3.144e-8, 3.070e-14),
+    (800, 999.99, 1.704e-8, 1.136e-14),
+    (900, 1000.00, 1.075e-8, 5.759e-15),
+    (1000, 1000.00, 7.514e-9, 3.561e-15),
+)
+
+# Uniform lookup grid
+ALTITUDE_STEP = 100.0       # m
+MAX_ALTITUDE = 1000000.0    # m
+
+def _lower_atmosphere(altitude):
+    """
+    Evaluates the layer equations of the standard below 86 km.
+    Args:
+        altitude (np.ndarray): Geometric altitudes in meters.
+    Returns:
+        tuple: (temperature, pressure) arrays.
+    """
+    h = EARTH_RADIUS_EFFECTIVE * altitude / (EARTH_RADIUS_EFFECTIVE + altitude)
+    temperature = np.empty_like(h)
+    pressure = np.empty_like(h)
+
+    base_temperature, base_pressure = SEA_LEVEL_TEMPERATURE, SEA_LEVEL_PRESSURE
+    for i, (base, lapse) in enumerate(LAYERS):
+        top = LAYERS[i + 1][0] if i + 1 < len(LAYERS) else np.inf
+        in_layer = (h >= base) & (h < top)
+        dh = h[in_layer] - base
+        if lapse == 0:
+            temperature[in_layer] = base_temperature
+            pressure[in_layer] = base_pressure * np.exp(-constants.G * dh / (R_AIR * base_temperature))
+        else:
+            temperature[in_layer] = base_temperature + lapse * dh
+            pressure[in_layer] = base_pressure * (temperature[in_layer] / base_temperature) ** (-constants.G / (R_AIR * lapse))
+
+        if np.isfinite(top):
+            # Carry the layer's top conditions to the next layer's base
+            if lapse == 0:
+                base_pressure *= math.exp(-constants.G * (top - base) / (R_AIR * base_temperature))
+            else:
+                top_temperature = base_temperature + lapse * (top - base)
+                base_pressure *= (top_temperature / base_temperature) ** (-constants.G / (R_AIR * lapse))
+                base_temperature = top_temperature
+    return temperature, pressure
+
+def _build_table():
+    altitude = np.arange(0.0, MAX_ALTITUDE + ALTITUDE_STEP, ALTITUDE_STEP)
+    upper = np.array(UPPER_TABLE)
+    upper_altitude = upper[:, 0] * 1000
+
+    lower = altitude < upper_altitude[0]
+    temperature = np.empty_like(altitude)
+    pressure = np.empty_like(altitude)
+    density = np.empty_like(altitude)
+
+    temperature[lower], pressure[lower] = _lower_atmosphere(altitude[lower])
+    density[lower] = pressure[lower] / (R_AIR * temperature[lower])
+
+    high = altitude[~lower]
+    temperature[~lower] = np.interp(high, upper_altitude, upper[:, 1])
+    pressure[~lower] = np.exp(np.interp(high, upper_altitude, np.log(upper[:, 2])))
+    density[~lower] = np.exp(np.interp(high, upper_altitude, np.log(upper[:, 3])))
+
+    speed_of_sound = np.sqrt(GAMMA * R_AIR * temperature)
+    return altitude, density, pressure, speed_of_sound
+
+ALTITUDES, DENSITY, PRESSURE, SPEED_OF_SOUND = _build_table()
+
+# Python lists for the scalar fast path, which avoids NumPy call overhead in the RHS
+_density = DENSITY.tolist()
+_pressure = PRESSURE.tolist()
+_speed_of_sound = SPEED_OF_SOUND.tolist()
+_last = len(_density) - 1
+
+def density(altitude):
+    """
+    Returns the air density in kg/m^3 at a geometric altitude in meters (scalar or array).
+    """
+    if isinstance(altitude, (int, float)):
+        return _lookup(_density, altitude, 0.0)
+    return np.interp(altitude, ALTITUDES, DENSITY, right=0.0)
+
+def pressure(altitude):
+    """
+    Returns the air pressure in Pa at a geometric altitude in meters (scalar or array).
+    """
+    if isinstance(altitude, (int, float)):
+        return _lookup(_pressure, altitude, 0.0)
+    return np.interp(altitude, ALTITUDES, PRESSURE, right=0.0)
+
+def speed_of_sound(altitude):
+    """
+    Returns the speed of sound in m/s at a geometric altitude in meters (scalar or array).
+    """
+    if isinstance(altitude, (int, float)):
+        return _lookup(_speed_of_sound, altitude, _speed_of_sound[_last])
+    return np.interp(altitude, ALTITUDES, SPEED_OF_SOUND)
+
+def density_and_speed_of_sound(altitude):
+    """
+    Returns (density, speed of sound) at a scalar altitude with a single table index.
+    This is the drag model's hot path.
+    """
+    x = altitude / ALTITUDE_STEP
+    if x <= 0:
+        return _density[0], _speed_of_sound[0]
+    i = int(x)
+    if i >= _last:
+        return 0.0, _speed_of_sound[_last]
+    f = x - i
+    return (_density[i] + f * (_density[i + 1] - _density[i]),
+            _speed_of_sound[i] + f * (_speed_of_sound[i + 1] - _speed_of_sound[i]))
+
+def _lookup(table, altitude, above):
+    x = altitude / ALTITUDE_STEP
+    if x <= 0:
+        return table[0]
+    i = int(x)
+    if i >= _last:
+        return above
+    return table[i] + (x - i) * (table[i + 1] - table[i])
@@ -0,0 +1,278 @@
+# src/utils/streaming_stats.py
+
+"""
+Mergeable streaming statistics with bounded memory.
+
+Every aggregator takes observations one batch at a time and can be merged with
+another aggregator of the same kind, so worker processes can each reduce their
+share of a large set of runs and the parent combines the partial results.
+Memory depends on the aggregator's settings, not on the number of observations.
+
+    RunningStats       count, mean, variance, min and max of a vector of quantities
+    QuantileSketch     approximate quantiles of one quantity (KLL sketch)
+    TimeBinnedEnvelope per-time-bin RunningStats and quantiles of sampled curves
+"""
+
+import math
+import numpy as np
+
+DEFAULT_SKETCH_SIZE = 200
+
+# Curves a TimeBinnedEnvelope buffers before feeding its bin sketches
+ENVELOPE_BUFFER = 64
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of every element of a fixed-length vector,
+    updated with Welford's algorithm and merged with Chan et al.'s formulas.
+    NaN elements of an observation are skipped, so elements can have different counts.
+    """
+    def __init__(self, size=1):
+        self.count = np.zeros(size, dtype=np.int64)
+        self.mean = np.zeros(size)
+        self._m2 = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+
+    def __len__(self):
+        return len(self.count)
+
+    def grow(self, size):
+        """
+        Extends the vector to `size` elements; the new elements have no observations.
+        """
+        extra = size - len(self)
+        if extra > 0:
+            self.count = np.concatenate((self.count, np.zeros(extra, dtype=np.int64)))
+            self.mean = np.concatenate((self.mean, np.zeros(extra)))
+            self._m2 = np.concatenate((self._m2, np.zeros(extra)))
+            self.min = np.concatenate((self.min, np.full(extra, np.inf)))
+            self.max = np.concatenate((self.max, np.full(extra, -np.inf)))
+
+    def update(self, values):
+        """
+        Adds one observation of the vector.
+        Args:
+            values (array-like): One value per element, or fewer to only update the
+                leading elements. NaN values are skipped.
+        """
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        seen = ~np.isnan(values)
+        values = np.where(seen, values, 0.0)
+        count = self.count[:n] + seen
+        delta = values - self.mean[:n]
+        self.mean[:n] += np.where(seen, delta / np.maximum(count, 1), 0.0)
+        self._m2[:n] += np.where(seen, delta * (values - self.mean[:n]), 0.0)
+        self.count[:n] = count
+        self.min[:n] = np.where(seen, np.minimum(self.min[:n], values), self.min[:n])
+        self.max[:n] = np.where(seen, np.maximum(self.max[:n], values), self.max[:n])
+
+    def merge(self, other):
+        """
+        Adds the observations of another RunningStats, growing to its length if needed.
+        """
+        self.grow(len(other))
+        n = len(other)
+        count = self.count[:n] + other.count
+        total = np.maximum(count, 1)
+        delta = other.mean - self.mean[:n]
+        self.mean[:n] += delta * other.count / total
+        self._m2[:n] += other._m2 + delta**2 * self.count[:n] * other.count / total
+        self.count[:n] = count
+        self.min[:n] = np.minimum(self.min[:n], other.min)
+        self.max[:n] = np.maximum(self.max[:n], other.max)
+
+    @property
+    def variance(self):
+        """
+        Sample variance of every element (NaN with fewer than two observations).
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > 1, self._m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+class QuantileSketch:
+    """
+    KLL quantile sketch: approximate quantiles of a stream in O(k) memory.
+
+    Values are kept in levels of sorted buffers. An item on level h stands for
+    2**h observations. When a level overflows its capacity, every other item
+    (alternating between the odd and even ones) moves up a level. Capacities
+    shrink by 2/3 per level below the top, so the sketch never holds more than
+    about 3k items. At k=200 the rank error is below 1%.
+    """
+    def __init__(self, k=DEFAULT_SKETCH_SIZE):
+        """
+        Args:
+            k (int): Capacity of the top level; larger is more accurate.
+        """
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._levels = [np.empty(0)]
+        self._odd = False
+
+    def update(self, values):
+        """
+        Adds a batch of values. NaN values are skipped.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._levels[0] = np.concatenate((self._levels[0], values))
+        self._compress()
+
+    def merge(self, other):
+        """
+        Adds the values summarized by another sketch.
+        """
+        if not other.count:
+            return
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate((self._levels[level], items))
+        self._compress()
+
+    def quantile(self, q):
+        """
+        Returns approximate quantiles.
+        Args:
+            q (float or array-like): Quantiles in [0, 1].
+        Returns:
+            float or np.ndarray: The quantiles, NaN for an empty sketch.
+        """
+        q = np.asarray(q, dtype=float)
+        if not self.count:
+            return np.full(q.shape, np.nan)[()]
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(buffer), 2.0**level)
+                                  for level, buffer in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        values = items[np.minimum(index, len(items) - 1)]
+        # The extremes are tracked exactly
+        values = np.where(q <= 0, self.min, np.where(q >= 1, self.max, values))
+        return values[()]
+
+    def _capacity(self, level):
+        depth = len(self._levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2 / 3)**depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self._levels):
+                self._levels.append(np.empty(0))
+            items = np.sort(items)
+            # An odd item out stays on this level
+            keep = len(items) % 2
+            self._odd = not self._odd
+            promoted = items[keep + self._odd::2]
+            self._levels[level] = items[:keep]
+            self._levels[level + 1] = np.concatenate((self._levels[level + 1], promoted))
+            # A new top level shrinks the capacities below it, so start over
+            level = 0
+
+class TimeBinnedEnvelope:
+    """
+    Envelope of many curves of a quantity over time: the RunningStats and a
+    QuantileSketch of the curves' values at the center of every fixed-width time bin.
+    Curves are sampled by linear interpolation and only within their own time span,
+    so late bins only count the curves that reach them.
+    """
+    def __init__(self, bin_width, k=DEFAULT_SKETCH_SIZE):
+        """
+        Args:
+            bin_width (float): Width of the time bins, in the curves' time unit.
+            k (int): Size of each bin's QuantileSketch.
+        """
+        if bin_width <= 0:
+            raise ValueError("bin_width must be positive")
+        self.bin_width = bin_width
+        self.k = k
+        self.stats = RunningStats(0)
+        self.sketches = []
+        # Samples of the latest curves, fed to the sketches one batch per bin
+        self._pending = []
+
+    def __len__(self):
+        return len(self.sketches)
+
+    @property
+    def centers(self):
+        """
+        Times of the bin centers.
+        """
+        return (np.arange(len(self)) + 0.5) * self.bin_width
+
+    def update(self, time, values):
+        """
+        Adds one curve.
+        Args:
+            time (np.ndarray): Increasing sample times, starting at or after 0.
+            values (np.ndarray): The quantity at those times.
+        """
+        time = np.asarray(time, dtype=float)
+        if not len(time):
+            return
+        bins = int(time[-1] / self.bin_width + 0.5)
+        self._grow(bins)
+        centers = (np.arange(bins) + 0.5) * self.bin_width
+        samples = np.interp(centers, time, values, left=np.nan)
+        self.stats.update(samples)
+        self._pending.append(samples)
+        if len(self._pending) >= ENVELOPE_BUFFER:
+            self._flush()
+
+    def merge(self, other):
+        """
+        Adds the curves of another envelope with the same bin width.
+        """
+        if other.bin_width != self.bin_width:
+            raise ValueError("Only envelopes with the same bin width can be merged")
+        self._grow(len(other))
+        self.stats.merge(other.stats)
+        self._flush()
+        other._flush()
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+
+    def quantile(self, q):
+        """
+        Returns the approximate quantiles of every bin, shaped (len(q), bins).
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        self._flush()
+        return np.array([sketch.quantile(q) for sketch in self.sketches]).reshape(-1, len(q)).T
+
+    def _flush(self):
+        if not self._pending:
+            return
+        batch = np.full((len(self._pending), len(self)), np.nan)
+        for row, samples in zip(batch, self._pending):
+            row[:len(samples)] = samples
+        for sketch, column in zip(self.sketches, batch.T):
+            sketch.update(column)
+        self._pending = []
+
+    def _grow(self, bins):
+        self.stats.grow(bins)
+        self.sketches.extend(QuantileSketch(self.k) for _ in range(bins - len(self.sketches)))
@@ -0,0 +1,78 @@
+# src/visualization/downsample.py
+
+"""
+Shape-preserving downsampling of trajectory traces for plotting.
+"""
+
+import numpy as np
+
+def lttb_indices(x, y, num_points):
+    """
+    Selects the points of a series with the largest-triangle-three-buckets algorithm.
+    The first and last points are always kept. The rest are split into equal buckets
+    and each bucket keeps the point forming the largest triangle with the point kept
+    from the previous bucket and the average of the next one.
+    Args:
+        x (np.ndarray): Monotonic x values.
+        y (np.ndarray): y values of the same length.
+        num_points (int): Number of points to keep.
+    Returns:
+        np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(x)
+    if num_points >= n:
+        return np.arange(n)
+    if num_points < 3:
+        return np.array([0, n - 1][:max(num_points, 1)])
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket boundaries for the num_points - 2 interior points, and the mean of
+    # every bucket with the last point appended as a final one-point bucket
+    edges = np.linspace(1, n - 1, num_points - 1).astype(int)
+    mean_x = np.append(np.add.reduceat(x[:-1], edges[:-1]) / np.diff(edges), x[-1]).tolist()
+    mean_y = np.append(np.add.reduceat(y[:-1], edges[:-1]) / np.diff(edges), y[-1]).tolist()
+    edges = edges.tolist()
+
+    selected = [0]
+    ax, ay = float(x[0]), float(y[0])
+    for i in range(num_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = mean_x[i + 1], mean_y[i + 1]
+        # Twice the triangle area, expanded so each bucket needs few array operations
+        area = (ax - cx) * y[lo:hi] + (cy - ay) * x[lo:hi]
+        area -= (ax - cx) * ay + (cy - ay) * ax
+        a = lo + int(np.abs(area, out=area).argmax())
+        selected.append(a)
+        ax, ay = float(x[a]), float(y[a])
+    selected.append(n - 1)
+    return np.array(selected)
+
+def downsample(x, y, max_points, breaks=()):
+    """
+    Downsamples a series to about `max_points` points with LTTB, keeping the points
+    on both sides of every break (e.g. stage separations) by downsampling each
+    segment between breaks on its own.
+    Args:
+        x (np.ndarray): Monotonic x values.
+        y (np.ndarray): y values of the same length.
+        max_points (int or None): Point budget. None keeps every point.
+        breaks (sequence): Indices at which a new segment starts.
+    Returns:
+        tuple: (x, y) arrays of the kept points.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if max_points is None or len(x) <= max_points:
+        return x, y
+
+    bounds = np.concatenate(([0], np.asarray(breaks, dtype=int), [len(x)]))
+    keep = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end <= start:
+            continue
+        # Share the budget by segment length, keeping at least both ends
+        budget = max(2, int(round(max_points * (end - start) / len(x))))
+        keep.append(start + lttb_indices(x[start:end], y[start:end], budget))
+    keep = np.concatenate(keep)
+    return x[keep], y[keep]
@@ -1,117 +1,248 @@
 # src/visualization/plotter.py
 
-import matplotlib.pyplot as plt
+# The plotting backends are imported by the functions that use them, so that
+# importing this module (e.g. for a headless CLI run) stays cheap
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from visualization.downsample import downsample
 
-def plot_results_plotly(results):
+# Default number of points drawn per trace
+DEFAULT_MAX_POINTS = 2000
+
+# Traces with more points than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 5000
+
+# Panels of the trajectory plots: (column, y-axis title, subplot title)
+TRAJECTORY_PANELS = (
+    ('altitude', 'Altitude (km)', 'Altitude vs. Time'),
+    ('velocity', 'Velocity (m/s)', 'Velocity vs. Time'),
+    ('mass', 'Mass (kg)', 'Mass vs. Time'),
+    ('thrust', 'Thrust (N)', 'Thrust vs. Time'),
+)
+
+# Line colors of the missions in a comparison, repeated beyond eight missions
+COMPARISON_COLORS = ('cyan', 'lime', 'magenta', 'yellow', 'orange', 'dodgerblue', 'tomato', 'white')
+
+def plot_results_plotly(results, max_points=DEFAULT_MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD):
     """
     Generates and returns an interactive Plotly figure.
     Args:
-        results (dict): The dictionary of simulation data.
+        results (SimulationResult or dict): The simulation data.
+        max_points (int, optional): Point budget per trace. Longer traces are
+            downsampled with LTTB, keeping the points at stage separations.
+            None draws every sample.
+        webgl_threshold (int): Traces with more points than this use Scattergl.
     Returns:
         go.Figure: A Plotly figure object.
     """
-    time = results['time']
-    stage = results['stage']
+    import plotly.graph_objects as go
 
-    # Create subplots
-    fig = make_subplots(
-        rows=4, cols=1,
-        shared_xaxes=True,
-        vertical_spacing=0.05,
-        subplot_titles=('Altitude vs. Time', 'Velocity vs. Time', 'Mass vs. Time', 'Thrust vs. Time')
-    )
+    time = np.asarray(results['time'])
+    stage = np.asarray(results['stage'])
+    stage_changes = np.flatnonzero(np.diff(stage))
+
+    def trace(column, **kwargs):
+        x, y = downsample(time, results[column], max_points, stage_changes + 1)
+        scatter = go.Scattergl if len(x) > webgl_threshold else go.Scatter
+        return scatter(x=x, y=y, mode='lines', **kwargs)
+
+    fig = _trajectory_subplots()
 
     # Add traces
-    fig.add_trace(go.Scatter(x=time, y=results['altitude'], name='Altitude (km)', mode='lines', line=dict(color='cyan')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=time, y=results['velocity'], name='Velocity (m/s)', mode='lines', line=dict(color='lime')), row=2, col=1)
-    fig.add_trace(go.Scatter(x=time, y=results['mass'], name='Mass (kg)', mode='lines', line=dict(color='magenta')), row=3, col=1)
-    fig.add_trace(go.Scatter(x=time, y=results['thrust'], name='Thrust (N)', mode='lines', line=dict(color='yellow')), row=4, col=1)
-
-    # Add stage separation lines
-    stage_changes = np.where(np.diff(stage) != 0)[0]
-    for change_idx in stage_changes:
-        fig.add_vline(
-            x=time[change_idx], 
-            line_width=2, 
-            line_dash="dash", 
-            line_color="gray",
-            annotation_text=f"Stage {stage[change_idx]} Sep",
-            annotation_position="top right"
-        )
+    fig.add_trace(trace('altitude', name='Altitude (km)', line=dict(color='cyan')), row=1, col=1)
+    fig.add_trace(trace('velocity', name='Velocity (m/s)', line=dict(color='lime')), row=2, col=1)
+    fig.add_trace(trace('mass', name='Mass (kg)', line=dict(color='magenta')), row=3, col=1)
+    fig.add_trace(trace('thrust', name='Thrust (N)', line=dict(color='yellow')), row=4, col=1)
+
+    # Stage separation lines across all subplots, added in a single layout update
+    # because add_vline re-validates the whole layout on every call
+    shapes = _separation_lines(time[stage_changes], 'gray', width=2)
+    annotations = list(fig.layout.annotations) + [
+        dict(x=time[i], xref='x', y=1, yref='paper', text=f"Stage {stage[i]} Sep",
+             showarrow=False, xanchor='left', yanchor='bottom')
+        for i in stage_changes
+    ]
 
     # Update layout
     fig.update_layout(
         title_text='StellarLab Mission Simulation Results',
         template='plotly_dark',
         height=900,
-        showlegend=False
+        showlegend=False,
+        shapes=shapes,
+        annotations=annotations
+    )
+    return fig
+
+def plot_comparison_plotly(store, max_points=DEFAULT_MAX_POINTS, webgl_threshold=WEBGL_THRESHOLD):
+    """
+    Overlays the trajectories of several missions on the four panels of
+    plot_results_plotly, one color per mission.
+    Args:
+        store (ComparisonStore): The missions to compare.
+        max_points (int, optional): Point budget per trace (see plot_results_plotly).
+        webgl_threshold (int): Traces with more points than this use Scattergl.
+    Returns:
+        go.Figure: A Plotly figure object.
+    """
+    import plotly.graph_objects as go
+
+    fig = _trajectory_subplots()
+    shapes = []
+    for i, name in enumerate(store.names):
+        results = store.result(name)
+        color = COMPARISON_COLORS[i % len(COMPARISON_COLORS)]
+        time = results['time']
+        stage_changes = results.separation_indices()
+        for row, (column, _, _) in enumerate(TRAJECTORY_PANELS, start=1):
+            x, y = downsample(time, results[column], max_points, stage_changes + 1)
+            scatter = go.Scattergl if len(x) > webgl_threshold else go.Scatter
+            fig.add_trace(scatter(x=x, y=y, mode='lines', name=name, legendgroup=name,
+                                  showlegend=row == 1, line=dict(color=color)), row=row, col=1)
+        shapes += _separation_lines(time[stage_changes], color, width=1)
+
+    fig.update_layout(
+        title_text=f"Mission Comparison ({len(store)} missions)",
+        template='plotly_dark',
+        height=900,
+        shapes=shapes
+    )
+    return fig
+
+def _trajectory_subplots():
+    """
+    Returns the four stacked panels (altitude, velocity, mass and thrust against
+    time) shared by the trajectory plots, without traces.
+    """
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(
+        rows=len(TRAJECTORY_PANELS), cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=[title for _, _, title in TRAJECTORY_PANELS]
+    )
+    for row, (_, label, _) in enumerate(TRAJECTORY_PANELS, start=1):
+        fig.update_yaxes(title_text=label, row=row, col=1)
+    fig.update_xaxes(title_text="Time (s)", row=len(TRAJECTORY_PANELS), col=1)
+    return fig
+
+def _separation_lines(times, color, width):
+    """
+    Returns dashed vertical line shapes across all panels at the given times.
+    """
+    return [
+        dict(type='line', xref='x', yref='paper', x0=t, x1=t, y0=0, y1=1,
+             line=dict(color=color, width=width, dash='dash'))
+        for t in times
+    ]
+
+def plot_envelopes_plotly(result):
+    """
+    Plots the altitude and velocity envelopes of a Monte Carlo dispersion analysis:
+    the min-max range, the 5-95 percentile band and the median of every time bin.
+    Args:
+        result (MonteCarloResult): The analysis result.
+    Returns:
+        go.Figure: A Plotly figure object.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.08,
+        subplot_titles=('Altitude Dispersion', 'Velocity Dispersion')
     )
+    colors = {'altitude': '0, 255, 255', 'velocity': '0, 255, 0'}
+    for row, column in enumerate(('altitude', 'velocity'), start=1):
+        envelope = result.envelopes[column]
+        time = envelope['time']
+        rgb = colors[column]
+        for low, high, name, alpha in (('min', 'max', 'Min-max', 0.15), ('p5', 'p95', '5-95%', 0.35)):
+            fig.add_trace(go.Scatter(x=time, y=envelope[high], mode='lines', line=dict(width=0),
+                                     showlegend=False, hoverinfo='skip'), row=row, col=1)
+            fig.add_trace(go.Scatter(x=time, y=envelope[low], mode='lines', line=dict(width=0),
+                                     fill='tonexty', fillcolor=f"rgba({rgb}, {alpha})",
+                                     name=name, legendgroup=name, showlegend=row == 1),
+                          row=row, col=1)
+        fig.add_trace(go.Scatter(x=time, y=envelope['p50'], mode='lines', name='Median',
+                                 line=dict(color=f"rgb({rgb})"), legendgroup='median',
+                                 showlegend=row == 1), row=row, col=1)
 
-    # Update y-axis titles
+    fig.update_layout(
+        title_text=f"Dispersion Envelopes ({result.info['runs'] - result.info['failed']} runs)",
+        template='plotly_dark',
+        height=700,
+    )
     fig.update_yaxes(title_text="Altitude (km)", row=1, col=1)
     fig.update_yaxes(title_text="Velocity (m/s)", row=2, col=1)
-    fig.update_yaxes(title_text="Mass (kg)", row=3, col=1)
-    fig.update_yaxes(title_text="Thrust (N)", row=4, col=1)
-    fig.update_xaxes(title_text="Time (s)", row=4, col=1)
-
+    fig.update_xaxes(title_text="Time (s)", row=2, col=1)
     return fig
 
 
 # Kept for legacy CLI usage, but with a cooler theme
-def plot_results_matplotlib(results):
+def plot_results_matplotlib(results, max_points=DEFAULT_MAX_POINTS, show=True):
     """
     Generates and displays plots for the simulation results using Matplotlib.
     Args:
-        results (dict): The dictionary of simulation data.
+        results (SimulationResult or dict): The simulation data.
+        max_points (int, optional): Point budget per axis (see plot_results_plotly).
+        show (bool): Open the plot window. Pass False to only build the figure.
+    Returns:
+        matplotlib.figure.Figure: The figure.
     """
+    import matplotlib.pyplot as plt
+
     plt.style.use('dark_background') # Use a dark theme
-    time = results['time']
-    altitude = results['altitude']
-    velocity = results['velocity']
-    mass = results['mass']
-    thrust = results['thrust']
-    stage = results['stage']
+    time = np.asarray(results['time'])
+    stage = np.asarray(results['stage'])
+    stage_changes = np.flatnonzero(np.diff(stage))
+    breaks = stage_changes + 1
+    time_altitude, altitude = downsample(time, results['altitude'], max_points, breaks)
+    time_velocity, velocity = downsample(time, results['velocity'], max_points, breaks)
+    time_mass, mass = downsample(time, results['mass'], max_points, breaks)
+    time_thrust, thrust = downsample(time, results['thrust'], max_points, breaks)
 
     fig, axs = plt.subplots(4, 1, figsize=(12, 18), sharex=True)
     fig.suptitle('StellarLab Mission Simulation Results', fontsize=16)
 
     # Plot 1: Altitude vs. Time
-    axs[0].plot(time, altitude, 'c-', label='Altitude')
+    axs[0].plot(time_altitude, altitude, 'c-', label='Altitude')
     axs[0].set_ylabel('Altitude (km)')
     axs[0].grid(True, alpha=0.3)
     axs[0].legend()
 
     # Plot 2: Velocity vs. Time
-    axs[1].plot(time, velocity, 'g-', label='Velocity')
+    axs[1].plot(time_velocity, velocity, 'g-', label='Velocity')
     axs[1].set_ylabel('Velocity (m/s)')
     axs[1].grid(True, alpha=0.3)
     axs[1].legend()
 
     # Plot 3: Mass vs. Time
-    axs[2].plot(time, mass, 'm-', label='Total Mass')
+    axs[2].plot(time_mass, mass, 'm-', label='Total Mass')
     axs[2].set_ylabel('Mass (kg)')
     axs[2].grid(True, alpha=0.3)
     axs[2].legend()
 
     # Plot 4: Thrust vs. Time
-    axs[3].plot(time, thrust, 'y-', label='Thrust')
+    axs[3].plot(time_thrust, thrust, 'y-', label='Thrust')
     axs[3].set_ylabel('Thrust (N)')
     axs[3].set_xlabel('Time (s)')
     axs[3].grid(True, alpha=0.3)
     axs[3].legend()
 
-    # Add vertical lines for stage separations
-    stage_changes = np.where(np.diff(stage) != 0)[0]
+    # Add vertical lines for stage separations, as one collection per axis
     for ax in axs:
-        for change_idx in stage_changes:
-            ax.axvline(x=time[change_idx], color='gray', linestyle='--', linewidth=1.5, label=f'Stage Sep.')
+        if len(stage_changes):
+            ax.vlines(time[stage_changes], 0, 1, transform=ax.get_xaxis_transform(),
+                      colors='gray', linestyles='--', linewidth=1.5, label='Stage Sep.')
     
     handles, labels = plt.gca().get_legend_handles_labels()
     by_label = dict(zip(labels, handles))
     plt.legend(by_label.values(), by_label.keys())
 
     plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-    plt.show()
+    if show:
+        plt.show()
+    return fig